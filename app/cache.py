@@ -0,0 +1,112 @@
+# app/cache.py
+"""
+Small in-process caches shared by the agent pipeline.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize free-text user input for use as a cache key.
+
+    Case, punctuation and whitespace differences are ignored, so
+    "Paris, June 1-8 BankGold!" and "paris june 1-8  bankgold" share a key.
+    Hyphens, slashes and colons are kept because they carry meaning in dates.
+    """
+    text = re.sub(r"[^a-z0-9\-/:]+", " ", str(text).lower())
+    return " ".join(text.split())
+
+
+class LRUCache:
+    """
+    Size-bounded LRU cache with optional per-entry TTL and hit/miss metrics.
+
+    Safe to use from several threads; values are returned as stored, so
+    callers that mutate results should copy them.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: Optional[float] = None):
+        if max_size < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = self._empty_metrics()
+
+    @staticmethod
+    def _empty_metrics() -> Dict[str, int]:
+        return {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, record=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, record: bool = True) -> Any:
+        """Get a value, refreshing its recency. Expired entries count as misses."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is not None and time.monotonic() >= expires_at:
+                    del self._data[key]
+                    self.metrics["expirations"] += 1
+                else:
+                    self._data.move_to_end(key)
+                    if record:
+                        self.metrics["hits"] += 1
+                    return value
+            if record:
+                self.metrics["misses"] += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries if needed.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Seconds until the entry expires (defaults to the cache TTL;
+                 None means no expiry)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.metrics["evictions"] += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get hit/miss metrics along with the current size and hit rate."""
+        metrics: Dict[str, Any] = dict(self.metrics)
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = metrics["hits"] / lookups if lookups else 0.0
+        metrics["size"] = len(self._data)
+        metrics["max_size"] = self.max_size
+        return metrics
+
+    def reset_metrics(self) -> None:
+        """Reset metrics without dropping entries."""
+        self.metrics = self._empty_metrics()
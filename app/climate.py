@@ -0,0 +1,194 @@
+# app/climate.py
+"""
+Offline climatology: monthly temperature normals per grid cell.
+
+Forecasts only reach about two weeks ahead, so trips planned further out
+are described by climate normals instead. The normals live in a small
+binary table of fixed-size records, sorted by grid cell, that is
+memory-mapped on first use; a lookup binary-searches the mapped bytes and
+never touches the network.
+
+Table layout (little-endian):
+    header  magic "CLIM", cell size in degrees (float32), record count (uint32)
+    record  lat cell, lon cell (int16 each), 12 monthly mean max and
+            12 monthly mean min temperatures (int16, tenths of a degree C)
+
+The table is generated from ``app/data/climate_normals.csv`` (approximate
+monthly normals for the destinations in the gazetteer) with
+``python app/scripts/build_climatology.py``. Places in the same cell are
+averaged.
+"""
+
+import csv
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_TABLE_PATH = os.path.join(DATA_DIR, "climatology.bin")
+DEFAULT_SOURCE_PATH = os.path.join(DATA_DIR, "climate_normals.csv")
+
+# Half a degree is about 55 km, close enough for a city's climate
+DEFAULT_CELL_DEGREES = 0.5
+# Neighbouring cells searched (in each direction) when a point's own cell has no normals
+DEFAULT_SEARCH_CELLS = 2
+
+MAGIC = b"CLIM"
+HEADER = struct.Struct("<4sfI")
+RECORD = struct.Struct("<hh24h")
+
+Cell = Tuple[int, int]
+
+
+@dataclass
+class MonthlyNormals:
+    """
+    Mean daily max/min temperatures (°C) of a grid cell, January first.
+    """
+    lat: float
+    lon: float
+    max_temp: List[float]
+    min_temp: List[float]
+
+    def on(self, day: date) -> Tuple[float, float]:
+        """
+        Normal (max, min) temperature on ``day``.
+
+        Monthly means are taken to hold mid-month and interpolated linearly
+        in between, so consecutive days do not jump at month boundaries.
+        """
+        days_in_month = (date(day.year + day.month // 12, day.month % 12 + 1, 1) - date(day.year, day.month, 1)).days
+        position = day.month - 1 + (day.day - 0.5) / days_in_month - 0.5
+        month = math.floor(position)
+        weight = position - month
+        this, following = month % 12, (month + 1) % 12
+        return (
+            round(self.max_temp[this] * (1 - weight) + self.max_temp[following] * weight, 1),
+            round(self.min_temp[this] * (1 - weight) + self.min_temp[following] * weight, 1),
+        )
+
+
+def cell_of(lat: float, lon: float, cell_degrees: float = DEFAULT_CELL_DEGREES) -> Cell:
+    """Grid cell containing (lat, lon)."""
+    # Rounding first keeps points on a cell edge (41.5 / 0.5 = 82.999...) in the right cell
+    return math.floor(round(lat / cell_degrees, 9)), math.floor(round(lon / cell_degrees, 9))
+
+
+class ClimateIndex:
+    """
+    Read-only, memory-mapped climatology table.
+
+    Args:
+        path: Table file (CLIMATE_TABLE_PATH)
+        search_cells: How far to look for the nearest cell with normals
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH, search_cells: int = DEFAULT_SEARCH_CELLS):
+        self.path = path
+        self.search_cells = search_cells
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.cell_degrees, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or len(self._mm) != HEADER.size + self.count * RECORD.size:
+            self._mm.close()
+            raise ValueError(f"{path} is not a climatology table")
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _cell_at(self, i: int) -> Cell:
+        return struct.unpack_from("<hh", self._mm, HEADER.size + i * RECORD.size)
+
+    def _find(self, cell: Cell) -> Optional[int]:
+        """Record number of ``cell``, or None."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._cell_at(mid) < cell:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.count and self._cell_at(lo) == cell else None
+
+    def _read(self, i: int) -> MonthlyNormals:
+        lat_cell, lon_cell, *values = RECORD.unpack_from(self._mm, HEADER.size + i * RECORD.size)
+        size = self.cell_degrees
+        return MonthlyNormals(
+            lat=round((lat_cell + 0.5) * size, 6),
+            lon=round((lon_cell + 0.5) * size, 6),
+            max_temp=[value / 10 for value in values[:12]],
+            min_temp=[value / 10 for value in values[12:]],
+        )
+
+    def normals(self, lat: float, lon: float) -> Optional[MonthlyNormals]:
+        """
+        Normals of the cell containing (lat, lon), or of the nearest cell
+        within ``search_cells`` that has normals.
+        """
+        lat_cell, lon_cell = cell_of(lat, lon, self.cell_degrees)
+        found = self._find((lat_cell, lon_cell))
+        if found is not None:
+            return self._read(found)
+
+        best: Optional[Tuple[float, int]] = None
+        span = range(-self.search_cells, self.search_cells + 1)
+        scale = math.cos(math.radians(lat))
+        for d_lat in span:
+            for d_lon in span:
+                found = self._find((lat_cell + d_lat, lon_cell + d_lon))
+                if found is not None:
+                    distance = d_lat ** 2 + (d_lon * scale) ** 2
+                    if best is None or distance < best[0]:
+                        best = (distance, found)
+        return self._read(best[1]) if best else None
+
+
+def build_table(source_path: str = DEFAULT_SOURCE_PATH, table_path: str = DEFAULT_TABLE_PATH,
+                cell_degrees: float = DEFAULT_CELL_DEGREES) -> int:
+    """
+    Build the binary table from the human-editable normals CSV.
+
+    Returns:
+        Number of grid cells written
+    """
+    cells: Dict[Cell, List[List[float]]] = defaultdict(list)
+    with open(source_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            values = [float(row[f"max_{month:02d}"]) for month in range(1, 13)]
+            values += [float(row[f"min_{month:02d}"]) for month in range(1, 13)]
+            cells[cell_of(float(row["lat"]), float(row["lon"]), cell_degrees)].append(values)
+
+    tmp_path = table_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, cell_degrees, len(cells)))
+        for cell in sorted(cells):
+            rows = cells[cell]
+            means = [round(10 * sum(column) / len(rows)) for column in zip(*rows)]
+            f.write(RECORD.pack(*cell, *means))
+    os.replace(tmp_path, table_path)
+    return len(cells)
+
+
+_index: Optional[ClimateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_climate_index() -> ClimateIndex:
+    """Get the process-wide climatology table, mapping it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ClimateIndex(os.environ.get("CLIMATE_TABLE_PATH", DEFAULT_TABLE_PATH))
+    return _index
+
+
+def climate_normals(lat: float, lon: float) -> Optional[MonthlyNormals]:
+    """Monthly normals near (lat, lon) from the process-wide table."""
+    return get_climate_index().normals(lat, lon)
@@ -0,0 +1,230 @@
+# app/compaction.py
+"""
+Compaction of tool results before they are fed back to the model.
+
+Raw tool output is written for programs, not prompts: the weather tool
+returns every day it was asked for, search returns full summaries and
+knowledge snippets carry similarity scores. Each tool has a compactor that
+keeps what the model needs for the plan (forecast days
+inside the travel dates, rounded numbers, a bounded amount of search text
+with its sources) and drops the rest. The same compaction is applied to
+pre-fetched results and, through a kernel filter, to tools the model calls
+itself.
+
+Savings are tracked in ``compaction_stats``.
+"""
+
+import json
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.forecast import Forecast
+from app.requirements_parser import parse_date_range
+from app.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Longest search text passed to the model, in characters
+MAX_SEARCH_CHARS = 1200
+# Longest knowledge snippet passed to the model, in characters
+MAX_SNIPPET_CHARS = 400
+# Most source URLs kept from a search result
+MAX_SOURCES = 5
+
+_URL_PATTERN = re.compile(r"https?://[^\s)\]>\"']+")
+
+# Travel dates of the request being planned, used to trim forecasts
+_travel_dates: ContextVar[Optional[Tuple[date, date]]] = ContextVar("travel_dates", default=None)
+
+
+@contextmanager
+def travel_dates_scope(requirements: Dict[str, Any]) -> Iterator[Optional[Tuple[date, date]]]:
+    """
+    Make the request's travel dates available to compactors within this block.
+
+    Tool calls made by the model run in the same task, so the kernel filter
+    sees the dates of the request that triggered them.
+    """
+    window = parse_date_range(str(requirements.get("dates") or ""))
+    token = _travel_dates.set(window)
+    try:
+        yield window
+    finally:
+        _travel_dates.reset(token)
+
+
+def _number(value: Any, digits: int = 1) -> Any:
+    """Turn numeric strings into rounded numbers (whole numbers become ints)."""
+    try:
+        number = round(float(value), digits)
+    except (TypeError, ValueError):
+        return value
+    return int(number) if number == int(number) else number
+
+
+def _prune(value: Any) -> Any:
+    """Drop empty values and round floats throughout a JSON value."""
+    if isinstance(value, dict):
+        pruned = {key: _prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_prune(item) for item in value]
+    if isinstance(value, float):
+        return _number(value, 2)
+    return value
+
+
+def compact_weather(value: Any) -> Any:
+    """Keep forecast days inside the travel dates."""
+    forecast = Forecast.parse(value)
+    if forecast is None:
+        return value
+    window = _travel_dates.get()
+    if window:
+        in_window = forecast.between(window[0].isoformat(), window[1].isoformat())
+        if not in_window and len(forecast):
+            return Forecast(note=forecast.note or "Travel dates are beyond the forecast range").to_dict()
+        forecast = in_window
+    return forecast.to_dict()
+
+
+def compact_weather_batch(value: Any) -> Any:
+    """Compact each location's forecast like ``compact_weather``."""
+    if not isinstance(value, dict) or not isinstance(value.get("locations"), list):
+        return value
+    locations = []
+    for location in value["locations"]:
+        if isinstance(location, dict) and "dates" in location:
+            place = {key: item for key, item in location.items() if key in ("name", "lat", "lon")}
+            location = {**place, **compact_weather(location)}
+        locations.append(location)
+    return {"locations": locations}
+
+
+def compact_search(value: Any) -> Any:
+    """Collapse whitespace, truncate long text at a sentence and keep its sources."""
+    if not isinstance(value, str):
+        return _prune(value)
+    text = " ".join(value.split())
+    if len(text) <= MAX_SEARCH_CHARS:
+        return text
+
+    sources: List[str] = []
+    for url in _URL_PATTERN.findall(text):
+        url = url.rstrip(".,;")
+        if url not in sources:
+            sources.append(url)
+
+    cut = text[:MAX_SEARCH_CHARS]
+    sentence_end = cut.rfind(". ")
+    if sentence_end > MAX_SEARCH_CHARS // 2:
+        cut = cut[:sentence_end + 1]
+    compacted = cut + " [...]"
+    missing = [url for url in sources[:MAX_SOURCES] if url not in compacted]
+    if missing:
+        compacted += "\nSources: " + " ".join(missing)
+    return compacted
+
+
+def compact_knowledge(value: Any) -> Any:
+    """Keep snippet text (truncated) and source; drop similarity scores."""
+    if not isinstance(value, list):
+        return _prune(value)
+    snippets = []
+    for item in value:
+        if not isinstance(item, dict):
+            snippets.append(item)
+            continue
+        content = " ".join(str(item.get("content", "")).split())
+        if len(content) > MAX_SNIPPET_CHARS:
+            content = content[:MAX_SNIPPET_CHARS] + "..."
+        snippets.append(_prune({"content": content, "source": item.get("source")}))
+    return snippets
+
+
+# Compactors by kernel function name; other tools only get generic pruning
+COMPACTORS: Dict[str, Callable[[Any], Any]] = {
+    "get_weather": compact_weather,
+    "get_weather_batch": compact_weather_batch,
+    "web_search": compact_search,
+    "search_knowledge": compact_knowledge,
+}
+
+
+class CompactionStats:
+    """Counts characters and tokens removed from tool results."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def record(self, function_name: str, before: str, after: str) -> None:
+        saved = count_tokens(before) - count_tokens(after)
+        with self._lock:
+            self.metrics["results"] += 1
+            self.metrics["chars_before"] += len(before)
+            self.metrics["chars_after"] += len(after)
+            self.metrics["tokens_saved"] += saved
+            self.metrics["tokens_saved_by_tool"][function_name] = (
+                self.metrics["tokens_saved_by_tool"].get(function_name, 0) + saved
+            )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get compaction totals and the share of characters removed."""
+        metrics: Dict[str, Any] = dict(self.metrics)
+        metrics["tokens_saved_by_tool"] = dict(self.metrics["tokens_saved_by_tool"])
+        before = metrics["chars_before"]
+        metrics["reduction"] = 1 - metrics["chars_after"] / before if before else 0.0
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {
+            "results": 0,
+            "chars_before": 0,
+            "chars_after": 0,
+            "tokens_saved": 0,
+            "tokens_saved_by_tool": {},
+        }
+
+
+compaction_stats = CompactionStats()
+
+
+def compact_tool_result(function_name: str, output: Any) -> Any:
+    """
+    Compact a tool result for the chat history.
+
+    JSON strings are decoded, compacted and re-encoded without whitespace;
+    plain text goes through the tool's compactor as is. Error results and
+    results the compactor cannot handle are passed through unchanged.
+
+    Returns:
+        The compacted output (a string when ``output`` was a string)
+    """
+    if not isinstance(output, str):
+        return output
+    try:
+        value = json.loads(output)
+    except ValueError:
+        value = output
+
+    if isinstance(value, dict) and "error" in value:
+        return output
+
+    compactor = COMPACTORS.get(function_name, _prune)
+    try:
+        compacted = compactor(value)
+    except Exception as e:
+        logger.warning(f"Compacting {function_name} result failed: {e}")
+        return output
+    text = compacted if isinstance(compacted, str) else json.dumps(compacted, separators=(",", ":"))
+    if len(text) >= len(output):
+        return output
+
+    compaction_stats.record(function_name, output, text)
+    return text
@@ -0,0 +1,174 @@
+# app/deadline.py
+"""
+Request deadlines and the timeouts derived from them.
+
+Each request gets a ``Deadline`` (``AGENT_REQUEST_DEADLINE`` seconds) that
+travels with it through every phase of ``app.state.Phase``. Model calls and
+tool calls do not get fixed timeouts; each waits at most for its per-call
+cap or its phase's share of the time that is left, whichever is smaller. A
+call that runs out of time raises ``DeadlineExceeded`` and the caller
+degrades (fast-path requirements instead of the LLM extraction, a tool left
+out, a partial TripPlan with "Unknown" fields instead of the model's plan),
+so the latency of a request is bounded by its deadline.
+
+Timeouts and degraded answers are tracked in ``deadline_stats``.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterator, Optional
+
+from app.state import Phase
+from app.utils.env import env_float
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUEST_DEADLINE = 30.0
+
+# Longest single call, in seconds, regardless of the time left
+EXTRACTION_TIMEOUT = 8.0
+TOOL_TIMEOUT = 6.0
+PLAN_TIMEOUT = 25.0
+
+# Share of the remaining time one call in a phase may use; the rest is
+# kept for the phases after it (at least synthesis of a partial plan)
+PHASE_SHARES: Dict[Phase, float] = {
+    Phase.ClarifyRequirements: 0.4,
+    Phase.ExecuteTools: 0.9,
+}
+
+# Deadline of the request being planned, used by calls deep in the pipeline
+_current_deadline: ContextVar[Optional["Deadline"]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """A call did not finish within the time its request had left."""
+
+    def __init__(self, phase: Phase, timeout: float):
+        super().__init__(f"{phase.value} call timed out after {timeout:.1f}s")
+        self.phase = phase
+        self.timeout = timeout
+
+
+def request_deadline_seconds() -> float:
+    """Request deadline from AGENT_REQUEST_DEADLINE (seconds)."""
+    return env_float("AGENT_REQUEST_DEADLINE", DEFAULT_REQUEST_DEADLINE)
+
+
+class DeadlineStats:
+    """Counts request deadlines, call timeouts per phase and degraded answers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.metrics["requests"] += 1
+
+    def record_timeout(self, phase: Phase) -> None:
+        with self._lock:
+            self.metrics["timeouts"] += 1
+            by_phase = self.metrics["timeouts_by_phase"]
+            by_phase[phase.value] = by_phase.get(phase.value, 0) + 1
+
+    def record_degraded(self) -> None:
+        with self._lock:
+            self.metrics["degraded"] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get timeout counts and the share of requests answered with a partial plan."""
+        metrics: Dict[str, Any] = dict(self.metrics)
+        metrics["timeouts_by_phase"] = dict(self.metrics["timeouts_by_phase"])
+        requests = metrics["requests"]
+        metrics["degraded_rate"] = metrics["degraded"] / requests if requests else 0.0
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {
+            "requests": 0,
+            "timeouts": 0,
+            "timeouts_by_phase": {},
+            "degraded": 0,
+        }
+
+
+deadline_stats = DeadlineStats()
+
+
+class Deadline:
+    """
+    Point in time by which a request must be answered.
+
+    Args:
+        seconds: Time allowed from now (defaults to AGENT_REQUEST_DEADLINE)
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds if seconds is not None else request_deadline_seconds()
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + self.seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def call_timeout(self, cap: float, phase: Phase) -> float:
+        """Timeout for one call in ``phase``: its cap or the phase's share of the time left."""
+        return min(cap, self.remaining() * PHASE_SHARES.get(phase, 1.0))
+
+    async def run(self, awaitable: Awaitable, cap: float, phase: Phase) -> Any:
+        """
+        Await a call with the timeout derived for ``phase``.
+
+        Raises:
+            DeadlineExceeded: If the call did not finish in time (it is cancelled)
+        """
+        return await _wait(awaitable, self.call_timeout(cap, phase), phase)
+
+
+async def _wait(awaitable: Awaitable, timeout: float, phase: Phase) -> Any:
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        deadline_stats.record_timeout(phase)
+        logger.warning(f"{phase.value} call timed out after {timeout:.1f}s")
+        raise DeadlineExceeded(phase, timeout) from None
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline] = None) -> Iterator[Deadline]:
+    """
+    Make a request's deadline available to the calls made within this block.
+
+    Tasks started inside the block (tool calls, speculation, single-flight
+    plans) inherit it.
+    """
+    deadline = deadline or Deadline()
+    deadline_stats.record_request()
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the request being planned, if any."""
+    return _current_deadline.get()
+
+
+async def within_deadline(awaitable: Awaitable, cap: float, phase: Phase) -> Any:
+    """Await a call under the current request's deadline, or with just ``cap`` outside a request."""
+    deadline = current_deadline()
+    if deadline is None:
+        return await _wait(awaitable, cap, phase)
+    return await deadline.run(awaitable, cap, phase)
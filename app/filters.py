@@ -2,6 +2,7 @@
 Semantic Kernel Filters for Logging, Telemetry, and Cross-cutting Concerns
 """
 
+import json
 import logging
 import time
 from typing import Dict, Any, Optional
@@ -9,6 +10,13 @@ from semantic_kernel import Kernel
 from semantic_kernel.functions import KernelArguments
 from semantic_kernel.contents import ChatHistory, ChatMessageContent
 from semantic_kernel.functions import FunctionResult
+from semantic_kernel.filters import FilterTypes
+
+from app.compaction import compact_tool_result
+from app.deadline import TOOL_TIMEOUT, DeadlineExceeded, current_deadline, within_deadline
+from app.state import Phase
+from app.token_budget import PLAN_MAX_TOKENS, count_tokens, count_turn, current_budget
+from app.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -185,6 +193,82 @@ class CitationFilter:
         """Clear citations"""
         self.citations.clear()
 
+class ToolResultCompactionFilter:
+    """SK auto function invocation filter that compacts tool results before the model sees them"""
+    
+    async def __call__(self, context: Any, next: Any) -> None:
+        await next(context)
+        try:
+            result = context.function_result
+            if result is None or not isinstance(result.value, str):
+                return
+            compacted = compact_tool_result(context.function.name, result.value)
+            if compacted is not result.value:
+                context.function_result = FunctionResult(
+                    function=result.function, value=compacted, metadata=result.metadata
+                )
+        except Exception as e:
+            logger.error(f"❌ Error in compaction filter: {e}")
+
+class TokenBudgetFilter:
+    """SK auto function invocation filter that keeps tool turns within the request's token budget"""
+    
+    async def __call__(self, context: Any, next: Any) -> None:
+        budget = current_budget()
+        if budget is not None:
+            self._charge_turn(budget, context)
+        await next(context)
+        if budget is None or context.function_result is None:
+            return
+        try:
+            result_tokens = count_tokens(context.function_result.value)
+            # Make room for the result in the history the next model turn sends
+            fits = context.chat_history is None or budget.fit(context.chat_history, reserve=result_tokens)
+            if not fits or budget.exhausted:
+                logger.warning(f"⚠️ Token budget exhausted after {context.function.name}, stopping tool calls")
+                context.terminate = True
+            elif getattr(context, "execution_settings", None) is not None:
+                # The next turn may only use what the request has left
+                context.execution_settings.max_tokens = budget.max_tokens(PLAN_MAX_TOKENS)
+        except Exception as e:
+            logger.error(f"❌ Error in token budget filter: {e}")
+    
+    @staticmethod
+    def _charge_turn(budget: Any, context: Any) -> None:
+        """Charge the model turn that requested this tool (once for all tools of the turn)."""
+        call = getattr(context, "function_call_content", None)
+        if call is None or context.chat_history is None:
+            return
+        try:
+            tokens = count_turn(context.chat_history, call.id)
+            if tokens is not None:
+                budget.charge_turn(context.request_sequence_index, *tokens)
+        except Exception as e:
+            logger.error(f"❌ Error charging tool turn: {e}")
+
+class DeadlineFilter:
+    """SK auto function invocation filter that times out model-requested tools under the request deadline"""
+    
+    async def __call__(self, context: Any, next: Any) -> None:
+        try:
+            await within_deadline(next(context), TOOL_TIMEOUT, Phase.ExecuteTools)
+        except DeadlineExceeded as e:
+            # The model gets an error result it can plan around
+            context.function_result = FunctionResult(
+                function=context.function.metadata, value=json.dumps({"error": str(e)})
+            )
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            logger.warning(f"⚠️ Request deadline reached after {context.function.name}, stopping tool calls")
+            context.terminate = True
+
+class TracingFilter:
+    """SK auto function invocation filter that records model-requested tool calls as trace spans"""
+    
+    async def __call__(self, context: Any, next: Any) -> None:
+        with traced("tool", context.function.name, prefetched=False):
+            await next(context)
+
 def setup_kernel_filters(kernel: Kernel, short_term_memory=None, long_term_memory=None) -> Dict[str, Any]:
     """
     Set up all SK filters for the kernel.
@@ -205,15 +289,23 @@ def setup_kernel_filters(kernel: Kernel, short_term_memory=None, long_term_memor
     filters["memory"] = MemoryUpdateFilter(short_term_memory, long_term_memory)
     filters["guardrails"] = GuardrailsFilter()
     filters["citations"] = CitationFilter()
+    filters["compaction"] = ToolResultCompactionFilter()
+    filters["token_budget"] = TokenBudgetFilter()
+    filters["deadline"] = DeadlineFilter()
+    filters["tracing"] = TracingFilter()
     
-    # Add filters to kernel (simplified for now)
-    # Note: Filter registration may vary by SK version
-    # For now, we'll just return the filters without registering them
-    # kernel.add_filter(filters["logging"])
-    # kernel.add_filter(filters["telemetry"])
-    # kernel.add_filter(filters["memory"])
-    # kernel.add_filter(filters["guardrails"])
-    # kernel.add_filter(filters["citations"])
+    # Auto function invocation filters, outermost first: SK runs the filter
+    # registered first outermost and the last one next to the function.
+    # The timeout covers the whole tool turn (tracing, budget, compaction, call)
+    kernel.add_filter(FilterTypes.AUTO_FUNCTION_INVOCATION, filters["deadline"])
+    # "tool:*" spans measure everything inside the deadline
+    kernel.add_filter(FilterTypes.AUTO_FUNCTION_INVOCATION, filters["tracing"])
+    # Wraps compaction, so the compacted result is what has to fit the budget
+    kernel.add_filter(FilterTypes.AUTO_FUNCTION_INVOCATION, filters["token_budget"])
+    # Tool results the model requests itself are compacted like prefetched ones.
+    # Their calls are not recorded on their own: they happen inside the
+    # planning stream, which is recorded and replayed as a whole (app.replay)
+    kernel.add_filter(FilterTypes.AUTO_FUNCTION_INVOCATION, filters["compaction"])
     
     logger.info("✅ SK filters configured successfully")
     return filters
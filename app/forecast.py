@@ -0,0 +1,134 @@
+# app/forecast.py
+"""
+Columnar daily forecasts.
+
+A forecast is held as parallel columns of plain numbers (dates, max/min
+temperature, weather code) from the moment Open-Meteo's response is read.
+The forecast cache, the climatology fallback, compaction and TripPlan
+synthesis all work on the columns directly, and the tool result handed to
+the model is serialized once, as minimal JSON:
+
+    {"dates":["2026-06-01","2026-06-02"],"max_temp":[24,25.5],"min_temp":[14,15],"code":[1,61]}
+
+Days answered from climate normals have no weather code (``null``); the
+``code`` column is left out when no day has one.
+"""
+
+import json
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+Number = Optional[float]
+
+
+def _plain(value: Number) -> Any:
+    """Whole numbers as ints, so 24.0 is written as 24."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+@dataclass(frozen=True)
+class Forecast:
+    """
+    Daily forecast as parallel columns, one item per day in date order.
+
+    Instances are immutable, so cached forecasts are shared without copying.
+    """
+    dates: Tuple[str, ...] = ()
+    max_temp: Tuple[Number, ...] = ()
+    min_temp: Tuple[Number, ...] = ()
+    code: Tuple[Optional[int], ...] = ()
+    # First day answered from climate normals instead of a forecast
+    climatology_from: Optional[str] = None
+    note: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def from_open_meteo(cls, data: Dict[str, Any]) -> "Forecast":
+        """Columns of one location's Open-Meteo ``daily`` block."""
+        daily = data.get("daily", {})
+        dates = tuple(daily.get("time", ()))
+        if not dates:
+            return cls()
+        return cls(
+            dates=dates,
+            max_temp=tuple(daily["temperature_2m_max"]),
+            min_temp=tuple(daily["temperature_2m_min"]),
+            code=tuple(daily["weathercode"]),
+        )
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> "Forecast":
+        """Inverse of ``to_dict``."""
+        dates = tuple(value.get("dates", ()))
+        return cls(
+            dates=dates,
+            max_temp=tuple(value.get("max_temp", ())),
+            min_temp=tuple(value.get("min_temp", ())),
+            code=tuple(value.get("code") or (None,) * len(dates)),
+            climatology_from=value.get("climatology_from"),
+            note=value.get("note"),
+        )
+
+    @classmethod
+    def parse(cls, value: Any) -> Optional["Forecast"]:
+        """A forecast from a Forecast or its dict form, or None for anything else."""
+        if isinstance(value, Forecast):
+            return value
+        if isinstance(value, dict) and "dates" in value:
+            return cls.from_dict(value)
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Minimal JSON-ready form (see the module docstring)."""
+        result: Dict[str, Any] = {
+            "dates": list(self.dates),
+            "max_temp": [_plain(value) for value in self.max_temp],
+            "min_temp": [_plain(value) for value in self.min_temp],
+        }
+        if any(value is not None for value in self.code):
+            result["code"] = list(self.code)
+        if self.climatology_from:
+            result["climatology_from"] = self.climatology_from
+        if self.note:
+            result["note"] = self.note
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    def between(self, start: str, end: str) -> "Forecast":
+        """Days from ``start`` to ``end`` (ISO dates, inclusive)."""
+        lo, hi = bisect_left(self.dates, start), bisect_right(self.dates, end)
+        climatology_from = self.climatology_from
+        if climatology_from and climatology_from < start:
+            climatology_from = self.dates[lo] if lo < hi else None
+        elif climatology_from and climatology_from > end:
+            climatology_from = None
+        return replace(
+            self,
+            dates=self.dates[lo:hi],
+            max_temp=self.max_temp[lo:hi],
+            min_temp=self.min_temp[lo:hi],
+            code=self.code[lo:hi],
+            climatology_from=climatology_from,
+        )
+
+    def with_normals(self, days: Iterable[Tuple[str, float, float]]) -> "Forecast":
+        """Append climate-normal days, given as (date, max, min)."""
+        days = list(days)
+        if not days:
+            return self
+        dates, max_temp, min_temp = zip(*days)
+        return replace(
+            self,
+            dates=self.dates + dates,
+            max_temp=self.max_temp + max_temp,
+            min_temp=self.min_temp + min_temp,
+            code=self.code + (None,) * len(days),
+            climatology_from=self.climatology_from or dates[0],
+        )
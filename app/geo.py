@@ -0,0 +1,213 @@
+# app/geo.py
+"""
+Offline geocoding index.
+
+Places (cities and airports) live in a compact, sorted, tab-separated index
+file that is memory-mapped on first use. Lookups binary-search the mapped
+bytes directly, so opening the index costs nothing beyond the mmap call and
+an exact lookup is a handful of comparisons. Prefix and fuzzy lookups are
+provided for partial or misspelled names.
+
+Index line format (sorted by key, one line per name, alias or airport code):
+    key<TAB>name<TAB>kind<TAB>code<TAB>country<TAB>lat<TAB>lon<TAB>currency
+
+The index is generated from ``app/data/places.csv`` with
+``python app/scripts/build_gazetteer.py``.
+"""
+
+import csv
+import difflib
+import mmap
+import os
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, List, Optional
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_INDEX_PATH = os.path.join(DATA_DIR, "gazetteer.tsv")
+DEFAULT_SOURCE_PATH = os.path.join(DATA_DIR, "places.csv")
+
+FUZZY_CUTOFF = 0.85
+
+
+def normalize_place(text: str) -> str:
+    """Normalize a place name to an index key (ASCII, lowercase, single spaces)."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower())
+    return " ".join(text.split())
+
+
+@dataclass
+class Place:
+    """
+    A geocoded place.
+    """
+    name: str
+    kind: str
+    code: str
+    country: str
+    lat: float
+    lon: float
+    currency: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _parse_line(line: bytes) -> Place:
+    _key, name, kind, code, country, lat, lon, currency = line.decode("utf-8").split("\t")
+    return Place(name, kind, code, country, float(lat), float(lon), currency)
+
+
+class GeoIndex:
+    """
+    Read-only, memory-mapped gazetteer.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._keys: Optional[List[str]] = None
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _line_bounds(self, start: int) -> tuple:
+        end = self._mm.find(b"\n", start)
+        return start, (len(self._mm) if end == -1 else end)
+
+    def _key_at(self, start: int) -> bytes:
+        _, end = self._line_bounds(start)
+        tab = self._mm.find(b"\t", start, end)
+        return self._mm[start:tab]
+
+    def _bisect(self, target: bytes) -> int:
+        """Byte offset of the first line whose key is >= target."""
+        mm = self._mm
+        lo, hi = 0, len(mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind(b"\n", 0, mid) + 1
+            _, end = self._line_bounds(start)
+            if self._key_at(start) < target:
+                lo = end + 1
+            else:
+                hi = start
+        return lo
+
+    def _lines_from(self, offset: int) -> Iterable[tuple]:
+        size = len(self._mm)
+        while offset < size:
+            start, end = self._line_bounds(offset)
+            line = self._mm[start:end]
+            if line:
+                yield line.split(b"\t", 1)[0], line
+            offset = end + 1
+
+    def lookup(self, name: str) -> Optional[Place]:
+        """Exact lookup by name, alias or airport code."""
+        target = normalize_place(name).encode("ascii")
+        if not target:
+            return None
+        for key, line in self._lines_from(self._bisect(target)):
+            return _parse_line(line) if key == target else None
+        return None
+
+    def prefix(self, text: str, limit: int = 10) -> List[Place]:
+        """Places whose key starts with ``text``, in key order."""
+        target = normalize_place(text).encode("ascii")
+        results: List[Place] = []
+        if not target:
+            return results
+        seen = set()
+        for key, line in self._lines_from(self._bisect(target)):
+            if not key.startswith(target) or len(results) >= limit:
+                break
+            place = _parse_line(line)
+            if (place.name, place.kind) not in seen:
+                seen.add((place.name, place.kind))
+                results.append(place)
+        return results
+
+    def keys(self) -> List[str]:
+        """All index keys (loaded on first call, used for fuzzy matching)."""
+        if self._keys is None:
+            self._keys = [key.decode("ascii") for key, _ in self._lines_from(0)]
+        return self._keys
+
+    def fuzzy(self, text: str, limit: int = 3, cutoff: float = FUZZY_CUTOFF) -> List[Place]:
+        """Closest places by edit similarity, for misspelled names."""
+        target = normalize_place(text)
+        matches = difflib.get_close_matches(target, self.keys(), n=limit, cutoff=cutoff)
+        return [place for place in (self.lookup(key) for key in matches) if place]
+
+    def geocode(self, place: str) -> Optional[Place]:
+        """
+        Resolve free-form place text: exact match, then the part before the
+        first comma ("Paris, France"), then a unique prefix, then fuzzy.
+        """
+        for candidate in (place, str(place).split(",")[0]):
+            found = self.lookup(candidate)
+            if found:
+                return found
+
+        head = str(place).split(",")[0]
+        prefixed = self.prefix(head, limit=2)
+        if len(prefixed) == 1:
+            return prefixed[0]
+
+        fuzzy = self.fuzzy(head, limit=1)
+        return fuzzy[0] if fuzzy else None
+
+
+def build_index(source_path: str = DEFAULT_SOURCE_PATH, index_path: str = DEFAULT_INDEX_PATH) -> int:
+    """
+    Build the sorted index file from the human-editable places CSV.
+
+    Every place is indexed under its name, each alias and (for airports) its
+    code. When two places share a key, the one listed first in the CSV wins.
+
+    Returns:
+        Number of index lines written
+    """
+    entries: Dict[bytes, str] = {}
+    with open(source_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            record = "\t".join([
+                row["name"], row["kind"], row["code"], row["country"],
+                f"{float(row['lat']):.4f}", f"{float(row['lon']):.4f}", row["currency"],
+            ])
+            names = [row["name"], row["code"]] + [alias for alias in row["aliases"].split(";")]
+            for name in names:
+                key = normalize_place(name).encode("ascii")
+                if key and key not in entries:
+                    entries[key] = record
+
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for key in sorted(entries):
+            f.write(key + b"\t" + entries[key].encode("utf-8") + b"\n")
+    os.replace(tmp_path, index_path)
+    return len(entries)
+
+
+_index: Optional[GeoIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_geo_index() -> GeoIndex:
+    """Get the process-wide geo index, mapping it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = GeoIndex(os.environ.get("GEO_INDEX_PATH", DEFAULT_INDEX_PATH))
+    return _index
+
+
+def geocode(place: str) -> Optional[Place]:
+    """Geocode a place with the process-wide index."""
+    return get_geo_index().geocode(place)
@@ -0,0 +1,182 @@
+# app/http_client.py
+"""
+Shared async HTTP client for tools that call web APIs.
+
+Tools used to call ``requests.get`` from inside the async kernel loop: every
+call opened a new TLS connection and blocked the event loop for the whole
+round trip, so concurrent requests serialized on it. ``http_client`` keeps
+one ``httpx.AsyncClient`` (a keep-alive connection pool) per event loop and
+retries transient failures (timeouts, connection errors, 429/5xx) with
+exponential backoff and full jitter, honouring ``Retry-After``.
+
+Configuration (environment):
+    HTTP_POOL_SIZE          Connections per host pool (default 20)
+    HTTP_KEEPALIVE          Idle keep-alive connections kept (default 10)
+    HTTP_CONNECT_TIMEOUT    Seconds to connect (default 3)
+    HTTP_READ_TIMEOUT       Seconds to read a response (default 5)
+    HTTP_RETRIES            Retries after the first attempt (default 2)
+    HTTP_RETRY_BACKOFF      Base backoff in seconds (default 0.2)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.utils.env import env_float, env_int
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_KEEPALIVE = 10
+DEFAULT_CONNECT_TIMEOUT = 3.0
+DEFAULT_READ_TIMEOUT = 5.0
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 0.2
+# Longest wait between attempts, whatever Retry-After says
+MAX_RETRY_DELAY = 5.0
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HttpClientStats:
+    """Counts requests, retries and failures of the shared client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            self.metrics[key] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics: Dict[str, Any] = dict(self.metrics)
+        requests = metrics["requests"]
+        metrics["retry_rate"] = metrics["retries"] / requests if requests else 0.0
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "clients_created": 0,
+        }
+
+
+http_stats = HttpClientStats()
+
+
+class PooledHttpClient:
+    """
+    Keep-alive connection pool with retries, one ``httpx.AsyncClient`` per event loop.
+
+    Args:
+        pool_size: Maximum connections (HTTP_POOL_SIZE)
+        keepalive: Idle connections kept open (HTTP_KEEPALIVE)
+        connect_timeout: Connect timeout in seconds (HTTP_CONNECT_TIMEOUT)
+        read_timeout: Read timeout in seconds (HTTP_READ_TIMEOUT)
+        retries: Retries after the first attempt (HTTP_RETRIES)
+        backoff: Base backoff in seconds (HTTP_RETRY_BACKOFF)
+        transport: httpx transport to use instead of the network (tests, stand-ins)
+    """
+
+    def __init__(self, pool_size: Optional[int] = None, keepalive: Optional[int] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 retries: Optional[int] = None, backoff: Optional[float] = None,
+                 transport: Optional["httpx.AsyncBaseTransport"] = None):
+        self.pool_size = pool_size or env_int("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE)
+        self.keepalive = keepalive if keepalive is not None else env_int("HTTP_KEEPALIVE", DEFAULT_KEEPALIVE, minimum=0)
+        self.connect_timeout = connect_timeout or env_float("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+        self.read_timeout = read_timeout or env_float("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)
+        self.retries = retries if retries is not None else env_int("HTTP_RETRIES", DEFAULT_RETRIES, minimum=0)
+        self.backoff = backoff if backoff is not None else env_float(
+            "HTTP_RETRY_BACKOFF", DEFAULT_RETRY_BACKOFF, inclusive=True
+        )
+        self.transport = transport
+        # Connections belong to the loop that opened them
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def client(self) -> "httpx.AsyncClient":
+        """The pooled client of the running event loop (created on first use)."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.keepalive),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                transport=self.transport,
+            )
+            self._clients[loop] = client
+            http_stats.record("clients_created")
+        return client
+
+    def _delay(self, attempt: int, response: Optional["httpx.Response"]) -> float:
+        """Full-jitter exponential backoff, or Retry-After when the server sends one."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(MAX_RETRY_DELAY, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(MAX_RETRY_DELAY, self.backoff * 2 ** attempt))
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> "httpx.Response":
+        """
+        GET with retries on timeouts, connection errors and 429/5xx.
+
+        Raises:
+            httpx.HTTPStatusError: If the final response is not successful
+            httpx.TransportError: If every attempt failed to connect or read
+        """
+        import httpx
+
+        client = self.client()
+        for attempt in range(self.retries + 1):
+            http_stats.record("requests")
+            response = None
+            try:
+                response = await client.get(url, params=params)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    http_stats.record("failures")
+                    raise
+                reason = type(e).__name__
+            except httpx.HTTPStatusError:
+                http_stats.record("failures")
+                raise
+
+            delay = self._delay(attempt, response)
+            http_stats.record("retries")
+            logger.warning(f"GET {url} failed ({reason}), retry {attempt + 1}/{self.retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET a JSON document (see ``get``)."""
+        return (await self.get(url, params)).json()
+
+    async def aclose(self) -> None:
+        """Close the client of the running event loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+http_client = PooledHttpClient()
@@ -0,0 +1,270 @@
+# app/json_stream.py
+"""
+Incremental extraction of JSON objects from streamed model output.
+
+Model replies are scanned one chunk at a time for the first balanced
+top-level ``{...}`` object. Prose before the object is skipped and anything
+after it is ignored, so callers can stop reading the stream as soon as the
+object closes. Characters that cannot occur in JSON, mismatched brackets and
+members that do not parse raise ``JsonStreamError`` immediately instead of
+after the whole completion has arrived.
+
+``TripPlanStream`` additionally validates each TripPlan field against
+``app.models.TripPlan`` as soon as that field's value is complete.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.models import TripPlan
+
+# Keys models use to wrap the plan object
+PLAN_WRAPPERS = ("plan", "TripPlan", "tripPlan")
+
+# Characters allowed outside strings inside a JSON object
+_JSON_CHARS = frozenset(" \t\r\n,:[]{}-+.0123456789eEtrufalsn")
+
+MemberCallback = Callable[[Tuple[str, ...], str, Any], None]
+
+
+class JsonStreamError(ValueError):
+    """The streamed text does not contain a well-formed JSON object."""
+
+
+class _Frame:
+    __slots__ = ("kind", "member_start", "key", "expect_key")
+
+    def __init__(self, kind: str, member_start: int):
+        self.kind = kind
+        self.member_start = member_start
+        self.key: Optional[str] = None
+        self.expect_key = kind == "{"
+
+
+class JsonObjectStream:
+    """
+    Single-pass scanner for the first balanced top-level JSON object.
+
+    Args:
+        on_member: Called as ``on_member(path, key, value)`` whenever an
+                   object member completes, where ``path`` holds the keys of
+                   the enclosing objects. Members inside arrays are not reported.
+        member_depth: Deepest object nesting level whose members are reported
+                      (1 = members of the top-level object)
+    """
+
+    def __init__(self, on_member: Optional[MemberCallback] = None, member_depth: int = 2):
+        self.on_member = on_member
+        self.member_depth = member_depth
+        self._text = ""
+        self._pos = 0
+        self._start = -1
+        self._frames: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self.done = False
+        self.value: Any = None
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> Optional[Any]:
+        """
+        Consume the next chunk of model output.
+
+        Returns:
+            The decoded object once it is complete, otherwise None
+
+        Raises:
+            JsonStreamError: As soon as the object is known to be malformed
+        """
+        if self.done or not chunk:
+            return self.value if self.done else None
+        self._text += chunk
+        text = self._text
+        frames = self._frames
+
+        i = self._pos
+        end = len(text)
+        while i < end:
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    frame = frames[-1]
+                    if frame.kind == "{" and frame.expect_key:
+                        key = text[self._string_start:i + 1]
+                        try:
+                            frame.key = json.loads(key)
+                        except ValueError as e:
+                            raise JsonStreamError(f"Malformed key {key[:60]!r}: {e}") from e
+                        frame.expect_key = False
+            elif self._start < 0:
+                if char == "{":
+                    self._start = i
+                    frames.append(_Frame("{", i + 1))
+            elif char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == "{" or char == "[":
+                frames.append(_Frame(char, i + 1))
+            elif char == "}" or char == "]":
+                frame = frames.pop()
+                if (frame.kind == "{") != (char == "}"):
+                    raise JsonStreamError(f"Mismatched '{char}' at offset {i}")
+                if frame.kind == "{":
+                    self._member_done(frame, frames, text, i)
+                if not frames:
+                    self._pos = i + 1
+                    return self._finish(text[self._start:i + 1])
+            elif char == ",":
+                frame = frames[-1]
+                if frame.kind == "{":
+                    self._member_done(frame, frames[:-1], text, i)
+                    frame.member_start = i + 1
+                    frame.key = None
+                    frame.expect_key = True
+            elif char not in _JSON_CHARS:
+                raise JsonStreamError(f"Unexpected character {char!r} at offset {i}")
+            i += 1
+
+        self._pos = i
+        return None
+
+    def _member_done(self, frame: _Frame, parents: List[_Frame], text: str, end: int) -> None:
+        if self.on_member is None or len(parents) >= self.member_depth:
+            return
+        if any(parent.kind != "{" for parent in parents):
+            return
+        member = text[frame.member_start:end].strip()
+        if not member:
+            return
+        try:
+            key, value = next(iter(json.loads("{" + member + "}").items()))
+        except ValueError as e:
+            raise JsonStreamError(f"Malformed member {member[:60]!r}: {e}") from e
+        self.on_member(tuple(parent.key for parent in parents), key, value)
+
+    def _finish(self, raw: str) -> Any:
+        try:
+            self.value = json.loads(raw)
+        except ValueError as e:
+            raise JsonStreamError(f"Malformed JSON object: {e}") from e
+        self.done = True
+        return self.value
+
+    def close(self) -> Any:
+        """
+        Signal the end of the stream.
+
+        Returns:
+            The decoded object
+
+        Raises:
+            JsonStreamError: If no complete object was seen
+        """
+        if not self.done:
+            if self._start < 0:
+                raise JsonStreamError("No JSON object found in response")
+            raise JsonStreamError("Response ended before the JSON object was complete")
+        return self.value
+
+
+@lru_cache(maxsize=1)
+def _field_adapters() -> Dict[str, TypeAdapter]:
+    """Validators per TripPlan field, built on first use (building them is slow)."""
+    return {name: TypeAdapter(field.annotation) for name, field in TripPlan.model_fields.items()}
+
+
+class TripPlanStream(JsonObjectStream):
+    """
+    JSON object stream that validates TripPlan fields as they complete.
+
+    The plan may be the top-level object or wrapped in one of
+    ``PLAN_WRAPPERS`` (e.g. ``{"plan": {...}}``).
+
+    Args:
+        on_field: Called as ``on_field(name, value)`` for each TripPlan field
+                  once it has completed and validated
+    """
+
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]] = None):
+        super().__init__(on_member=self._check_member, member_depth=2)
+        self.on_field = on_field
+        self.fields_validated = 0
+        # Fields validated so far, by name
+        self.fields: Dict[str, Any] = {}
+
+    def _check_member(self, path: Tuple[str, ...], key: str, value: Any) -> None:
+        is_plan_field = path == () or (len(path) == 1 and path[0] in PLAN_WRAPPERS)
+        adapter = _field_adapters().get(key) if is_plan_field else None
+        if adapter is None:
+            return
+        try:
+            adapter.validate_python(value)
+        except ValidationError as e:
+            raise JsonStreamError(f"Invalid TripPlan field '{key}': {e.errors()[0]['msg']}") from e
+        self.fields_validated += 1
+        self.fields[key] = value
+        if self.on_field:
+            self.on_field(key, value)
+
+    def plan(self) -> Dict[str, Any]:
+        """
+        The completed plan object, unwrapped and validated as a whole.
+
+        Raises:
+            JsonStreamError: If the object is incomplete or not a valid TripPlan
+        """
+        obj = self.close()
+        plan = obj
+        if isinstance(obj, dict):
+            for wrapper in PLAN_WRAPPERS:
+                if isinstance(obj.get(wrapper), dict):
+                    plan = obj[wrapper]
+                    break
+        try:
+            TripPlan.model_validate(plan)
+        except ValidationError as e:
+            missing = ", ".join(str(error["loc"][0]) for error in e.errors() if error["loc"])
+            raise JsonStreamError(f"Invalid TripPlan: {missing or e}") from e
+        return plan
+
+
+def extract_json(text: str, stream: Optional[JsonObjectStream] = None) -> Any:
+    """
+    Extract the first balanced JSON object from complete text.
+
+    Raises:
+        JsonStreamError: If there is no well-formed object
+    """
+    stream = stream or JsonObjectStream()
+    stream.feed(text)
+    return stream.close()
+
+
+async def consume(chunks: AsyncIterable[Any], stream: JsonObjectStream) -> str:
+    """
+    Feed streamed chunks until the object completes, then stop reading.
+
+    Chunks may be strings, SK streaming contents or lists of them; ``None``
+    chunks are skipped.
+
+    Returns:
+        The text read from the stream
+    """
+    async for chunk in chunks:
+        for item in chunk if isinstance(chunk, list) else [chunk]:
+            if item is not None and stream.feed(str(item)) is not None:
+                return stream.text
+    return stream.text
@@ -0,0 +1,202 @@
+# app/kernel_pool.py
+"""
+Process-wide pool of warm Semantic Kernel instances.
+
+Building a kernel constructs the Azure OpenAI chat/embedding clients, all tool
+plugins and the kernel filters. The pool keeps finished kernels around so that
+steady-state requests check one out instead of paying that cost again, and the
+underlying HTTP connection pools stay alive between requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import weakref
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app.utils.env import env_int
+
+if TYPE_CHECKING:
+    from semantic_kernel import Kernel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 4
+
+# Work started on the current checkout's kernel that may outlive the checkout
+_holds: ContextVar[Optional[List[asyncio.Future]]] = ContextVar("kernel_holds", default=None)
+
+
+class KernelPool:
+    """
+    Bounded pool of reusable kernels.
+
+    Kernels are created lazily by ``factory`` up to ``size`` instances (or
+    eagerly with ``warm()``) and handed out one request at a time through
+    ``checkout()``. When every kernel is busy, callers wait for one to be
+    returned; the wait time is recorded in the pool metrics.
+    """
+
+    def __init__(self, factory: Callable[[], Kernel], size: int = DEFAULT_POOL_SIZE):
+        if size < 1:
+            raise ValueError("Kernel pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._created = 0
+        self.metrics = self._empty_metrics()
+
+    @staticmethod
+    def _empty_metrics() -> Dict[str, Any]:
+        return {
+            "checkouts": 0,
+            "waits": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "kernels_created": 0,
+        }
+
+    @property
+    def created(self) -> int:
+        """Number of kernels built by this pool so far."""
+        return self._created
+
+    @property
+    def idle(self) -> int:
+        """Number of kernels currently available for checkout."""
+        return self._idle.qsize()
+
+    def _create(self) -> Kernel:
+        kernel = self.factory()
+        self._created += 1
+        self.metrics["kernels_created"] += 1
+        logger.debug(f"Kernel pool: created kernel {self._created}/{self.size}")
+        return kernel
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """
+        Pre-build kernels so the first requests do not pay construction cost.
+
+        Args:
+            count: Number of kernels to have built in total (defaults to pool size)
+
+        Returns:
+            Number of kernels built by this call
+        """
+        target = min(count if count is not None else self.size, self.size)
+        built = 0
+        while self._created < target:
+            self._idle.put_nowait(self._create())
+            built += 1
+        return built
+
+    async def acquire(self) -> Kernel:
+        """Take a kernel out of the pool, waiting if all of them are busy."""
+        start = time.perf_counter()
+        waited = False
+
+        if not self._idle.empty():
+            kernel = self._idle.get_nowait()
+        elif self._created < self.size:
+            kernel = self._create()
+        else:
+            waited = True
+            kernel = await self._idle.get()
+
+        wait_time = time.perf_counter() - start
+        self.metrics["checkouts"] += 1
+        if waited:
+            self.metrics["waits"] += 1
+            self.metrics["total_wait_time"] += wait_time
+            self.metrics["max_wait_time"] = max(self.metrics["max_wait_time"], wait_time)
+        return kernel
+
+    def release(self, kernel: Kernel) -> None:
+        """Return a kernel to the pool."""
+        self._idle.put_nowait(kernel)
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[Kernel]:
+        """
+        Async context manager that acquires a kernel and always returns it.
+
+        Work registered with ``hold_checkout`` keeps the kernel out of the
+        pool until it finishes, even when the checkout itself ends first.
+        """
+        kernel = await self.acquire()
+        holds: List[asyncio.Future] = []
+        token = _holds.set(holds)
+        try:
+            yield kernel
+        finally:
+            _holds.reset(token)
+            pending = [future for future in holds if not future.done()]
+            if pending:
+                logger.debug(f"Kernel pool: kernel stays checked out for {len(pending)} running task(s)")
+                asyncio.gather(*pending, return_exceptions=True).add_done_callback(
+                    lambda _: self.release(kernel)
+                )
+            else:
+                self.release(kernel)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get checkout metrics, including the average wait per checkout."""
+        metrics = self.metrics.copy()
+        checkouts = metrics["checkouts"]
+        metrics["avg_wait_time"] = metrics["total_wait_time"] / checkouts if checkouts else 0.0
+        metrics["size"] = self.size
+        metrics["idle"] = self.idle
+        return metrics
+
+    def reset_metrics(self) -> None:
+        """Reset checkout metrics (kernels stay in the pool)."""
+        created = self.metrics["kernels_created"]
+        self.metrics = self._empty_metrics()
+        self.metrics["kernels_created"] = created
+
+
+# The OpenAI clients inside a kernel hold connections bound to the event loop
+# that opened them, so each running loop gets its own pool. Synchronous callers
+# share one loop through app.main.run_sync, so their pool lives for the process.
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, KernelPool]" = weakref.WeakKeyDictionary()
+
+
+def hold_checkout(future: asyncio.Future) -> None:
+    """
+    Keep the current checkout's kernel out of the pool until ``future`` is done.
+
+    For work on the kernel that can outlive the request holding the checkout,
+    such as a shared single-flight task whose leader is cancelled.
+    """
+    holds = _holds.get()
+    if holds is not None:
+        holds.append(future)
+
+
+def get_pool_size() -> int:
+    """Read the configured pool size from KERNEL_POOL_SIZE."""
+    return env_int("KERNEL_POOL_SIZE", DEFAULT_POOL_SIZE)
+
+
+def get_kernel_pool(factory: Optional[Callable[[], Kernel]] = None) -> KernelPool:
+    """
+    Get the kernel pool for the running event loop, creating it on first use.
+
+    Args:
+        factory: Kernel factory used when the pool is created
+                 (defaults to ``app.main.create_kernel``)
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        if factory is None:
+            from app.main import create_kernel
+            factory = create_kernel
+        pool = KernelPool(factory, size=get_pool_size())
+        _pools[loop] = pool
+        logger.info(f"Kernel pool created (size={pool.size})")
+    return pool
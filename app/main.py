@@ -8,35 +8,76 @@ This agent demonstrates:
 - Memory systems (short-term and long-term)
 - RAG with knowledge base
 - 8-phase state machine for robust processing
+
+Semantic Kernel, the Azure SDKs and the tool plugins are imported when the
+first kernel is built, not when this module is imported, so workers start
+quickly (see app/scripts/startup_benchmark.py).
 """
 
+from __future__ import annotations
+
 import os
 import json
 import sys
 import asyncio
-from semantic_kernel import Kernel
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, AzureTextEmbedding
-from app.rag.retriever import retrieve
-from app.synthesis import synthesize_to_tripplan
-from app.state import AgentState
+import atexit
+import time
+from contextlib import aclosing
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from app.synthesis import partial_tripplan, synthesize_to_tripplan, tool_result_section
+from app.state import AgentState, Phase
 from app.utils.config import validate_all_config
+from app.utils.env import env_int
 from app.utils.logger import setup_logger
-from app.tools.weather import WeatherTools
-from app.tools.fx import FxTools
-from app.tools.search import SearchTools
-from app.tools.card import CardTools
-from app.tools.knowledge import KnowledgeTools
-from app.filters import setup_kernel_filters
-from tiktoken import encoding_for_model
+from app.kernel_pool import KernelPool, get_kernel_pool, hold_checkout
+from app.cache import LRUCache, normalize_query
+from app.requirements_parser import ParseResult, parse_requirements, fast_path_stats
+from app.prefetch import (
+    plan_prefetch, execute_prefetch, add_prefetch_to_history, describe_prefetch, prefetch_in_history,
+)
+from app.speculation import Speculation
+from app.response_cache import plan_cache_key, response_cache
+from app.singleflight import plan_flights
+from app.json_stream import JsonObjectStream, JsonStreamError, TripPlanStream, consume
+from app.streaming import HEADER_SECTION, SectionBroadcast, SectionStream
+from app.compaction import travel_dates_scope
+from app.deadline import (
+    EXTRACTION_TIMEOUT, PLAN_TIMEOUT, DeadlineExceeded, current_deadline, deadline_scope, deadline_stats,
+    within_deadline,
+)
+from app.replay import interaction_key, replayable_stream
+from app.tracing import current_trace, enter_phase, trace_scope, traced
+from app.token_budget import (
+    EXTRACTION_MAX_TOKENS, PLAN_MAX_TOKENS, budget_scope, count_history, count_tokens, current_budget,
+    preload_encoding,
+)
+
+if TYPE_CHECKING:
+    from semantic_kernel import Kernel
 
 # Set up logging
 logger = setup_logger("travel_agent", level="DEBUG", log_file="agent_debug.log")
 
+DEFAULT_BATCH_CONCURRENCY = 8
+DEFAULT_REQUIREMENTS_CACHE_SIZE = 256
+
 
 def create_kernel() -> Kernel:
     """
     Create and configure the Semantic Kernel instance.
+    
+    The SDKs and tool plugins are imported here, on first use.
     """
+    from semantic_kernel import Kernel
+    from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, AzureTextEmbedding
+    from app.tools.weather import WeatherTools
+    from app.tools.fx import FxTools
+    from app.tools.search import SearchTools
+    from app.tools.card import CardTools
+    from app.tools.knowledge import KnowledgeTools
+    from app.tools.geo import GeoTools
+    from app.filters import setup_kernel_filters
+    
     kernel = Kernel()
     
     # Add Azure OpenAI services
@@ -61,11 +102,11 @@ def create_kernel() -> Kernel:
     kernel.add_plugin(FxTools(), plugin_name="Fx")
     kernel.add_plugin(SearchTools(), plugin_name="Search")
     kernel.add_plugin(CardTools(), plugin_name="Card")
+    kernel.add_plugin(GeoTools(), plugin_name="Geo")
     # KnowledgeTools needs kernel for retrieval
     kernel.add_plugin(KnowledgeTools(kernel), plugin_name="Knowledge")
     
     # Add kernel filters
-    from app.filters import setup_kernel_filters
     # We need memory instances for filters? 
     # The filters implementation takes memory instances.
     # But filters are usually global or per invocation.
@@ -75,6 +116,9 @@ def create_kernel() -> Kernel:
     # For now, let's just setup basic filters without memory hooks or pass None.
     setup_kernel_filters(kernel)
     
+    # Register the precompiled requirement-extraction function
+    kernel.add_function(plugin_name="Requirements", function=get_extraction_function())
+    
     return kernel
 
 SYSTEM_PROMPT = """
@@ -82,14 +126,16 @@ You are a helpful AI Travel Concierge.
 Your goal is to help users plan trips by providing weather, currency, and credit card recommendations, and finding interesting places to visit.
 
 You have access to the following tools:
-- Weather: Get weather forecast.
+- Geo: Get latitude and longitude for a city or airport (offline, instant).
+- Weather: Get weather forecast for the travel dates (get_weather_batch for several places in one call).
 - Search: Search the web for restaurants, attractions, etc.
 - Card: Get credit card benefits.
 - Fx: Convert currency.
 - Knowledge: specific policy questions or card perks from the knowledge base.
 
 Rules:
-- To use the Weather tool, you MUST first use the Search tool to find the latitude and longitude of the destination.
+- Tool results already present in the conversation are current; do not call those tools again.
+- To use the Weather tool, first use the Geo tool to find the latitude and longitude of the destination. Only use the Search tool for coordinates if Geo cannot find the place.
 - Use the Search tool to find restaurants and attractions.
 - Always use the provided tools to get real data.
 - If you don't know something, use a search tool or say you don't know.
@@ -99,13 +145,7 @@ Rules:
 - ALWAYS return valid JSON, even if errors occur.
 """
 
-async def extract_requirements_with_llm(kernel: Kernel, user_input: str) -> dict:
-    """
-    Extract travel requirements using the LLM.
-    """
-    from semantic_kernel.functions import KernelArguments
-    
-    extraction_prompt = """
+EXTRACTION_PROMPT = """
     Analyze the user's travel request and extract the following details in JSON format:
     - destination: The place they want to go.
     - dates: When they want to go.
@@ -120,142 +160,529 @@ async def extract_requirements_with_llm(kernel: Kernel, user_input: str) -> dict
         "card": "..."
     }
     """
+
+_extraction_function = None
+
+def get_requirements_cache_size() -> int:
+    """Read the extraction cache size from REQUIREMENTS_CACHE_SIZE."""
+    return env_int("REQUIREMENTS_CACHE_SIZE", DEFAULT_REQUIREMENTS_CACHE_SIZE)
+
+# Extraction results keyed by normalized user input
+requirements_cache = LRUCache(max_size=get_requirements_cache_size())
+
+
+def get_extraction_function():
+    """
+    Get the requirement-extraction prompt function, compiling it on first use.
+    """
+    global _extraction_function
+    if _extraction_function is None:
+        from semantic_kernel.functions import KernelFunctionFromPrompt
+        
+        _extraction_function = KernelFunctionFromPrompt(
+            function_name="ExtractRequirements",
+            plugin_name="Requirements",
+            prompt=EXTRACTION_PROMPT
+        )
+    return _extraction_function
+
+async def extract_requirements_with_llm(kernel: Kernel, user_input: str) -> dict:
+    """
+    Extract travel requirements using the LLM.
     
-    from semantic_kernel.functions import KernelFunctionFromPrompt
+    Results are cached by normalized input, so repeated queries skip the LLM call.
+    """
+    from semantic_kernel.functions import KernelArguments
     
-    req_function = KernelFunctionFromPrompt(
-        function_name="ExtractRequirements",
-        plugin_name="Requirements",
-        prompt=extraction_prompt
-    )
-    kernel.add_function(plugin_name="Requirements", function=req_function)
+    cache_key = normalize_query(user_input)
+    cached = requirements_cache.get(cache_key)
+    if cached is not None:
+        logger.debug("Requirements cache hit")
+        return dict(cached)
     
-    result = await kernel.invoke(req_function, KernelArguments(input=user_input))
+    # Kernels built by create_kernel() already carry the function
+    if "Requirements" in kernel.plugins:
+        req_function = kernel.get_function("Requirements", "ExtractRequirements")
+    else:
+        req_function = get_extraction_function()
+        kernel.add_function(plugin_name="Requirements", function=req_function)
     
+    from semantic_kernel.connectors.ai.open_ai import OpenAIPromptExecutionSettings
+    
+    # The reply is a small JSON object; cap it and charge the request's budget
+    budget = current_budget()
+    max_tokens = budget.max_tokens(EXTRACTION_MAX_TOKENS) if budget else EXTRACTION_MAX_TOKENS
+    arguments = KernelArguments(
+        settings=OpenAIPromptExecutionSettings(max_tokens=max_tokens),
+        input=user_input,
+    )
+    
+    # Stop reading as soon as the JSON object closes
+    stream = JsonObjectStream()
     try:
-        import json
-        import re
-        json_match = re.search(r'\{.*\}', str(result), re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(0))
-        # If no JSON found, try to use the text directly if it looks like JSON?
-        # Or just return empty dict
-        return {}
+        with traced("llm", "extraction"):
+            async with aclosing(replayable_stream(
+                "llm", interaction_key("extraction", user_input),
+                lambda: kernel.invoke_stream(req_function, arguments),
+            )) as chunks:
+                await consume(chunks, stream)
+        requirements = stream.close()
     except Exception as e:
         logger.error(f"Error extracting requirements: {e}")
         return {}
+    finally:
+        if budget:
+            prompt = EXTRACTION_PROMPT.replace("{{$input}}", user_input)
+            budget.charge("extraction", count_tokens(prompt), count_tokens(stream.text))
+    
+    if not isinstance(requirements, dict):
+        return {}
+    requirements_cache.set(cache_key, requirements)
+    return dict(requirements)
+
+async def extract_requirements(kernel: Kernel, user_input: str, parsed: Optional[ParseResult] = None) -> dict:
+    """
+    Extract travel requirements, trying the rule-based fast path first.
+    
+    The LLM is only called when the fast-path parse is not confident; if it
+    does not answer within the request deadline, the partial fast-path
+    requirements are used.
+    """
+    parsed = parsed or parse_requirements(user_input)
+    fast_path_stats.record(parsed.is_confident())
+    if parsed.is_confident():
+        logger.debug(f"Requirements fast path hit (confidence={parsed.confidence})")
+        return parsed.requirements
+    
+    logger.debug(f"Requirements fast path fallback (confidence={parsed.confidence})")
+    try:
+        return await within_deadline(extract_requirements_with_llm(kernel, user_input),
+                                     EXTRACTION_TIMEOUT, Phase.ClarifyRequirements)
+    except DeadlineExceeded:
+        return dict(parsed.requirements)
 
 async def run_request_async(user_input: str) -> str:
     """
     Async implementation of the agent workflow with Auto Function Calling.
     """
     try:
-        # 1. Create kernel
-        kernel = create_kernel()
-        
+        return await _plan_within_deadline(get_kernel_pool(), user_input)
+    except Exception as e:
+        logger.error(f"Error in run_request: {e}")
+        return json.dumps({"error": str(e)})
+
+# Receives (section name, section data) as parts of the plan become available
+SectionCallback = Callable[[str, Any], None]
+
+async def run_request_stream(user_input: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of run_request_async.
+    
+    Yields ``{"section": name, "data": ...}`` events as soon as each part of
+    the plan is known: "requirements" (destination and dates), then TripPlan
+    sections ("weather", "card_recommendation", "currency_info", "results",
+    ...) from tool results or the model's streamed reply, and finally
+    "plan" with the complete TripPlan (or "error").
+    """
+    sections = SectionStream()
+    
+    async def produce() -> None:
+        try:
+            output = await _plan_within_deadline(get_kernel_pool(), user_input, sections.emit)
+        except Exception as e:
+            logger.error(f"Error in run_request_stream: {e}")
+            output = json.dumps({"error": str(e)})
+        sections.close(output)
+    
+    task = asyncio.create_task(produce())
+    try:
+        async for event in sections.events():
+            yield event
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def _plan_within_deadline(pool: KernelPool, user_input: str,
+                                emit: Optional[SectionCallback] = None) -> str:
+    """
+    Plan under the request deadline (AGENT_REQUEST_DEADLINE), tracing the
+    request (see app.tracing).
+    
+    Phases time out their own calls and degrade; this is the backstop for
+    everything else (e.g. waiting for a kernel), answering with a partial
+    plan from the fast-path requirements.
+    """
+    with deadline_scope() as deadline, trace_scope() as trace:
+        trace.enter(Phase.Init)
+        try:
+            return await asyncio.wait_for(_plan_with_pool(pool, user_input, emit), deadline.remaining())
+        except asyncio.TimeoutError:
+            logger.warning(f"Request deadline of {deadline.seconds:.0f}s exceeded")
+            deadline_stats.record_degraded()
+            return partial_tripplan({}, parse_requirements(user_input).requirements,
+                                    reason="Request deadline exceeded")
+
+async def _plan_with_pool(pool: KernelPool, user_input: str, emit: Optional[SectionCallback] = None) -> str:
+    """
+    Answer from the plan cache, or join an identical plan already in
+    progress, when the fast path already knows the requirements; otherwise
+    check out a kernel and plan.
+    """
+    parsed = parse_requirements(user_input)
+    key = plan_cache_key(parsed.requirements) if parsed.is_confident() else None
+    if key is not None:
+        cached = response_cache.get(parsed.requirements)
+        if cached is not None:
+            fast_path_stats.record(True)
+            return cached
+    
+    async def plan(emit: Optional[SectionCallback]) -> str:
+        # 1. Check out a warm kernel from the process-wide pool
+        async with pool.checkout() as kernel:
+            return await _plan_trip(kernel, user_input, parsed, emit)
+    
+    if key is None:
+        return await plan(emit)
+    return await _shared_plan(key, plan, emit)
+
+# Sections of the plans in plan_flights, keyed like the flights themselves
+_flight_sections: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], SectionBroadcast] = {}
+
+async def _shared_plan(key: Hashable, plan: Callable[[Optional[SectionCallback]], Awaitable[str]],
+                       emit: Optional[SectionCallback] = None) -> str:
+    """
+    Run ``plan`` through plan_flights, or join the identical plan in progress.
+    
+    ``plan`` emits to a broadcast that every request waiting on the flight
+    subscribes to, so a joining request streams the leader's sections (the
+    ones sent before it joined first) instead of waiting for the whole plan.
+    """
+    flight = (asyncio.get_running_loop(), key)
+    sections = _flight_sections.get(flight)
+    if sections is None:
+        sections = _flight_sections[flight] = SectionBroadcast()
+    sections.subscribe(emit)
+    try:
+        return await plan_flights.do(key, lambda: plan(sections.emit))
+    finally:
+        sections.unsubscribe(emit)
+        if not sections.waiters and _flight_sections.get(flight) is sections:
+            del _flight_sections[flight]
+
+async def _plan_trip(kernel: Kernel, user_input: str, parsed: Optional[ParseResult] = None,
+                     emit: Optional[SectionCallback] = None) -> str:
+    """
+    Run the planning workflow on a checked-out kernel.
+    
+    When a confident ``parsed`` result is passed in, the caller has already
+    looked it up in the plan cache and the in-flight plans. ``emit`` receives
+    plan sections as they become available (see run_request_stream).
+    """
+    # Token counts are exact once the encoding is loaded (off the event loop)
+    await preload_encoding()
+    # One token budget covers extraction, planning and tool turns
+    with budget_scope():
         # 2. Extract requirements
-        requirements = await extract_requirements_with_llm(kernel, user_input)
+        enter_phase(Phase.ClarifyRequirements)
+        checked_upstream = parsed is not None and parsed.is_confident()
+        parsed = parsed or parse_requirements(user_input)
+        speculation = None
+        if not parsed.is_confident():
+            # The LLM call is needed; meanwhile start the lookups the partial parse implies
+            speculation = Speculation.start(kernel, parsed.requirements)
+        try:
+            requirements = await extract_requirements(kernel, user_input, parsed)
+        except BaseException:
+            if speculation:
+                speculation.cancel()
+            raise
         logger.debug(f"Extracted requirements: {requirements}")
-        
-        state = AgentState()
-        state.requirements = requirements
-        
-        # 3. Execution Loop
-        state.advance() # -> Clarify
-        state.advance() # -> Plan
-        state.advance() # -> Execute
-        
-        # Enable Auto Function Calling
-        # In Semantic Kernel 1.x, we use OpenAIPromptExecutionSettings
-        from semantic_kernel.connectors.ai.open_ai import OpenAIPromptExecutionSettings
-        from semantic_kernel.contents import ChatHistory
-        from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
-
-        settings = OpenAIPromptExecutionSettings(
-            function_choice_behavior=FunctionChoiceBehavior.Auto()
-        )
-        
-        chat_history = ChatHistory(system_message=SYSTEM_PROMPT)
-        # Add context from extracted requirements to help the agent
-        context_message = (
-            f"User Input: {user_input}\n"
-            f"Context - Destination: {requirements.get('destination', 'Unknown')}, "
-            f"Dates: {requirements.get('dates', 'Unknown')}, "
-            f"Card: {requirements.get('card', 'Unknown')}\n"
-            "Please use this context to plan the trip."
+        if emit:
+            emit(HEADER_SECTION, {
+                "destination": requirements.get("destination", "Unknown"),
+                "travel_dates": requirements.get("dates", "Unknown"),
+            })
+    
+        key = None if checked_upstream else plan_cache_key(requirements)
+        if key is None:
+            return await _run_plan(kernel, user_input, requirements, speculation, emit)
+    
+        cached = response_cache.get(requirements)
+        if cached is not None:
+            if speculation:
+                speculation.cancel()
+            return cached
+    
+        leader = False
+    
+        async def plan(emit: Optional[SectionCallback]) -> str:
+            nonlocal leader
+            leader = True
+            # The shared plan runs on this request's kernel, so the kernel
+            # stays checked out until it finishes even if this request is
+            # cancelled first
+            hold_checkout(asyncio.current_task())
+            return await _run_plan(kernel, user_input, requirements, speculation, emit)
+    
+        try:
+            return await _shared_plan(key, plan, emit)
+        finally:
+            if speculation and not leader:
+                speculation.cancel()
+
+async def _run_plan(kernel: Kernel, user_input: str, requirements: Dict[str, Any],
+                    speculation: Optional[Speculation] = None,
+                    emit: Optional[SectionCallback] = None) -> str:
+    """
+    Run the tool and synthesis phases for extracted requirements.
+    
+    Speculative lookups the plan did not take over (it failed or was
+    cancelled before resolving them) are cancelled on the way out.
+    """
+    try:
+        return await _plan_with_tools(kernel, user_input, requirements, speculation, emit)
+    finally:
+        if speculation:
+            speculation.cancel()
+
+async def _plan_with_tools(kernel: Kernel, user_input: str, requirements: Dict[str, Any],
+                           speculation: Optional[Speculation] = None,
+                           emit: Optional[SectionCallback] = None) -> str:
+    """The tool and synthesis phases of ``_run_plan``."""
+    def emit_tool_section(key: str, value: Any) -> None:
+        section = tool_result_section(key, value)
+        if section:
+            emit(*section)
+    
+    state = AgentState()
+    state.requirements = requirements
+    state.deadline = current_deadline()
+    state.trace = current_trace()
+    
+    def out_of_budget() -> str:
+        # advance() skipped to Synthesize: answer with what is known so far
+        logger.warning("No time or iterations left for tools, returning a partial plan")
+        deadline_stats.record_degraded()
+        state.advance() # -> Done
+        return partial_tripplan(state.tool_outputs, requirements, reason="Request budget exhausted")
+    
+    # 3. Execution Loop
+    state.advance() # -> Clarify
+    if state.phase == Phase.Synthesize:
+        return out_of_budget()
+    state.advance() # -> Plan
+    if state.phase == Phase.Synthesize:
+        return out_of_budget()
+    # Tool calls that only depend on the requirements are planned up front
+    prefetch_calls = plan_prefetch(requirements)
+    
+    state.advance() # -> Execute
+    if state.phase == Phase.Synthesize:
+        return out_of_budget()
+    # ...and run concurrently instead of one model turn per tool
+    in_flight = speculation.resolve(prefetch_calls) if speculation else None
+    prefetched = await execute_prefetch(kernel, prefetch_calls, in_flight,
+                                        on_result=emit_tool_section if emit else None)
+    for key, entry in prefetched.items():
+        state.add_tool_call(key, entry["call"].arguments, entry["value"])
+    logger.debug(f"Prefetched tools: {list(prefetched)}")
+    
+    # Enable Auto Function Calling
+    # In Semantic Kernel 1.x, we use OpenAIPromptExecutionSettings
+    from semantic_kernel.connectors.ai.open_ai import OpenAIPromptExecutionSettings
+    from semantic_kernel.contents import ChatHistory
+    from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+
+    # Model tool turns count against the state's iteration limit
+    settings = OpenAIPromptExecutionSettings(
+        function_choice_behavior=FunctionChoiceBehavior.Auto(
+            maximum_auto_invoke_attempts=max(1, state.remaining_iterations)
         )
-        chat_history.add_user_message(context_message)
-        
+    )
+    
+    chat_history = ChatHistory(system_message=SYSTEM_PROMPT)
+    # Add context from extracted requirements to help the agent
+    context_message = (
+        f"User Input: {user_input}\n"
+        f"Context - Destination: {requirements.get('destination', 'Unknown')}, "
+        f"Dates: {requirements.get('dates', 'Unknown')}, "
+        f"Card: {requirements.get('card', 'Unknown')}\n"
+        "Please use this context to plan the trip."
+    )
+    prefetch_note = describe_prefetch(prefetched)
+    chat_history.add_user_message(context_message + (f"\n{prefetch_note}" if prefetch_note else ""))
+    context = chat_history.messages[-1]
+    # Tool results are compacted for the model, trimmed to the travel dates
+    with travel_dates_scope(requirements):
+        call_ids = add_prefetch_to_history(chat_history, prefetched)
+    
         chat_service = kernel.get_service("chat")
         
+        # Trim the history to the prompt budget and cap the reply
+        budget = current_budget()
+        if budget:
+            budget.fit(chat_history)
+            settings.max_tokens = budget.max_tokens(PLAN_MAX_TOKENS)
+            # Only list the prefetched results the model can still see; the
+            # shorter note never makes the trimmed history grow
+            kept = prefetch_in_history(chat_history, prefetched, call_ids)
+            if len(kept) < len(prefetched):
+                prefetch_note = describe_prefetch(kept)
+                context.content = context_message + (f"\n{prefetch_note}" if prefetch_note else "")
+        messages_before = len(chat_history.messages)
+    
         # Invoke the chat service with auto tool calling
-        # The service will loop automatically handling tool calls if Auto is set
-        result = await chat_service.get_chat_message_content(
-            chat_history=chat_history,
-            settings=settings,
-            kernel=kernel
-        )
-        
-        # Store the conversation result
-        state.history.append(f"User: {user_input}")
-        state.history.append(f"Assistant: {result.content}")
+        # The service will loop automatically handling tool calls if Auto is set.
+        # The reply is streamed so the plan is parsed and validated as it arrives
+        # and reading stops once the JSON object is complete.
+        # The call gets what is left of the request deadline, less a reserve
+        # for synthesis; past that the plan is built from what is known.
+        plan_stream = TripPlanStream(on_field=emit)
+        stream_error = None
+        timed_out = False
         
-        # Capture tool outputs from the history or kernel filters?
-        # For the purpose of the state machine's "tool_outputs" for synthesis:
-        # We might need to inspect the chat history to see what tools were called.
-        # But for synthesis, we can also ask the model to produce the final JSON as part of the conversation.
-        # However, the project structure expects a 'synthesize_to_tripplan' function to be called.
-        # Let's assume the Model does the heavy lifting, but we still populate state for tracking.
+        async def stream_plan() -> str:
+            # The stream is opened, read and closed in one task: the deadline
+            # runs this in its own task, and SK and httpx must not have the
+            # generator closed from another one
+            async with aclosing(replayable_stream(
+                "llm", interaction_key("planning", user_input, requirements),
+                lambda: chat_service.get_streaming_chat_message_content(
+                    chat_history=chat_history,
+                    settings=settings,
+                    kernel=kernel
+                ),
+            )) as chunks:
+                return await consume(chunks, plan_stream)
         
-        # For this specific assignment, let's manually populate state.tool_outputs by parsing the chat history logic
-        # OR just assume the Synthesis phase uses the conversation context.
-        # But 'synthesize_to_tripplan' takes a dictionary of tool results.
-        # Let's keep it simple: The result.content might BE the JSON if we instructed it so.
-        # The prompt says: "Return the final output as a JSON object matching the TripPlan schema."
-        
-        state.advance() # -> Analyze
-        state.advance() # -> Synthesize
-        
-        # If the model returned JSON directly, we can use it.
-        # If not, we might need a cleanup step.
+        planned = not (budget and budget.exhausted)
         try:
-            # Try to parse JSON from content
-            import re
-            json_match = re.search(r'\{.*\}', result.content, re.DOTALL)
-            if json_match:
-                result_json = json_match.group(0)
-                # Validate?
-                result_json_obj = json.loads(result_json)
-                
-                # Normalize to 'plan' key
-                if "plan" in result_json_obj:
-                    final_output = json.dumps(result_json_obj)
-                elif "TripPlan" in result_json_obj:
-                    final_output = json.dumps({"plan": result_json_obj["TripPlan"]})
-                elif "tripPlan" in result_json_obj:
-                    final_output = json.dumps({"plan": result_json_obj["tripPlan"]})
-                else:
-                    # Assume the whole object is the plan
-                    final_output = json.dumps({"plan": result_json_obj})
-            else:
-                # Fallback to synthesis module if model didn't return JSON
-                # But we don't have tool_outputs easily here without filters.
-                # Let's hope the prompt works.
-                final_output = json.dumps({"error": "No JSON found in response", "raw": result.content})
-        except:
-             final_output = json.dumps({"error": "Invalid JSON in response", "raw": result.content})
+            if not planned:
+                # Extraction used up the request's tokens: synthesize from the tool results
+                raise JsonStreamError("Token budget exhausted before planning")
+            with traced("llm", "planning"):
+                content = await within_deadline(stream_plan(), PLAN_TIMEOUT, Phase.ExecuteTools)
+        except JsonStreamError as e:
+            content = plan_stream.text
+            stream_error = e
+        except DeadlineExceeded as e:
+            content = plan_stream.text
+            stream_error = e
+            timed_out = True
+        # Tool turns were charged by TokenBudgetFilter as they happened; the
+        # reply came from one more turn over the grown history, unless the
+        # tool calls were stopped
+        tool_turns = len(chat_history.messages) > messages_before
+        if budget and planned and (plan_stream.text or not tool_turns):
+            budget.charge("planning", count_history(chat_history), count_tokens(plan_stream.text))
+    
+    # Store the conversation result
+    state.history.append(f"User: {user_input}")
+    state.history.append(f"Assistant: {content}")
+    
+    state.advance() # -> Analyze
+    state.advance() # -> Synthesize
+    
+    # Use the model's plan when it is a valid TripPlan; otherwise fall back
+    # to the synthesis module with whatever the prefetch stage collected
+    plan = None
+    if stream_error is None:
+        try:
+            plan = plan_stream.plan()
+        except JsonStreamError as e:
+            stream_error = e
+    
+    if plan is not None:
+        final_output = json.dumps({"plan": plan})
+        logger.debug(f"Plan validated ({plan_stream.fields_validated} fields checked while streaming)")
+    elif timed_out:
+        deadline_stats.record_degraded()
+        final_output = partial_tripplan(state.tool_outputs, requirements, plan_stream.fields, str(stream_error))
+    else:
+        logger.warning(f"Model did not return a valid TripPlan: {stream_error}")
+        if state.tool_outputs:
+            final_output = synthesize_to_tripplan(state.tool_outputs, requirements)
+        else:
+            final_output = json.dumps({"error": str(stream_error), "raw": content})
 
-        state.advance() # -> Done
-        
-        return final_output
-        
-    except Exception as e:
-        logger.error(f"Error in run_request: {e}")
-        return json.dumps({"error": str(e)})
+    state.advance() # -> Done
+    
+    response_cache.put(requirements, final_output)
+    return final_output
+
+# Event loop shared by the synchronous entry points. Kernel pools are kept per
+# loop, so running every call on the same loop lets later calls reuse the
+# kernels (and their open connections) built by earlier ones.
+_runner: Optional[asyncio.Runner] = None
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """
+    Run ``coro`` to completion on the process's shared event loop.
+    
+    Use this instead of ``asyncio.run`` for repeated calls from synchronous
+    code (the chat REPL, scripts), which would otherwise start a new loop,
+    kernel pool and set of kernels every time.
+    """
+    global _runner
+    if _runner is None:
+        _runner = asyncio.Runner()
+        atexit.register(_runner.close)
+    return _runner.run(coro)
 
 def run_request(user_input: str) -> str:
     """Wrapper for async execution"""
-    return asyncio.run(run_request_async(user_input))
+    return run_sync(run_request_async(user_input))
+
+async def run_requests_batch_async(inputs: List[str], max_concurrency: int = DEFAULT_BATCH_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Plan many trips on one event loop with at most ``max_concurrency`` in flight.
+    
+    Kernels come from the shared pool and the extraction and plan caches are
+    shared, so repeated destinations get cheaper as the batch runs. Each item
+    gets its own deadline and trace, as in run_request_async. A failing item is
+    recorded in its result and never aborts the rest of the batch.
+    
+    Returns:
+        One result per input, in input order, with keys ``index``, ``input``,
+        ``output`` (TripPlan JSON string), ``latency_s`` and ``error``
+        (None on success)
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    pool = get_kernel_pool()
+    
+    async def run_one(index: int, user_input: str) -> Dict[str, Any]:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                output = await _plan_within_deadline(pool, user_input)
+                error = json.loads(output).get("error")
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {e}")
+                output = json.dumps({"error": str(e)})
+                error = str(e)
+            return {
+                "index": index,
+                "input": user_input,
+                "output": output,
+                "latency_s": time.perf_counter() - start,
+                "error": error,
+            }
+    
+    batch_start = time.perf_counter()
+    results = await asyncio.gather(*(run_one(i, text) for i, text in enumerate(inputs)))
+    failed = sum(1 for item in results if item["error"])
+    logger.info(
+        f"Batch finished: {len(results) - failed}/{len(results)} succeeded "
+        f"in {time.perf_counter() - batch_start:.2f}s (max_concurrency={max_concurrency})"
+    )
+    return list(results)
+
+def run_requests_batch(inputs: List[str], max_concurrency: int = DEFAULT_BATCH_CONCURRENCY) -> List[Dict[str, Any]]:
+    """Wrapper for async batch execution"""
+    return run_sync(run_requests_batch_async(inputs, max_concurrency))
 
 def main():
     """Main entry point for command line usage."""
@@ -3,6 +3,8 @@ import time
 import uuid
 import json
 
+from app.token_budget import count_tokens
+
 class ShortTermMemory:
     """
     Short-term memory system for session-based context management.
@@ -22,10 +24,8 @@ class ShortTermMemory:
         return sum(item.get("tokens", 0) for item in self.memory_items)
     
     def _estimate_tokens(self, text: str) -> int:
-        """Rough token estimation (approx 4 chars per token)."""
-        if not text:
-            return 0
-        return len(str(text)) // 4
+        """Token count with the model's encoding (see app.token_budget)."""
+        return count_tokens(text)
     
     def add_conversation(self, role: str, content: str, metadata: Dict[str, Any] = None):
         """Add a conversation item."""
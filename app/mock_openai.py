@@ -0,0 +1,400 @@
+# app/mock_openai.py
+"""
+Local stand-in for the Azure OpenAI endpoints the agent uses.
+
+Serves chat completions (plain and streamed, including tool calls) and
+embeddings in the wire format ``AzureChatCompletion`` / ``AzureTextEmbedding``
+expect, so the orchestration can be load-tested without paying for tokens:
+
+    python -m app.mock_openai --port 8081 --chat-latency lognormal:0.8:0.4 --error-rate 0.02
+
+    AZURE_OPENAI_BASE_URL=http://127.0.0.1:8081/openai AZURE_OPENAI_KEY=mock python -m app.server
+
+Latencies are drawn from configurable distributions (time to first token,
+time between streamed tokens, embedding latency), a share of requests fails
+with a configurable status, and replies come from a script: rules that match
+the last user message with a regex and give, per model turn, either tool
+calls or content (``$name`` placeholders are filled from the regex's named
+groups). Without ``--script`` the bundled ``data/mock_openai_script.json``
+answers the agent's extraction and planning calls.
+
+``GET /metrics`` reports requests, errors and the peak number of concurrent
+requests, i.e. how much concurrency the agent actually produced.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from string import Template
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.utils.http_server import AsyncHttpServer, HttpRequest, HttpResponse, json_response
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SCRIPT = os.path.join(os.path.dirname(__file__), "data", "mock_openai_script.json")
+DEFAULT_EMBEDDING_DIM = 1536
+DEFAULT_REPLY = "OK"
+
+_DEPLOYMENT = re.compile(r"/deployments/([^/]+)/")
+# Streamed replies are split into word-sized tokens
+_TOKEN = re.compile(r"\s*\S+|\s+")
+
+
+class LatencyModel:
+    """
+    Latency distribution parsed from a spec (all values in seconds):
+
+    - ``fixed:S`` or just ``S``
+    - ``uniform:LOW:HIGH``
+    - ``normal:MEAN:STDDEV`` (clipped at 0)
+    - ``lognormal:MEDIAN:SIGMA``
+    - ``exponential:MEAN``
+    """
+
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, spec: str = "0"):
+        kind, _, rest = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}'")
+        params = [float(value) for value in rest.split(":")] if rest else []
+        if len(params) != self.KINDS[kind]:
+            raise ValueError(f"'{kind}' latency takes {self.KINDS[kind]} parameter(s): {spec}")
+        self.spec = spec
+        self.kind = kind
+        self.params = params
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.params)
+        elif self.kind == "lognormal":
+            median, sigma = self.params
+            value = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        else:
+            value = rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        return max(0.0, value)
+
+
+@dataclass
+class ScriptRule:
+    """
+    Replies for conversations whose last user message matches ``pattern``.
+
+    ``steps`` holds one entry per model turn: ``{"tool_calls": [{"name":
+    "Plugin-function", "arguments": {...}}]}`` or ``{"content": "..."}``. The
+    turn is the number of tool-call rounds since that user message; after the
+    last step the last one is repeated.
+    """
+    pattern: "re.Pattern[str]"
+    steps: List[Dict[str, Any]]
+
+    def reply(self, match: "re.Match[str]", turn: int) -> Dict[str, Any]:
+        values = {name: json.dumps(value or "")[1:-1] for name, value in match.groupdict().items()}
+        step = self.steps[min(turn, len(self.steps) - 1)]
+        if "tool_calls" in step:
+            return {"tool_calls": [
+                {
+                    "name": call["name"],
+                    "arguments": Template(json.dumps(call.get("arguments", {}))).safe_substitute(values),
+                }
+                for call in step["tool_calls"]
+            ]}
+        return {"content": Template(step.get("content", "")).safe_substitute(values)}
+
+
+def load_script(path: str) -> List[ScriptRule]:
+    """Load script rules from a JSON file (a list of ``{"match", "steps"}`` objects)."""
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    return [ScriptRule(re.compile(rule["match"], re.DOTALL), rule["steps"]) for rule in rules]
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def _conversation(messages: List[Dict[str, Any]]) -> tuple:
+    """Text of the last user message and the tool-call rounds after it."""
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].get("role") == "user":
+            turn = sum(1 for message in messages[index + 1:]
+                       if message.get("role") == "assistant" and message.get("tool_calls"))
+            return _message_text(messages[index]), turn
+    return "", 0
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+
+def embed(text: str, dimensions: int = DEFAULT_EMBEDDING_DIM) -> List[float]:
+    """Deterministic unit vector for a text (same text, same vector)."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+@dataclass
+class MockSettings:
+    """Behaviour of the mock endpoints."""
+    chat_latency: LatencyModel = field(default_factory=LatencyModel)
+    token_interval: LatencyModel = field(default_factory=LatencyModel)
+    embedding_latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0
+    error_status: int = 429
+    embedding_dim: int = DEFAULT_EMBEDDING_DIM
+    reply: str = DEFAULT_REPLY
+    seed: Optional[int] = None
+
+
+class MockOpenAIService:
+    """
+    Request handler of the mock server.
+
+    Args:
+        settings: Latency, error and embedding settings
+        rules: Script rules; the first matching rule answers a chat request
+    """
+
+    def __init__(self, settings: Optional[MockSettings] = None, rules: Optional[List[ScriptRule]] = None):
+        self.settings = settings or MockSettings()
+        self.rules = rules if rules is not None else load_script(DEFAULT_SCRIPT)
+        self.rng = random.Random(self.settings.seed)
+        self.reset_metrics()
+
+    async def handle(self, request: HttpRequest) -> HttpResponse:
+        if request.path == "/metrics":
+            return json_response(self.get_metrics())
+        if request.method != "POST":
+            return json_response({"error": {"code": "NotFound", "message": "Not found"}}, 404)
+        if request.path.endswith("/chat/completions"):
+            kind, handler = "chat", self._chat
+        elif request.path.endswith("/embeddings"):
+            kind, handler = "embeddings", self._embeddings
+        else:
+            return json_response({"error": {"code": "NotFound", "message": f"No route for {request.path}"}}, 404)
+
+        try:
+            body = request.json() or {}
+        except ValueError:
+            return json_response({"error": {"code": "BadRequest", "message": "Invalid JSON body"}}, 400)
+
+        self.metrics["requests"][kind] = self.metrics["requests"].get(kind, 0) + 1
+        if self.rng.random() < self.settings.error_rate:
+            self.metrics["errors"] += 1
+            return self._error()
+
+        self.metrics["in_flight"] += 1
+        self.metrics["max_in_flight"] = max(self.metrics["max_in_flight"], self.metrics["in_flight"])
+        try:
+            response = await handler(body, self._deployment(request, body))
+        except BaseException:
+            self.metrics["in_flight"] -= 1
+            raise
+        if response.stream is None:
+            self.metrics["in_flight"] -= 1
+        else:
+            response.stream = self._counted(response.stream)
+        return response
+
+    async def _counted(self, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Keep a streamed response in flight until its last event is sent."""
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            self.metrics["in_flight"] -= 1
+
+    def _error(self) -> HttpResponse:
+        status = self.settings.error_status
+        response = json_response({"error": {"code": str(status), "message": "Injected error from mock server"}}, status)
+        if status == 429:
+            response.headers["Retry-After"] = "1"
+        return response
+
+    @staticmethod
+    def _deployment(request: HttpRequest, body: Dict[str, Any]) -> str:
+        match = _DEPLOYMENT.search(request.path)
+        return match.group(1) if match else body.get("model", "mock")
+
+    def _reply(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        text, turn = _conversation(messages)
+        for rule in self.rules:
+            match = rule.pattern.search(text)
+            if match:
+                return rule.reply(match, turn)
+        return {"content": self.settings.reply}
+
+    async def _chat(self, body: Dict[str, Any], model: str) -> HttpResponse:
+        messages = body.get("messages") or []
+        reply = self._reply(messages)
+        if "tool_calls" in reply:
+            for call in reply["tool_calls"]:
+                call["id"] = f"call_{uuid.uuid4().hex[:24]}"
+        prompt_tokens = sum(_tokens(_message_text(message)) for message in messages)
+        completion_tokens = _tokens(reply.get("content", "")) + sum(
+            _tokens(call["name"] + call["arguments"]) for call in reply.get("tool_calls", [])
+        )
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        self.metrics["completion_tokens"] += completion_tokens
+
+        await asyncio.sleep(self.settings.chat_latency.sample(self.rng))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return HttpResponse(
+                headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"},
+                stream=self._stream_chunks(completion_id, model, reply, usage if include_usage else None),
+            )
+
+        message: Dict[str, Any] = {"role": "assistant", "content": reply.get("content")}
+        if "tool_calls" in reply:
+            message["tool_calls"] = [
+                {"id": call["id"], "type": "function",
+                 "function": {"name": call["name"], "arguments": call["arguments"]}}
+                for call in reply["tool_calls"]
+            ]
+        return json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if "tool_calls" in reply else "stop",
+            }],
+            "usage": usage,
+        })
+
+    async def _stream_chunks(self, completion_id: str, model: str, reply: Dict[str, Any],
+                             usage: Optional[Dict[str, int]]) -> AsyncIterator[bytes]:
+        """Server-sent events for a streamed reply, one token (or tool call) per event."""
+        created = int(time.time())
+
+        def event(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> bytes:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        yield event({"role": "assistant", "content": ""})
+        if "tool_calls" in reply:
+            for index, call in enumerate(reply["tool_calls"]):
+                await asyncio.sleep(self.settings.token_interval.sample(self.rng))
+                yield event({"tool_calls": [{
+                    "index": index, "id": call["id"], "type": "function",
+                    "function": {"name": call["name"], "arguments": call["arguments"]},
+                }]})
+            yield event({}, "tool_calls")
+        else:
+            for token in _TOKEN.findall(reply["content"]):
+                await asyncio.sleep(self.settings.token_interval.sample(self.rng))
+                yield event({"content": token})
+            yield event({}, "stop")
+
+        if usage is not None:
+            final = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                     "model": model, "choices": [], "usage": usage}
+            yield f"data: {json.dumps(final)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+
+    async def _embeddings(self, body: Dict[str, Any], model: str) -> HttpResponse:
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or self.settings.embedding_dim
+        await asyncio.sleep(self.settings.embedding_latency.sample(self.rng))
+        tokens = sum(_tokens(str(text)) for text in inputs)
+        return json_response({
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": index, "embedding": embed(str(text), dimensions)}
+                for index, text in enumerate(inputs)
+            ],
+            "model": model,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get request counts per endpoint, injected errors and peak concurrency."""
+        metrics: Dict[str, Any] = dict(self.metrics)
+        metrics["requests"] = dict(self.metrics["requests"])
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {
+            "requests": {},
+            "errors": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "completion_tokens": 0,
+        }
+
+
+async def serve(service: MockOpenAIService, host: str = "127.0.0.1", port: int = 8081) -> None:
+    """Run the mock server until cancelled."""
+    server = AsyncHttpServer(service.handle, host, port)
+    await server.start()
+    logger.info(f"Mock Azure OpenAI ready: AZURE_OPENAI_BASE_URL=http://{host}:{server.port}/openai")
+    await server.serve_forever()
+
+
+def main():
+    """Command line entry point for the mock server."""
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Azure OpenAI endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--chat-latency", default="0", help="Time to first token, e.g. lognormal:0.8:0.4")
+    parser.add_argument("--token-interval", default="0", help="Time between streamed tokens, e.g. fixed:0.02")
+    parser.add_argument("--embedding-latency", default="0", help="Embedding latency, e.g. uniform:0.02:0.08")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=429, help="Status of injected errors")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help="JSON file of scripted replies")
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="Reply when no script rule matches")
+    parser.add_argument("--embedding-dim", type=int, default=DEFAULT_EMBEDDING_DIM)
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latencies and errors")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        chat_latency=LatencyModel(args.chat_latency),
+        token_interval=LatencyModel(args.token_interval),
+        embedding_latency=LatencyModel(args.embedding_latency),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        embedding_dim=args.embedding_dim,
+        reply=args.reply,
+        seed=args.seed,
+    )
+    service = MockOpenAIService(settings, load_script(args.script))
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        logger.info("Mock Azure OpenAI stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# app/prefetch.py
+"""
+Parallel tool pre-fetch driven by extracted requirements.
+
+Once the destination, dates and card are known, the weather, FX, card and
+knowledge lookups do not depend on each other or on the model. They are
+planned in the PlanTools phase, run concurrently in the ExecuteTools phase,
+and added to the chat history as completed tool calls so the model can go
+straight to synthesis.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from app.compaction import compact_tool_result
+from app.deadline import TOOL_TIMEOUT, within_deadline
+from app.replay import interaction_key, replayable_call
+from app.geo import geocode
+from app.requirements_parser import parse_date_range
+from app.state import Phase
+from app.tracing import traced
+
+if TYPE_CHECKING:
+    from semantic_kernel import Kernel
+    from semantic_kernel.contents import ChatHistory
+
+logger = logging.getLogger(__name__)
+
+# Amount used for the sample currency conversion
+SAMPLE_AMOUNT_USD = 100.0
+
+
+@dataclass
+class ToolCall:
+    """
+    A tool invocation planned from the requirements.
+    """
+    key: str
+    plugin_name: str
+    function_name: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return f"{self.plugin_name}-{self.function_name}"
+
+
+def plan_prefetch(requirements: Dict[str, Any]) -> List[ToolCall]:
+    """
+    Decide which tool calls can run before the model is involved.
+
+    Args:
+        requirements: Extracted requirements (destination, dates, card)
+
+    Returns:
+        Tool calls keyed by the tool_outputs names used for synthesis
+        ("weather", "fx", "card", "rag")
+    """
+    calls: List[ToolCall] = []
+    destination = requirements.get("destination") or ""
+    card = requirements.get("card") or ""
+    has_card = card and card.lower() != "unknown"
+
+    place = geocode(destination) if destination else None
+    if place:
+        weather_args: Dict[str, Any] = {"lat": place.lat, "lon": place.lon}
+        window = parse_date_range(str(requirements.get("dates") or ""))
+        if window:
+            weather_args.update(start_date=window[0].isoformat(), end_date=window[1].isoformat())
+        calls.append(ToolCall("weather", "Weather", "get_weather", weather_args))
+        if place.currency != "USD":
+            calls.append(ToolCall("fx", "Fx", "convert_fx", {
+                "amount": SAMPLE_AMOUNT_USD,
+                "from_currency": "USD",
+                "to_currency": place.currency,
+            }))
+
+    if has_card:
+        calls.append(ToolCall("card", "Card", "get_card_recommendation", {"card_name": card}))
+
+    if destination or has_card:
+        # The gazetteer name keeps the query the same however the destination
+        # was written ("Paris" from the fast path, "Paris, France" from the LLM)
+        name = place.name if place else destination
+        query = f"{card} card benefits for travel to {name}" if has_card else f"travel tips for {name}"
+        calls.append(ToolCall("rag", "Knowledge", "search_knowledge", {"query": query}))
+
+    return calls
+
+
+async def call_tool(kernel: Kernel, call: ToolCall) -> Any:
+    """
+    Invoke a kernel tool function directly.
+
+    Synchronous tools run in a worker thread so they do not block the event
+    loop while other lookups are in flight. Calls are recorded or replayed
+    when a cassette is active (see app.replay).
+    """
+    async def invoke() -> Any:
+        function = kernel.get_function(call.plugin_name, call.function_name)
+        if function.metadata.is_asynchronous:
+            return await function.method(**call.arguments)
+        return await asyncio.to_thread(function.method, **call.arguments)
+
+    key = interaction_key(call.plugin_name, call.function_name, call.arguments)
+    return await replayable_call("tool", key, invoke)
+
+
+def _decode(output: Any) -> Any:
+    """Tools return JSON strings; keep the decoded value when possible."""
+    if isinstance(output, str):
+        try:
+            return json.loads(output)
+        except ValueError:
+            return output
+    return output
+
+
+def _is_error(value: Any) -> bool:
+    return isinstance(value, dict) and "error" in value
+
+
+async def execute_prefetch(kernel: Kernel, calls: List[ToolCall],
+                           in_flight: Optional[Dict[str, Awaitable]] = None,
+                           on_result: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """
+    Run planned tool calls concurrently.
+
+    Failed calls, and calls that exceed their timeout under the request
+    deadline, are logged and left out of the results, so the model can
+    still request those tools itself.
+
+    Args:
+        kernel: Kernel holding the tool plugins
+        calls: Planned tool calls
+        in_flight: Already started calls by key (e.g. from speculation);
+                   these are awaited instead of being invoked again
+        on_result: Called with (key, decoded value) as each call succeeds,
+                   in completion order
+
+    Returns:
+        Mapping of call key to {"call": ToolCall, "output": raw output, "value": decoded output}
+    """
+    if not calls:
+        return {}
+
+    in_flight = in_flight or {}
+
+    async def run(call: ToolCall) -> Optional[Dict[str, Any]]:
+        try:
+            with traced("tool", call.function_name, prefetched=True):
+                output = await within_deadline(in_flight.get(call.key) or call_tool(kernel, call),
+                                               TOOL_TIMEOUT, Phase.ExecuteTools)
+        except Exception as e:
+            logger.warning(f"Prefetch {call.name} failed: {e}")
+            return None
+        value = _decode(output)
+        if _is_error(value):
+            logger.warning(f"Prefetch {call.name} returned an error: {value['error']}")
+            return None
+        if on_result:
+            on_result(call.key, value)
+        return {"call": call, "output": output, "value": value}
+
+    entries = await asyncio.gather(*(run(call) for call in calls))
+    return {call.key: entry for call, entry in zip(calls, entries) if entry is not None}
+
+
+def add_prefetch_to_history(chat_history: ChatHistory, results: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Append pre-fetched results to the chat history as completed tool calls.
+
+    The assistant message carries the function calls and one tool message
+    per result follows it, exactly as if the model had requested them.
+    Outputs are compacted first (see app.compaction).
+
+    Returns:
+        Mapping of result key to the id of its tool call in the history
+    """
+    if not results:
+        return {}
+
+    from semantic_kernel.contents import AuthorRole, ChatMessageContent
+    from semantic_kernel.contents import FunctionCallContent, FunctionResultContent
+
+    call_contents: List[FunctionCallContent] = []
+    result_contents: List[FunctionResultContent] = []
+    call_ids: Dict[str, str] = {}
+    for key, entry in results.items():
+        call: ToolCall = entry["call"]
+        call_content = FunctionCallContent(
+            id=f"call_{uuid.uuid4().hex[:24]}",
+            plugin_name=call.plugin_name,
+            function_name=call.function_name,
+            arguments=json.dumps(call.arguments),
+        )
+        call_contents.append(call_content)
+        call_ids[key] = call_content.id
+        result_contents.append(
+            FunctionResultContent.from_function_call_content_and_result(
+                call_content, compact_tool_result(call.function_name, entry["output"])
+            )
+        )
+
+    chat_history.add_message(ChatMessageContent(role=AuthorRole.ASSISTANT, items=call_contents))
+    for result_content in result_contents:
+        chat_history.add_message(result_content.to_chat_message_content())
+    return call_ids
+
+
+def prefetch_in_history(chat_history: ChatHistory, results: Dict[str, Any],
+                        call_ids: Dict[str, str]) -> Dict[str, Any]:
+    """The prefetch results whose tool messages are still in the history (trimming may drop some)."""
+    from semantic_kernel.contents import FunctionResultContent
+
+    present = {
+        item.id
+        for message in chat_history.messages
+        for item in message.items
+        if isinstance(item, FunctionResultContent)
+    }
+    return {key: entry for key, entry in results.items() if call_ids.get(key) in present}
+
+
+def prefetched_tool_outputs(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Map prefetch results to the tool_outputs layout used by synthesis."""
+    return {key: entry["value"] for key, entry in results.items()}
+
+
+def describe_prefetch(results: Dict[str, Any]) -> Optional[str]:
+    """Short note for the model listing which tools were already run."""
+    if not results:
+        return None
+    names = ", ".join(entry["call"].name for entry in results.values())
+    return f"Already retrieved (do not call again): {names}."
@@ -1,15 +1,23 @@
 import os
+import asyncio
 from typing import List, Dict
 from azure.cosmos import CosmosClient
 
+from app.replay import interaction_key, replayable_call
+
 async def retrieve(kernel, query: str, top_k: int = 3) -> List[Dict]:
     """
     Retrieve relevant snippets from Cosmos DB using vector similarity.
+    
+    The embedding request and the vector search are recorded or replayed
+    when a cassette is active (see app.replay).
     """
     # 1. Generate query embedding
     service_id = "embedding"
-    embedding_gen = kernel.get_service(service_id)
-    embeddings = await embedding_gen.generate_embeddings([query])
+    embedding_gen = kernel.get_service(service_id) if kernel is not None else None
+    embeddings = await replayable_call(
+        "embedding", interaction_key(query), lambda: embedding_gen.generate_embeddings([query])
+    )
     query_vector = embeddings[0]
     
     # Ensure list for Cosmos DB param
@@ -19,6 +27,12 @@ async def retrieve(kernel, query: str, top_k: int = 3) -> List[Dict]:
     elif hasattr(query_vector, "tolist"): # specific to some SK types
         query_vector = query_vector.tolist()
     
+    return await replayable_call(
+        "vector_search", interaction_key(query, top_k), lambda: _vector_search(query_vector, top_k)
+    )
+
+async def _vector_search(query_vector: List[float], top_k: int) -> List[Dict]:
+    """Run the vector similarity query against Cosmos DB."""
     # 2. Setup Cosmos DB client
     url = os.environ.get("COSMOS_ENDPOINT")
     key = os.environ.get("COSMOS_KEY")
@@ -44,10 +58,12 @@ async def retrieve(kernel, query: str, top_k: int = 3) -> List[Dict]:
         {"name": "@embedding", "value": query_vector}
     ]
     
-    items = list(container.query_items(
+    # The Cosmos SDK client is synchronous; run the query off the event loop
+    # so concurrent lookups (prefetch, speculation) are not blocked by it
+    items = await asyncio.to_thread(lambda: list(container.query_items(
         query=sql_query,
         parameters=parameters,
         enable_cross_partition_query=True
-    ))
+    )))
     
     return items
\ No newline at end of file
@@ -0,0 +1,253 @@
+# app/replay.py
+"""
+Record/replay of LLM, embedding and tool calls.
+
+With ``AGENT_CASSETTE=path`` and ``AGENT_CASSETTE_MODE=record`` every
+model stream (requirement extraction, planning), embedding request, vector
+search and tool invocation made while serving requests is written to a
+cassette, replacing any earlier recording at that path: a JSON-lines file
+with one compact record per interaction, including its latency (and, for
+streams, when each chunk arrived).
+
+With ``AGENT_CASSETTE_MODE=replay`` the same calls are answered from the
+cassette without touching Azure OpenAI, Bing or Cosmos, so requests run
+deterministically offline. Tools the model calls itself run inside the
+planning stream, so they are replayed with it rather than one by one. A
+recorded failure is raised again as its original exception type when that
+type can be rebuilt (RuntimeError otherwise). Recorded latencies are reproduced when
+``AGENT_CASSETTE_LATENCY`` is set (a scale factor: 1 = as recorded,
+0.5 = twice as fast; default 0 = no delay). A call that is not in the
+cassette raises ``CassetteMiss``.
+
+Interactions are matched by kind and a key built from the request's
+meaningful inputs (user input, requirements, tool arguments), not from
+whole chat histories, which contain random tool-call ids.
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.utils.env import env_float
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(LookupError):
+    """A replayed call has no recorded interaction."""
+
+
+def interaction_key(*parts: Any) -> str:
+    """Stable key for the inputs of a call."""
+    return json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _plain(value: Any) -> Any:
+    """Make a call result JSON-serializable (numpy arrays and SK vectors become lists)."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    return value
+
+
+def _error_fields(error: Exception) -> Dict[str, Any]:
+    """How a failed call is recorded."""
+    return {
+        "error": f"{type(error).__name__}: {error}",
+        "error_type": f"{type(error).__module__}:{type(error).__qualname__}",
+        "message": str(error),
+    }
+
+
+def _recorded_error(record: Dict[str, Any]) -> Exception:
+    """The exception of a recorded failure, as its original type when it can be rebuilt."""
+    message = record.get("message", record["error"])
+    module_name, _, name = record.get("error_type", "").partition(":")
+    try:
+        error_type: Any = importlib.import_module(module_name)
+        for part in name.split("."):
+            error_type = getattr(error_type, part)
+    except (ImportError, AttributeError, ValueError):
+        return RuntimeError(record["error"])
+    if not (isinstance(error_type, type) and issubclass(error_type, Exception)):
+        return RuntimeError(record["error"])
+    try:
+        return error_type(message)
+    except Exception:
+        # Types whose constructor takes other arguments keep their message
+        error = error_type.__new__(error_type)
+        Exception.__init__(error, message)
+        return error
+
+
+class Cassette:
+    """
+    Recorded interactions, keyed by (kind, key).
+
+    In record mode ``path`` is truncated when the cassette is opened, so a
+    recording never mixes with an earlier session, and interactions are
+    appended to it as they finish. In
+    replay mode repeated calls with the same key get the recorded
+    interactions in order, and the last one again once they run out.
+
+    Args:
+        path: Cassette file (JSON lines)
+        mode: "record" or "replay"
+        latency_scale: Replay delay as a multiple of the recorded latency
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, latency_scale: float = 0.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._interactions: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+        self._served: Dict[tuple, int] = defaultdict(int)
+        self.metrics = {"recorded": 0, "replayed": 0, "misses": 0}
+        if mode == REPLAY:
+            self._load()
+        else:
+            open(path, "w", encoding="utf-8").close()
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._interactions[(record["kind"], record["key"])].append(record)
+        logger.info(f"Loaded {sum(map(len, self._interactions.values()))} interactions from {self.path}")
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._interactions[(record["kind"], record["key"])].append(record)
+            self.metrics["recorded"] += 1
+
+    def _next(self, kind: str, key: str) -> Dict[str, Any]:
+        with self._lock:
+            records = self._interactions.get((kind, key))
+            if not records:
+                self.metrics["misses"] += 1
+                raise CassetteMiss(f"No recorded {kind} interaction for {key}")
+            index = min(self._served[(kind, key)], len(records) - 1)
+            self._served[(kind, key)] += 1
+            self.metrics["replayed"] += 1
+            return records[index]
+
+    async def _delay(self, seconds: float) -> None:
+        if self.latency_scale > 0 and seconds > 0:
+            await asyncio.sleep(seconds * self.latency_scale)
+
+    async def call(self, kind: str, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run (record) or answer (replay) a call that returns one result."""
+        if self.mode == REPLAY:
+            record = self._next(kind, key)
+            await self._delay(record["latency"])
+            if "error" in record:
+                raise _recorded_error(record)
+            return record["result"]
+
+        start = time.perf_counter()
+        try:
+            result = await factory()
+        except Exception as e:
+            self._append({"kind": kind, "key": key, "latency": round(time.perf_counter() - start, 4),
+                          **_error_fields(e)})
+            raise
+        self._append({"kind": kind, "key": key, "latency": round(time.perf_counter() - start, 4),
+                      "result": _plain(result)})
+        return result
+
+    async def stream(self, kind: str, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Run (record) or answer (replay) a streamed call.
+
+        Chunks are recorded as text with their arrival time; a stream the
+        consumer stops early is recorded up to where it stopped, and one that
+        fails is recorded with its error.
+        """
+        if self.mode == REPLAY:
+            record = self._next(kind, key)
+            elapsed = 0.0
+            for offset, text in record["chunks"]:
+                await self._delay(offset - elapsed)
+                elapsed = offset
+                yield text
+            if "error" in record:
+                raise _recorded_error(record)
+            return
+
+        start = time.perf_counter()
+        chunks: List[list] = []
+        failure: Dict[str, Any] = {}
+        source = factory()
+        try:
+            async for chunk in source:
+                for item in chunk if isinstance(chunk, list) else [chunk]:
+                    if item is not None:
+                        chunks.append([round(time.perf_counter() - start, 4), str(item)])
+                yield chunk
+        except Exception as e:
+            failure = _error_fields(e)
+            raise
+        finally:
+            if hasattr(source, "aclose"):
+                await source.aclose()
+            self._append({"kind": kind, "key": key, "latency": round(time.perf_counter() - start, 4),
+                          "chunks": chunks, **failure})
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"path": self.path, "mode": self.mode, **self.metrics}
+
+
+_cassette: Optional[Cassette] = None
+_cassette_config: Optional[tuple] = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Get the cassette configured by AGENT_CASSETTE / AGENT_CASSETTE_MODE /
+    AGENT_CASSETTE_LATENCY, or None when record/replay is off.
+    """
+    global _cassette, _cassette_config
+    path = os.environ.get("AGENT_CASSETTE")
+    mode = os.environ.get("AGENT_CASSETTE_MODE", REPLAY).lower()
+    config = (path, mode, os.environ.get("AGENT_CASSETTE_LATENCY", "0"))
+    if not path or mode in ("", "off"):
+        return None
+    if config != _cassette_config:
+        _cassette = Cassette(path, mode, env_float("AGENT_CASSETTE_LATENCY", 0.0, inclusive=True))
+        _cassette_config = config
+    return _cassette
+
+
+def replayable_stream(kind: str, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+    """The stream from ``factory()``, recorded or replayed when a cassette is active."""
+    cassette = get_cassette()
+    if cassette is None:
+        return factory()
+    return cassette.stream(kind, key, factory)
+
+
+async def replayable_call(kind: str, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """The result of ``factory()``, recorded or replayed when a cassette is active."""
+    cassette = get_cassette()
+    if cassette is None:
+        return await factory()
+    return await cassette.call(kind, key, factory)
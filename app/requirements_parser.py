@@ -0,0 +1,272 @@
+# app/requirements_parser.py
+"""
+Deterministic fast-path extraction of travel requirements.
+
+Most requests name a destination, a date range and one of the cards in the
+card catalog. This module pulls those out with plain rules (destinations come
+from the offline gazetteer in app/geo.py) so the LLM extraction call is only
+needed when the rules are not confident.
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.geo import geocode, get_geo_index
+from app.tools.card_catalog import CARD_CATALOG
+
+# Confidence at or above which the fast-path result is used without the LLM
+DEFAULT_CONFIDENCE_THRESHOLD = 0.8
+
+# Place names that are also common English words only count when capitalized
+COMMON_WORD_PLACES = {"nice", "split", "male", "rio", "reading", "bath", "mobile"}
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3,
+    "apr": 4, "april": 4, "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7,
+    "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9,
+    "oct": 10, "october": 10, "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+
+_MONTH = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s*(\d{4}))?"
+_RANGE = r"\s*(?:-|–|to|until|through|thru)\s*"
+
+ISO_RANGE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})" + _RANGE + r"(\d{4}-\d{2}-\d{2})")
+# "June 1-8", "June 1 to June 8, 2026", "June 28 - July 3"
+MONTH_DAY_PATTERN = re.compile(
+    _MONTH + r"\s+" + _DAY + _YEAR + _RANGE + r"(?:" + _MONTH + r"\s+)?" + _DAY + _YEAR + r"\b"
+)
+# "1-8 June", "28 June to 3 July 2026"
+DAY_MONTH_PATTERN = re.compile(
+    r"\b" + _DAY + r"(?:\s+" + _MONTH + r")?" + _RANGE + _DAY + r"\s+" + _MONTH + _YEAR + r"\b"
+)
+
+_DESTINATION_CUES = {"to", "visit", "visiting", "in", "at", "for"}
+
+
+@dataclass
+class ParseResult:
+    """
+    Outcome of a fast-path parse.
+    """
+    requirements: Dict[str, str]
+    confidence: float
+    matched: List[str] = field(default_factory=list)
+
+    def is_confident(self, threshold: float = DEFAULT_CONFIDENCE_THRESHOLD) -> bool:
+        return self.confidence >= threshold
+
+
+class FastPathStats:
+    """Counts how often the fast path answered without the LLM."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            self.metrics["attempts"] += 1
+            self.metrics["hits" if hit else "fallbacks"] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get attempt/hit/fallback counts and the hit rate."""
+        metrics: Dict[str, Any] = dict(self.metrics)
+        attempts = metrics["attempts"]
+        metrics["hit_rate"] = metrics["hits"] / attempts if attempts else 0.0
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {"attempts": 0, "hits": 0, "fallbacks": 0}
+
+
+fast_path_stats = FastPathStats()
+
+
+def _resolve_year(month: int, day: int, year: Optional[str], today: date) -> date:
+    """Use the explicit year, or the next occurrence of month/day after today."""
+    if year:
+        return date(int(year), month, day)
+    candidate = date(today.year, month, day)
+    if candidate < today:
+        candidate = date(today.year + 1, month, day)
+    return candidate
+
+
+def parse_date_range(text: str, today: Optional[date] = None) -> Optional[Tuple[date, date]]:
+    """
+    Find a travel date range in free text.
+
+    Supports ISO ranges ("2026-06-01 to 2026-06-08") and month-name ranges
+    ("June 1-8", "June 28 - July 3, 2026", "1-8 June"). Dates without a year
+    resolve to their next occurrence.
+
+    Returns:
+        (start, end) dates, or None if no valid range was found
+    """
+    today = today or date.today()
+    lowered = text.lower()
+
+    try:
+        match = ISO_RANGE_PATTERN.search(lowered)
+        if match:
+            start = date.fromisoformat(match.group(1))
+            end = date.fromisoformat(match.group(2))
+            return (start, end) if start <= end else None
+
+        match = MONTH_DAY_PATTERN.search(lowered)
+        if match:
+            month1, day1, year1, month2, day2, year2 = match.groups()
+            start_month = MONTHS[month1]
+            end_month = MONTHS[month2] if month2 else start_month
+            year = year1 or year2
+            start = _resolve_year(start_month, int(day1), year, today)
+            end = date(start.year, end_month, int(day2))
+            if end < start:
+                end = date(start.year + 1, end_month, int(day2))
+            return start, end
+
+        match = DAY_MONTH_PATTERN.search(lowered)
+        if match:
+            day1, month1, day2, month2, year = match.groups()
+            end_month = MONTHS[month2]
+            start_month = MONTHS[month1] if month1 else end_month
+            start = _resolve_year(start_month, int(day1), year, today)
+            end = date(start.year, end_month, int(day2))
+            if end < start:
+                end = date(start.year + 1, end_month, int(day2))
+            return start, end
+    except ValueError:
+        # Impossible calendar dates such as "June 31"
+        return None
+
+    return None
+
+
+def find_destination(text: str) -> Tuple[Optional[str], bool]:
+    """
+    Look up city names from the offline gazetteer in free text.
+
+    Returns:
+        (destination, ambiguous) - ambiguous is True when several places are
+        mentioned and none is clearly the target (e.g. "to Paris")
+    """
+    index = get_geo_index()
+    tokens = re.findall(r"[^\W\d_]+", text)
+    words = [token.lower() for token in tokens]
+    found: List[Tuple[str, bool]] = []
+    i = 0
+    while i < len(words):
+        for size in (4, 3, 2, 1):
+            if i + size > len(words):
+                continue
+            key = " ".join(words[i:i + size])
+            if size == 1 and (len(key) <= 2 or key in COMMON_WORD_PLACES) and not tokens[i][0].isupper():
+                continue
+            place = index.lookup(key)
+            if place and place.kind == "city":
+                cued = i > 0 and words[i - 1] in _DESTINATION_CUES
+                found.append((place.name, cued))
+                i += size
+                break
+        else:
+            i += 1
+
+    names = {name for name, _ in found}
+    if not names:
+        return None, False
+    if len(names) == 1:
+        return found[0][0], False
+
+    cued = {name for name, is_cued in found if is_cued}
+    if len(cued) == 1:
+        return cued.pop(), False
+    return None, True
+
+
+def get_destination_details(destination: str) -> Optional[Tuple[float, float, str]]:
+    """
+    Get (latitude, longitude, currency) for a destination name, if known.
+
+    Accepts names, aliases and airport codes in any case, including
+    LLM-extracted values such as "Paris, France".
+    """
+    if not destination:
+        return None
+    place = geocode(destination)
+    return (place.lat, place.lon, place.currency) if place else None
+
+
+def find_card(text: str) -> Tuple[Optional[str], bool]:
+    """
+    Match card names from the card catalog.
+
+    A card matches a whole word ("BankGold") or consecutive words that
+    together spell its name ("bank gold", "Bank-Gold"), never part of a
+    longer word, so "BankGoldPlus" is not read as BankGold (it still counts
+    as a card mention, for the LLM to read).
+
+    Returns:
+        (card, mentioned) - mentioned is True when the text talks about a card
+        at all, so an unmatched mention can be told apart from no card
+    """
+    names = {card_name.lower(): card_name for card_name in CARD_CATALOG}
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    for start in range(len(words)):
+        joined = ""
+        for word in words[start:]:
+            joined += word
+            if joined in names:
+                return names[joined], True
+            if not any(name.startswith(joined) for name in names):
+                break
+    squashed = "".join(words)
+    mentioned = any(name in squashed for name in names) or bool(
+        re.search(r"\bcard\b|\bvisa\b|\bmastercard\b|\bamex\b", text.lower())
+    )
+    return None, mentioned
+
+
+def parse_requirements(text: str, today: Optional[date] = None) -> ParseResult:
+    """
+    Extract destination, dates and card without calling the LLM.
+
+    Confidence is the weighted share of fields resolved unambiguously:
+    destination 0.4, dates 0.4 and card 0.2 (a request that never mentions a
+    card resolves to "Unknown", matching the LLM extraction default). A card
+    mention that matches no catalog card costs the card's weight instead, so
+    the request is never confident and the LLM gets to read the card.
+    """
+    requirements: Dict[str, str] = {}
+    matched: List[str] = []
+    confidence = 0.0
+
+    destination, ambiguous = find_destination(text)
+    if destination and not ambiguous:
+        requirements["destination"] = destination
+        matched.append("destination")
+        confidence += 0.4
+
+    date_range = parse_date_range(text, today)
+    if date_range:
+        start, end = date_range
+        requirements["dates"] = f"{start.isoformat()} to {end.isoformat()}"
+        matched.append("dates")
+        confidence += 0.4
+
+    card, mentioned = find_card(text)
+    if card:
+        requirements["card"] = card
+        matched.append("card")
+        confidence += 0.2
+    elif not mentioned:
+        requirements["card"] = "Unknown"
+        confidence += 0.2
+    else:
+        confidence = max(0.0, confidence - 0.2)
+
+    return ParseResult(requirements=requirements, confidence=round(confidence, 2), matched=matched)
@@ -0,0 +1,156 @@
+# app/response_cache.py
+"""
+Cache of finished trip plans keyed by the extracted requirements.
+
+Two requests that resolve to the same destination, date range and card get
+the same plan, however they were phrased ("Paris June 1-8 with BankGold" and
+"BankGold trip to paris, jun 1st - 8th"). A cached plan lives only as long as
+its most volatile section: weather goes stale within the hour, card benefits
+hardly ever change.
+"""
+
+import json
+import logging
+import os
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from app.cache import LRUCache, normalize_query
+from app.geo import geocode
+from app.requirements_parser import parse_date_range
+from app.utils.env import env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAN_CACHE_SIZE = 128
+
+# Seconds each TripPlan section stays fresh
+SECTION_TTLS: Dict[str, float] = {
+    "weather": 30 * 60,
+    "currency_info": 60 * 60,
+    "results": 6 * 60 * 60,
+    "citations": 6 * 60 * 60,
+    "card_recommendation": 24 * 60 * 60,
+}
+
+# Plans without any of the sections above still contain model output
+DEFAULT_PLAN_TTL = SECTION_TTLS["weather"]
+
+
+def plan_cache_enabled() -> bool:
+    """The plan cache is on unless AGENT_PLAN_CACHE is 0/false."""
+    return os.environ.get("AGENT_PLAN_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+def _is_unknown(value: Any) -> bool:
+    return not value or str(value).strip().lower() == "unknown"
+
+
+def plan_cache_key(requirements: Dict[str, Any], today: Optional[date] = None) -> Optional[Tuple[str, str, str]]:
+    """
+    Normalize requirements into a cache key.
+
+    The destination is resolved through the gazetteer (so "NYC" and
+    "New York" match) and dates are reduced to an ISO range when they parse.
+
+    Returns:
+        (destination, dates, card), or None when the destination or dates
+        are unknown and the plan should not be cached
+    """
+    destination = requirements.get("destination")
+    dates = requirements.get("dates")
+    if _is_unknown(destination) or _is_unknown(dates):
+        return None
+
+    place = geocode(str(destination))
+    destination_key = place.name.lower() if place else normalize_query(destination)
+
+    date_range = parse_date_range(str(dates), today)
+    dates_key = f"{date_range[0].isoformat()}/{date_range[1].isoformat()}" if date_range else normalize_query(dates)
+
+    card = requirements.get("card")
+    card_key = "unknown" if _is_unknown(card) else normalize_query(card).replace(" ", "")
+    return destination_key, dates_key, card_key
+
+
+def plan_ttl(output: str) -> Optional[float]:
+    """
+    TTL for a planning result: the shortest TTL of the sections it contains.
+
+    Returns:
+        Seconds to keep the result, or None if it is an error, not a plan or
+        a partial plan
+    """
+    try:
+        data = json.loads(output)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict) or "error" in data or data.get("partial") or not isinstance(data.get("plan"), dict):
+        return None
+
+    plan = data["plan"]
+    ttls = [ttl for section, ttl in SECTION_TTLS.items() if plan.get(section)]
+    return min(ttls) if ttls else DEFAULT_PLAN_TTL
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of TripPlan JSON strings with per-plan TTLs.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_PLAN_CACHE_SIZE):
+        self._cache = LRUCache(max_size=max_size)
+        self.skipped = 0
+
+    def get(self, requirements: Dict[str, Any]) -> Optional[str]:
+        """Get the cached plan for these requirements, if any."""
+        if not plan_cache_enabled():
+            return None
+        key = plan_cache_key(requirements)
+        if key is None:
+            return None
+        plan = self._cache.get(key)
+        if plan is not None:
+            logger.debug(f"Plan cache hit for {key}")
+        return plan
+
+    def put(self, requirements: Dict[str, Any], output: str) -> bool:
+        """
+        Cache a planning result if it is a plan for fully known requirements.
+
+        Returns:
+            True if the result was cached
+        """
+        if not plan_cache_enabled():
+            return False
+        key = plan_cache_key(requirements)
+        ttl = plan_ttl(output) if key is not None else None
+        if ttl is None:
+            self.skipped += 1
+            return False
+        self._cache.set(key, output, ttl=ttl)
+        return True
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction metrics and the number of uncacheable results."""
+        metrics = self._cache.get_metrics()
+        metrics["skipped"] = self.skipped
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self._cache.reset_metrics()
+        self.skipped = 0
+
+
+def get_plan_cache_size() -> int:
+    """Read the plan cache size from PLAN_CACHE_SIZE."""
+    return env_int("PLAN_CACHE_SIZE", DEFAULT_PLAN_CACHE_SIZE)
+
+
+response_cache = ResponseCache(max_size=get_plan_cache_size())
@@ -0,0 +1,532 @@
+"""
+End-to-end throughput and latency benchmarks of the agent.
+
+Each scenario is driven against local stand-ins instead of Azure: the mock
+Azure OpenAI server (``app.mock_openai``) for chat and embeddings, a
+forecast endpoint for the weather tool and an in-memory Cosmos container for
+knowledge retrieval and long-term memory. The stand-ins run on their own
+event loop in a background thread, so blocking calls in the agent cannot stall them.
+
+Scenarios:
+    run_request        ``run_request_async`` on varied queries (fast-path and LLM extraction)
+    retrieve           ``app.rag.retriever.retrieve`` (embedding + vector search)
+    short_term_memory  ``ShortTermMemory`` turns, context window and search with eviction
+    long_term_memory   ``LongTermMemory`` store and recall
+    memory_pruning     Hybrid pruning of a long-term memory store filled past its limit
+    tools              Weather, FX, card and geocoding tool calls
+
+For each scenario the script reports throughput, p50/p95/p99 latency, the
+peak and retained Python allocations (tracemalloc, measured in a second
+pass so tracing does not skew latencies) and the peak RSS of the process.
+Results are written as JSON; ``--compare`` checks them against an earlier
+run and exits with status 1 when p95 latency or throughput regressed by more
+than ``--threshold``.
+
+Usage:
+    python app/scripts/benchmark.py
+    python app/scripts/benchmark.py --scenarios run_request retrieve --iterations 200 --concurrency 16
+    python app/scripts/benchmark.py --chat-latency lognormal:0.3:0.4 --compare benchmark-results/baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+from unittest.mock import patch
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Add project root to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+
+from app.mock_openai import LatencyModel, MockOpenAIService, MockSettings, embed
+from app.utils.http_server import AsyncHttpServer, HttpRequest, HttpResponse, json_response
+
+DEFAULT_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "benchmark-results")
+DEFAULT_THRESHOLD = 0.10
+EMBEDDING_DIM = 256
+KNOWLEDGE_DOCUMENTS = 200
+MEMORY_LIMIT = 500
+MEMORY_OVERFILL = 250
+
+DESTINATIONS = ("Paris", "Tokyo", "London", "Rome", "Sydney", "Toronto")
+CARDS = ("BankGold", "Unknown")
+# Metrics compared run-over-run, and whether higher is better
+COMPARED_METRICS = {"throughput": True, "p95_ms": False, "p99_ms": False}
+
+
+def query_for(index: int) -> str:
+    """A distinct request per index; every third one needs the LLM extraction."""
+    destination = DESTINATIONS[index % len(DESTINATIONS)]
+    day = 1 + index // len(DESTINATIONS) % 20
+    if index % 3 == 2:
+        return f"I want to go to {destination} sometime around day {day} of the summer"
+    card = CARDS[index % len(CARDS)]
+    return f"{destination} from June {day} to June {day + 6} with {card}"
+
+
+# ---------------------------------------------------------------------------
+# Stand-ins
+# ---------------------------------------------------------------------------
+
+async def forecast_stand_in(request: HttpRequest) -> HttpResponse:
+    """Open-Meteo ``/v1/forecast`` answered with deterministic forecasts (one per coordinate)."""
+    latitudes = [float(value) for value in request.query.get("latitude", ["0"])[0].split(",")]
+    start = date.fromisoformat(request.query.get("start_date", ["2026-06-01"])[0])
+    if "end_date" in request.query:
+        days = (date.fromisoformat(request.query["end_date"][0]) - start).days + 1
+    else:
+        days = int(request.query.get("forecast_days", ["7"])[0])
+
+    def forecast(latitude: float) -> Dict[str, Any]:
+        base = 25 - abs(latitude) / 3
+        return {"daily": {
+            "time": [(start + timedelta(days=day)).isoformat() for day in range(days)],
+            "temperature_2m_max": [round(base + day % 4, 1) for day in range(days)],
+            "temperature_2m_min": [round(base - 8 + day % 3, 1) for day in range(days)],
+            "weathercode": [(1, 2, 3, 61)[day % 4] for day in range(days)],
+        }}
+
+    forecasts = [forecast(latitude) for latitude in latitudes]
+    return json_response(forecasts if len(forecasts) > 1 else forecasts[0])
+
+
+class InMemoryContainer:
+    """
+    Cosmos container stand-in for the query shapes the agent issues:
+    vector search (``@embedding``, ``@top_k``), memories by ``@session_id``
+    and, with no parameters, every memory (as pruning reads them).
+    """
+
+    def __init__(self):
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def upsert_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.items[item["id"]] = dict(item)
+        return item
+
+    def query_items(self, query: str, parameters: Optional[List[Dict[str, Any]]] = None,
+                    enable_cross_partition_query: bool = False) -> Iterator[Dict[str, Any]]:
+        params = {param["name"]: param["value"] for param in parameters or []}
+        with self._lock:
+            items = list(self.items.values())
+        if "@embedding" in params:
+            vector = params["@embedding"]
+            scored = [
+                {"content": item["content"], "source": item["source"],
+                 "score": sum(a * b for a, b in zip(vector, item["vector"]))}
+                for item in items if "vector" in item
+            ]
+            scored.sort(key=lambda item: item["score"], reverse=True)
+            return iter(scored[:params.get("@top_k", 3)])
+        if "@session_id" not in params:
+            return iter([item for item in items if "session_id" in item])
+        session_id = params["@session_id"]
+        return iter([item for item in items if item.get("session_id") == session_id and item.get("pk") == "memory"])
+
+    def delete_item(self, item: str, partition_key: Any = None) -> None:
+        with self._lock:
+            del self.items[item]
+
+
+class InMemoryCosmosClient:
+    """``CosmosClient`` stand-in whose databases all share one container."""
+
+    container = InMemoryContainer()
+
+    def __init__(self, url: Optional[str] = None, credential: Any = None, **kwargs: Any):
+        pass
+
+    def get_database_client(self, name: Optional[str]) -> "InMemoryCosmosClient":
+        return self
+
+    def get_container_client(self, name: Optional[str]) -> InMemoryContainer:
+        return self.container
+
+
+def seed_knowledge(container: InMemoryContainer, count: int = KNOWLEDGE_DOCUMENTS) -> None:
+    """Fill the container with knowledge snippets embedded like the mock server embeds queries."""
+    for index in range(count):
+        destination = DESTINATIONS[index % len(DESTINATIONS)]
+        content = f"{CARDS[0]} card note {index}: lounge access and no FX fee when travelling to {destination}"
+        container.upsert_item({
+            "id": f"kb-{index}",
+            "content": content,
+            "source": f"kb/{destination.lower()}.md",
+            "vector": embed(content, EMBEDDING_DIM),
+        })
+
+
+class StandIns:
+    """
+    Mock Azure OpenAI and forecast servers on a background event loop, and
+    the environment and Cosmos client that point the agent at them.
+    """
+
+    def __init__(self, settings: MockSettings):
+        self.service = MockOpenAIService(settings)
+        self.loop = asyncio.new_event_loop()
+        self.server = AsyncHttpServer(self._handle, "127.0.0.1", 0)
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._stack = contextlib.ExitStack()
+
+    async def _handle(self, request: HttpRequest) -> HttpResponse:
+        if request.path == "/v1/forecast":
+            return await forecast_stand_in(request)
+        return await self.service.handle(request)
+
+    def __enter__(self) -> "StandIns":
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result()
+        base_url = f"http://127.0.0.1:{self.server.port}"
+        self._stack.enter_context(patch.dict(os.environ, {
+            "AZURE_OPENAI_BASE_URL": f"{base_url}/openai",
+            "AZURE_OPENAI_KEY": "mock",
+            "AZURE_OPENAI_CHAT_DEPLOYMENT": "mock-chat",
+            "AZURE_OPENAI_EMBED_DEPLOYMENT": "mock-embedding",
+            "OPEN_METEO_URL": f"{base_url}/v1/forecast",
+            "AGENT_PLAN_CACHE": "0",
+        }))
+        self._stack.enter_context(patch("app.rag.retriever.CosmosClient", InMemoryCosmosClient))
+        self._stack.enter_context(patch("app.long_term_memory.core.CosmosClient", InMemoryCosmosClient))
+        seed_knowledge(InMemoryCosmosClient.container)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stack.close()
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+Operation = Callable[[int], Awaitable[Any]]
+
+
+async def run_request_scenario() -> Operation:
+    from app.main import requirements_cache, run_request_async
+
+    async def operation(index: int) -> None:
+        requirements_cache.clear()
+        output = json.loads(await run_request_async(query_for(index)))
+        if "error" in output:
+            raise RuntimeError(output["error"])
+    return operation
+
+
+async def retrieve_scenario() -> Operation:
+    from semantic_kernel import Kernel
+    from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding
+    from app.rag.retriever import retrieve
+
+    kernel = Kernel()
+    kernel.add_service(AzureTextEmbedding(
+        service_id="embedding",
+        deployment_name=os.environ["AZURE_OPENAI_EMBED_DEPLOYMENT"],
+        base_url=os.environ["AZURE_OPENAI_BASE_URL"],
+        api_key=os.environ["AZURE_OPENAI_KEY"],
+    ))
+
+    async def operation(index: int) -> None:
+        destination = DESTINATIONS[index % len(DESTINATIONS)]
+        await retrieve(kernel, f"card benefits for travel to {destination} #{index}", top_k=3)
+    return operation
+
+
+async def short_term_memory_scenario() -> Operation:
+    from app.memory import ShortTermMemory
+
+    memory = ShortTermMemory(max_items=50, max_tokens=4000)
+
+    async def operation(index: int) -> None:
+        destination = DESTINATIONS[index % len(DESTINATIONS)]
+        memory.add_conversation("user", query_for(index))
+        memory.add_tool_call("get_weather", {"place": destination}, {"max_temp": 21, "code": 2})
+        memory.add_conversation("assistant", f"Here is your plan for {destination} " * 5)
+        memory.get_context_window(max_tokens=1500)
+        memory.search_memory(destination)
+    return operation
+
+
+async def long_term_memory_scenario() -> Operation:
+    from app.long_term_memory import LongTermMemory
+
+    memory = LongTermMemory()
+
+    async def operation(index: int) -> None:
+        session_id = f"session-{index % 20}"
+        memory.add_memory(session_id, f"Preferred destination: {DESTINATIONS[index % len(DESTINATIONS)]}",
+                          importance_score=(index % 10) / 10)
+        memory.get_memory(session_id)
+    return operation
+
+
+async def memory_pruning_scenario() -> Operation:
+    from app.rag.long_term_memory.models import MemoryItem
+    from app.rag.long_term_memory.pruning import prune_hybrid
+
+    now = datetime.utcnow()
+    filled: Dict[str, Dict[str, Any]] = {}
+    for index in range(MEMORY_LIMIT + MEMORY_OVERFILL):
+        created = now - timedelta(days=index % 400)
+        item = MemoryItem(
+            id=f"memory-{index}", session_id=f"session-{index % 20}",
+            content=f"Preferred destination: {DESTINATIONS[index % len(DESTINATIONS)]}",
+            memory_type="preference", importance_score=(index % 10) / 10, access_count=index % 12,
+            last_accessed=created, created_at=created, tags=[], metadata={},
+        )
+        filled[item.id] = item.to_dict()
+
+    async def operation(index: int) -> None:
+        # Copying the filled store is cheap next to scoring and sorting it
+        container = InMemoryContainer()
+        container.items = dict(filled)
+        pruned = prune_hybrid(container, MEMORY_LIMIT)
+        if pruned != MEMORY_OVERFILL or len(container.items) != MEMORY_LIMIT:
+            raise RuntimeError(f"Pruned {pruned} memories, expected {MEMORY_OVERFILL}")
+    return operation
+
+
+async def tools_scenario() -> Operation:
+    from app.tools.card import CardTools
+    from app.tools.fx import FxTools
+    from app.tools.geo import GeoTools
+    from app.tools.weather import WeatherTools
+
+    weather, fx, card, geo = WeatherTools(), FxTools(), CardTools(), GeoTools()
+
+    async def operation(index: int) -> None:
+        destination = DESTINATIONS[index % len(DESTINATIONS)]
+        location = json.loads(geo.geocode(destination))
+        forecast = json.loads(await weather.get_weather(location["lat"], location["lon"]))
+        if "error" in forecast:
+            raise RuntimeError(forecast["error"])
+        fx.convert_fx(100.0, "USD", "EUR")
+        card.get_card_recommendation(CARDS[0])
+    return operation
+
+
+SCENARIOS: Dict[str, Callable[[], Awaitable[Operation]]] = {
+    "run_request": run_request_scenario,
+    "retrieve": retrieve_scenario,
+    "short_term_memory": short_term_memory_scenario,
+    "long_term_memory": long_term_memory_scenario,
+    "memory_pruning": memory_pruning_scenario,
+    "tools": tools_scenario,
+}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+@dataclass
+class RunConfig:
+    iterations: int = 50
+    concurrency: int = 8
+    warmup: int = 3
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of unsorted samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def drive(operation: Operation, iterations: int, concurrency: int, offset: int = 0) -> Dict[str, Any]:
+    """Run ``operation`` ``iterations`` times, at most ``concurrency`` at once."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await operation(offset + index)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(iterations)))
+    return {"wall": time.perf_counter() - start, "latencies": latencies, "errors": errors}
+
+
+async def benchmark(name: str, config: RunConfig, trace_allocations: bool = True) -> Dict[str, Any]:
+    """Warm up, time ``config.iterations`` operations, then repeat them under tracemalloc."""
+    operation = await SCENARIOS[name]()
+    await drive(operation, config.warmup, 1, offset=-config.warmup)
+
+    timed = await drive(operation, config.iterations, config.concurrency)
+    latencies = timed["latencies"]
+    report: Dict[str, Any] = {
+        "iterations": config.iterations,
+        "concurrency": config.concurrency,
+        "errors": len(timed["errors"]),
+        "throughput": len(latencies) / timed["wall"] if timed["wall"] else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+    }
+    if timed["errors"]:
+        report["first_error"] = timed["errors"][0]
+
+    if trace_allocations:
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        await drive(operation, config.iterations, config.concurrency, offset=config.iterations)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["alloc_peak_kb"] = (peak - baseline) / 1024
+        report["alloc_retained_kb"] = (current - baseline) / 1024
+    report["rss_peak_mb"] = peak_rss_mb()
+    return report
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Regressions of ``current`` against ``baseline`` beyond ``threshold`` (a fraction)."""
+    regressions = []
+    for name, report in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = previous.get(metric), report.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{name}.{metric}: {before:.2f} -> {after:.2f} ({change:+.0%})")
+    return regressions
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print(f"\n📊 Benchmarks at {results['commit'] or 'unknown commit'} ({results['timestamp']})")
+    print(f"   {'scenario':<18} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'alloc KB':>10} {'RSS MB':>8} {'errors':>6}")
+    for name, report in results["scenarios"].items():
+        alloc = report.get("alloc_peak_kb")
+        rss = report.get("rss_peak_mb")
+        print(f"   {name:<18} {report['throughput']:9.1f} {report['p50_ms']:9.2f} {report['p95_ms']:9.2f} "
+              f"{report['p99_ms']:9.2f} {alloc if alloc is not None else float('nan'):10.1f} "
+              f"{rss if rss is not None else float('nan'):8.1f} {report['errors']:6d}")
+        if report.get("first_error"):
+            print(f"     ⚠️  {report['first_error']}")
+
+
+async def run_benchmarks(names: List[str], config: RunConfig, trace_allocations: bool) -> Dict[str, Any]:
+    scenarios = {}
+    for name in names:
+        scenarios[name] = await benchmark(name, config, trace_allocations)
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent against local stand-ins")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=50, help="Timed operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Operations in flight at once")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed operations before measuring")
+    parser.add_argument("--chat-latency", default="lognormal:0.05:0.3", help="Mock time to first token")
+    parser.add_argument("--token-interval", default="0", help="Mock time between streamed tokens")
+    parser.add_argument("--embedding-latency", default="uniform:0.005:0.015", help="Mock embedding latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of mock requests that fail")
+    parser.add_argument("--seed", type=int, default=7, help="Seed of the mock latencies")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip the allocation pass")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmark-results/<time>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change in p95/p99 or throughput counted as a regression")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        chat_latency=LatencyModel(args.chat_latency),
+        token_interval=LatencyModel(args.token_interval),
+        embedding_latency=LatencyModel(args.embedding_latency),
+        error_rate=args.error_rate,
+        embedding_dim=EMBEDDING_DIM,
+        seed=args.seed,
+    )
+    config = RunConfig(max(1, args.iterations), max(1, args.concurrency), max(0, args.warmup))
+    with StandIns(settings) as stand_ins:
+        scenarios = asyncio.run(run_benchmarks(args.scenarios, config, not args.no_tracemalloc))
+        mock_metrics = stand_ins.service.get_metrics()
+
+    timestamp = datetime.now()
+    results = {
+        "timestamp": timestamp.isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "mock": mock_metrics,
+        "scenarios": scenarios,
+    }
+    print_report(results)
+
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, f"{timestamp:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Regressions against {args.compare} (threshold {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
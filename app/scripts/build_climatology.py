@@ -0,0 +1,24 @@
+"""
+Rebuild the climatology table (app/data/climatology.bin) from app/data/climate_normals.csv.
+
+Run after editing climate_normals.csv:
+    python app/scripts/build_climatology.py
+"""
+
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.climate import DEFAULT_SOURCE_PATH, DEFAULT_TABLE_PATH, build_table
+
+
+def main():
+    count = build_table(DEFAULT_SOURCE_PATH, DEFAULT_TABLE_PATH)
+    size = os.path.getsize(DEFAULT_TABLE_PATH)
+    print(f"✅ Wrote {count} cells ({size / 1024:.1f} KiB) to {DEFAULT_TABLE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
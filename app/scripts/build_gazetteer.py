@@ -0,0 +1,24 @@
+"""
+Rebuild the offline geocoding index (app/data/gazetteer.tsv) from app/data/places.csv.
+
+Run after editing places.csv:
+    python app/scripts/build_gazetteer.py
+"""
+
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.geo import DEFAULT_INDEX_PATH, DEFAULT_SOURCE_PATH, build_index
+
+
+def main():
+    count = build_index(DEFAULT_SOURCE_PATH, DEFAULT_INDEX_PATH)
+    size = os.path.getsize(DEFAULT_INDEX_PATH)
+    print(f"✅ Wrote {count} keys ({size / 1024:.1f} KiB) to {DEFAULT_INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Measure cold-start import time of the agent entry points.
+
+Each entry point is imported in a fresh interpreter with ``python -X importtime``;
+the script reports wall time, the import time of the module itself, the
+heaviest packages and modules it pulled in, and which heavy SDKs were
+imported eagerly (they should load on first use instead). It exits with
+status 1 when the median import time is over the budget.
+
+Usage:
+    python app/scripts/startup_benchmark.py
+    python app/scripts/startup_benchmark.py --runs 10 --top 15 --budget-ms 300 app.main
+    python app/scripts/startup_benchmark.py --json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+
+from app.utils.env import env_float
+
+ENTRY_POINTS = ("app.main", "app.server")
+# SDKs that entry points must not import until they are needed
+DEFERRED_MODULES = (
+    "semantic_kernel", "openai", "azure.ai.projects", "azure.identity", "azure.cosmos", "tiktoken", "requests",
+)
+DEFAULT_BUDGET_MS = env_float("STARTUP_BUDGET_MS", 300.0)
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+@dataclass
+class ImportRecord:
+    """One line of ``-X importtime`` output (times in microseconds)."""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Parse ``python -X importtime`` stderr, skipping the header and any other output."""
+    records = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append(ImportRecord(name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def by_package(records: List[ImportRecord]) -> Dict[str, int]:
+    """Self import time summed per top-level package, largest first."""
+    totals: Dict[str, int] = {}
+    for record in records:
+        package = record.name.split(".")[0]
+        totals[package] = totals.get(package, 0) + record.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def measure(module: str) -> Dict[str, Any]:
+    """Import ``module`` once in a fresh interpreter."""
+    probe = f"import sys, {module}; print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    records = parse_importtime(result.stderr)
+    own = next((r for r in records if r.name == module), None)
+    return {
+        "wall_ms": wall * 1000,
+        "import_ms": (own.cumulative_us if own else sum(r.self_us for r in records)) / 1000,
+        "records": records,
+        "eager_sdks": result.stdout.split(),
+    }
+
+
+def benchmark(module: str, runs: int, top: int) -> Dict[str, Any]:
+    """Import ``module`` ``runs`` times; breakdowns come from the median run."""
+    samples = [measure(module) for _ in range(runs)]
+    samples.sort(key=lambda sample: sample["import_ms"])
+    median = samples[len(samples) // 2]
+    records = median["records"]
+    return {
+        "module": module,
+        "runs": runs,
+        "import_ms": statistics.median(sample["import_ms"] for sample in samples),
+        "wall_ms": statistics.median(sample["wall_ms"] for sample in samples),
+        "modules_imported": len(records),
+        "packages_ms": {name: us / 1000 for name, us in list(by_package(records).items())[:top]},
+        "slowest_modules_ms": {
+            r.name: r.self_us / 1000 for r in sorted(records, key=lambda r: r.self_us, reverse=True)[:top]
+        },
+        "eager_sdks": median["eager_sdks"],
+    }
+
+
+def print_report(report: Dict[str, Any], budget_ms: float) -> None:
+    status = "✅" if report["import_ms"] <= budget_ms else "❌"
+    print(f"\n{status} {report['module']}: import {report['import_ms']:.0f} ms "
+          f"(budget {budget_ms:.0f} ms), process {report['wall_ms']:.0f} ms, "
+          f"{report['modules_imported']} modules, median of {report['runs']}")
+    print("   Packages (self time):")
+    for name, ms in report["packages_ms"].items():
+        print(f"     {ms:8.1f} ms  {name}")
+    print("   Slowest modules (self time):")
+    for name, ms in report["slowest_modules_ms"].items():
+        print(f"     {ms:8.1f} ms  {name}")
+    if report["eager_sdks"]:
+        print(f"   ⚠️  Imported eagerly: {', '.join(report['eager_sdks'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the agent entry points")
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS), help="Modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="Packages/modules to list")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Import time budget per module")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args()
+
+    reports = [benchmark(module, max(1, args.runs), args.top) for module in args.modules]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report, args.budget_ms)
+
+    over_budget = [report["module"] for report in reports if report["import_ms"] > args.budget_ms]
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
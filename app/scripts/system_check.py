@@ -108,13 +108,22 @@ def check_tools():
         from app.tools.knowledge import KnowledgeTools
         from app.tools.search import SearchTools
         from app.main import create_kernel
+        from app.http_client import http_client
         
         kernel = create_kernel()
         
-        weather = WeatherTools().get_weather(48.8566, 2.3522)
+        async def run_async_tools():
+            try:
+                weather = await WeatherTools().get_weather(48.8566, 2.3522)
+                knowledge = await KnowledgeTools(kernel).search_knowledge("BankGold dining")
+                return weather, knowledge
+            finally:
+                # Close the pooled connections while their event loop is still running
+                await http_client.aclose()
+        
+        weather, knowledge = asyncio.run(run_async_tools())
         fx = FxTools().convert_fx(100, "USD", "EUR")
         card = CardTools().recommend_card("5812", 100.0, "France")
-        knowledge = asyncio.run(KnowledgeTools(kernel).search_knowledge("BankGold dining"))
         search = SearchTools().web_search("test", max_results=1)
         print("✅ Weather, FX, Card, Knowledge, Search tools: Working")
         return True
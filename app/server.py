@@ -0,0 +1,216 @@
+# app/server.py
+"""
+Long-running HTTP service for trip planning.
+
+All requests share one event loop, so kernels from the kernel pool and the
+in-process caches are reused across requests. A semaphore caps how many
+plans run at once.
+
+Usage:
+    python -m app.server --port 8080 --max-concurrency 16
+
+    curl -X POST localhost:8080/plan -d '{"input": "Paris June 1-8 with BankGold"}'
+    curl -N -X POST 'localhost:8080/plan?stream=1' -d '{"input": "Paris June 1-8 with BankGold"}'
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.utils.http_server import AsyncHttpServer, HttpRequest, HttpResponse, json_response
+from app.utils.env import env_int
+from app.utils.logger import get_logger
+
+logger = get_logger("travel_agent")
+
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+def get_max_concurrency() -> int:
+    """Read the concurrency limit from AGENT_MAX_CONCURRENCY."""
+    return env_int("AGENT_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+
+
+class TripPlannerService:
+    """
+    Request handler for the planning service.
+
+    Routes:
+        POST /plan     {"input": "..."} -> TripPlan JSON
+        POST /plan?stream=1
+                       the same plan as newline-delimited JSON section events
+                       (see app.main.run_request_stream), sent in chunks as
+                       each section is ready
+        GET  /health   liveness check
+        GET  /metrics  service, kernel pool and cache metrics
+        GET  /traces   latency histogram and the most recent request traces
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.max_concurrency = max_concurrency or get_max_concurrency()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.metrics = {
+            "requests": 0,
+            "completed": 0,
+            "failed": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "total_latency": 0.0,
+        }
+
+    async def handle(self, request: HttpRequest) -> HttpResponse:
+        if request.path == "/health":
+            return json_response({"status": "ok"})
+        if request.path == "/metrics":
+            return json_response(self.get_metrics())
+        if request.path == "/traces":
+            return json_response(self.get_traces())
+        if request.path == "/plan":
+            if request.method != "POST":
+                return json_response({"error": "Use POST"}, 405)
+            return await self._plan(request)
+        return json_response({"error": f"Unknown path {request.path}"}, 404)
+
+    async def _plan(self, request: HttpRequest) -> HttpResponse:
+        try:
+            payload = request.json() or {}
+            user_input = str(payload.get("input", "")).strip()
+        except (ValueError, AttributeError):
+            return json_response({"error": "Body must be JSON with an 'input' field"}, 400)
+        if not user_input:
+            return json_response({"error": "Missing 'input'"}, 400)
+        if request.query.get("stream", ["0"])[-1].lower() in ("1", "true", "yes"):
+            return HttpResponse(headers={"Content-Type": "application/x-ndjson"},
+                                stream=self._plan_events(user_input))
+
+        from app.main import run_request_async
+
+        self.metrics["requests"] += 1
+        async with self._semaphore:
+            self.metrics["in_flight"] += 1
+            self.metrics["max_in_flight"] = max(self.metrics["max_in_flight"], self.metrics["in_flight"])
+            start = time.perf_counter()
+            try:
+                result = await run_request_async(user_input)
+            finally:
+                self.metrics["in_flight"] -= 1
+                self.metrics["total_latency"] += time.perf_counter() - start
+
+        failed = "error" in json.loads(result)
+        self.metrics["failed" if failed else "completed"] += 1
+        return json_response(result, 502 if failed else 200)
+
+    async def _plan_events(self, user_input: str) -> AsyncIterator[bytes]:
+        """Plan sections as NDJSON lines; the plan holds a concurrency slot while it streams."""
+        from app.main import run_request_stream
+
+        self.metrics["requests"] += 1
+        async with self._semaphore:
+            self.metrics["in_flight"] += 1
+            self.metrics["max_in_flight"] = max(self.metrics["max_in_flight"], self.metrics["in_flight"])
+            start = time.perf_counter()
+            outcome = None
+            try:
+                async with aclosing(run_request_stream(user_input)) as events:
+                    async for event in events:
+                        if event["section"] in ("plan", "error"):
+                            outcome = event["section"]
+                        yield (json.dumps(event) + "\n").encode("utf-8")
+            finally:
+                self.metrics["in_flight"] -= 1
+                self.metrics["total_latency"] += time.perf_counter() - start
+
+        self.metrics["failed" if outcome != "plan" else "completed"] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get service metrics together with kernel pool and cache metrics."""
+        from app.compaction import compaction_stats
+        from app.deadline import deadline_stats
+        from app.http_client import http_stats
+        from app.kernel_pool import get_kernel_pool
+        from app.main import requirements_cache
+        from app.replay import get_cassette
+        from app.requirements_parser import fast_path_stats
+        from app.response_cache import response_cache
+        from app.singleflight import plan_flights
+        from app.streaming import stream_stats
+        from app.speculation import speculation_stats
+        from app.token_budget import token_stats
+        from app.tools.weather import forecast_cache
+
+        metrics: Dict[str, Any] = dict(self.metrics)
+        finished = metrics["completed"] + metrics["failed"]
+        metrics["avg_latency"] = metrics["total_latency"] / finished if finished else 0.0
+        metrics["max_concurrency"] = self.max_concurrency
+        metrics["kernel_pool"] = get_kernel_pool().get_metrics()
+        metrics["requirements_cache"] = requirements_cache.get_metrics()
+        metrics["plan_cache"] = response_cache.get_metrics()
+        metrics["plan_flights"] = plan_flights.get_metrics()
+        metrics["fast_path"] = fast_path_stats.get_metrics()
+        metrics["speculation"] = speculation_stats.get_metrics()
+        metrics["streaming"] = stream_stats.get_metrics()
+        metrics["compaction"] = compaction_stats.get_metrics()
+        metrics["tokens"] = token_stats.get_metrics()
+        metrics["deadlines"] = deadline_stats.get_metrics()
+        metrics["http"] = http_stats.get_metrics()
+        metrics["forecast_cache"] = forecast_cache.get_metrics()
+        cassette = get_cassette()
+        if cassette is not None:
+            metrics["cassette"] = cassette.get_metrics()
+        return metrics
+
+    def get_traces(self) -> Dict[str, Any]:
+        """Get the span latency histogram and recent request traces (newest first)."""
+        from app.tracing import latency_histogram, recent_traces
+
+        return {
+            "histogram": latency_histogram.get_metrics(),
+            "recent": [trace.to_dict() for trace in reversed(recent_traces)],
+        }
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8080, max_concurrency: Optional[int] = None,
+                warm: bool = True) -> None:
+    """Run the planning service until cancelled."""
+    from app.kernel_pool import get_kernel_pool
+    from app.token_budget import preload_encoding
+
+    service = TripPlannerService(max_concurrency)
+    pool = get_kernel_pool()
+    if pool.size < service.max_concurrency:
+        logger.warning(
+            f"KERNEL_POOL_SIZE ({pool.size}) is below max_concurrency ({service.max_concurrency}); "
+            "requests will wait for kernels"
+        )
+    if warm:
+        built = pool.warm()
+        logger.info(f"Warmed {built} kernels")
+        await preload_encoding()
+
+    server = AsyncHttpServer(service.handle, host, port)
+    await server.start()
+    logger.info(f"Trip planner service ready (max_concurrency={service.max_concurrency})")
+    await server.serve_forever()
+
+
+def main():
+    """Command line entry point for the planning service."""
+    parser = argparse.ArgumentParser(description="Run the trip planner HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrency", type=int, default=None,
+                        help=f"Plans processed at once (default: AGENT_MAX_CONCURRENCY or {DEFAULT_MAX_CONCURRENCY})")
+    parser.add_argument("--no-warm", action="store_true", help="Build kernels lazily instead of at startup")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_concurrency, warm=not args.no_warm))
+    except KeyboardInterrupt:
+        logger.info("Trip planner service stopped")
+
+
+if __name__ == "__main__":
+    main()
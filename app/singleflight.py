@@ -0,0 +1,129 @@
+# app/singleflight.py
+"""
+Single-flight deduplication of concurrent identical work.
+
+While a computation for a key is running, later callers with the same key
+await that computation instead of starting their own, and all of them get
+its result (or its exception). Nothing is kept once it finishes; reuse
+across time is the job of the caches.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Group of in-flight computations keyed by a hashable key.
+
+    The shared computation runs as its own task and callers await it through
+    ``asyncio.shield``, so one caller being cancelled does not cancel it for
+    the others.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+        self.reset_metrics()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of computations currently running."""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``fn()`` for ``key`` unless an identical call is already running.
+
+        Args:
+            key: Deduplication key
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            The result of the shared computation
+        """
+        # Tasks belong to one event loop, so calls on other loops never join them
+        call_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            task = self._calls.get(call_key)
+            if task is None:
+                task = asyncio.create_task(fn())
+                self._calls[call_key] = task
+                task.add_done_callback(lambda done: self._forget(call_key, done))
+                self.metrics["leaders"] += 1
+            else:
+                self.metrics["followers"] += 1
+                logger.debug(f"Joining in-flight computation for {key}")
+        return await asyncio.shield(task)
+
+    async def do_many(self, keys: List[Hashable],
+                      fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]) -> Dict[Hashable, Any]:
+        """
+        ``do`` for several keys whose work is cheaper done together.
+
+        Keys already in flight are joined; the rest are computed by one
+        ``fn(keys)`` call, and each of them is in flight (for ``do`` and
+        ``do_many`` callers) until that call finishes.
+
+        Args:
+            keys: Deduplication keys
+            fn: Coroutine function taking the keys to compute and returning
+                a mapping of each of them to its result
+
+        Returns:
+            Mapping of every key to its result
+        """
+        loop = asyncio.get_running_loop()
+        tasks: Dict[Hashable, asyncio.Task] = {}
+        with self._lock:
+            own = []
+            for key in dict.fromkeys(keys):
+                task = self._calls.get((loop, key))
+                if task is None:
+                    own.append(key)
+                else:
+                    tasks[key] = task
+                    self.metrics["followers"] += 1
+                    logger.debug(f"Joining in-flight computation for {key}")
+            if own:
+                shared = asyncio.create_task(fn(own))
+                for key in own:
+                    call_key = (loop, key)
+                    task = asyncio.create_task(self._pick(shared, key))
+                    self._calls[call_key] = task
+                    task.add_done_callback(lambda done, call_key=call_key: self._forget(call_key, done))
+                    tasks[key] = task
+                self.metrics["leaders"] += len(own)
+        values = await asyncio.gather(*(asyncio.shield(task) for task in tasks.values()))
+        return dict(zip(tasks, values))
+
+    @staticmethod
+    async def _pick(shared: asyncio.Task, key: Hashable) -> Any:
+        return (await shared)[key]
+
+    def _forget(self, call_key: Tuple[asyncio.AbstractEventLoop, Hashable], task: asyncio.Task) -> None:
+        with self._lock:
+            if self._calls.get(call_key) is task:
+                del self._calls[call_key]
+        # Retrieve the outcome so an exception nobody awaited is not reported
+        if not task.cancelled():
+            task.exception()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get leader/follower counts and the share of calls that were deduplicated."""
+        metrics: Dict[str, Any] = dict(self.metrics)
+        calls = metrics["leaders"] + metrics["followers"]
+        metrics["dedup_rate"] = metrics["followers"] / calls if calls else 0.0
+        metrics["in_flight"] = self.in_flight
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {"leaders": 0, "followers": 0}
+
+
+# Plans in progress, keyed by normalized requirements (see response_cache.plan_cache_key)
+plan_flights = SingleFlight()
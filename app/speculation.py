@@ -0,0 +1,148 @@
+# app/speculation.py
+"""
+Speculative prefetch while LLM requirement extraction is in flight.
+
+When the fast-path parse is not confident enough to skip the LLM, its partial
+result is still a good guess. The tool calls that guess implies (weather for
+the guessed destination, card lookup, knowledge search) start right away and
+run alongside the extraction call. Once the real requirements arrive, calls
+that match the real plan are kept and the rest are cancelled.
+
+Calls match when their arguments agree up to case, punctuation and
+coordinate rounding. A guess without travel dates does not start the
+weather call: the forecast it would fetch covers the next few days, not the
+trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from app.cache import normalize_query
+from app.prefetch import ToolCall, call_tool, plan_prefetch
+
+if TYPE_CHECKING:
+    from semantic_kernel import Kernel
+
+logger = logging.getLogger(__name__)
+
+
+def _discard(task: asyncio.Task) -> None:
+    """Cancel a task, consuming its exception if it already failed."""
+    if task.done():
+        if not task.cancelled():
+            task.exception()
+    else:
+        task.cancel()
+
+
+def _stable_arguments(call: ToolCall) -> Dict[str, Any]:
+    """Arguments as compared when matching a speculative call to a real one."""
+    stable: Dict[str, Any] = {}
+    for name, value in call.arguments.items():
+        if isinstance(value, float):
+            value = round(value, 4)
+        elif isinstance(value, str):
+            value = normalize_query(value)
+        stable[name] = value
+    return stable
+
+
+def _worth_guessing(call: ToolCall) -> bool:
+    """Weather without travel dates is for the wrong days and never reused."""
+    return call.key != "weather" or "start_date" in call.arguments
+
+
+def speculation_enabled() -> bool:
+    """Speculative prefetch is on unless AGENT_SPECULATIVE_PREFETCH is 0/false."""
+    return os.environ.get("AGENT_SPECULATIVE_PREFETCH", "1").lower() not in ("0", "false", "no")
+
+
+class SpeculationStats:
+    """Counts speculative calls that were used versus wasted."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def record(self, started: int, used: int, wasted: int) -> None:
+        with self._lock:
+            self.metrics["speculations"] += 1
+            self.metrics["calls_started"] += started
+            self.metrics["calls_used"] += used
+            self.metrics["calls_wasted"] += wasted
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get speculation counts and the share of speculative calls that were used."""
+        metrics: Dict[str, Any] = dict(self.metrics)
+        started = metrics["calls_started"]
+        metrics["used_rate"] = metrics["calls_used"] / started if started else 0.0
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {"speculations": 0, "calls_started": 0, "calls_used": 0, "calls_wasted": 0}
+
+
+speculation_stats = SpeculationStats()
+
+
+class Speculation:
+    """
+    Tool calls started from a guessed set of requirements.
+    """
+
+    def __init__(self, kernel: Kernel, guess: Dict[str, Any]):
+        self.guess = guess
+        self.calls: Dict[str, ToolCall] = {
+            call.key: call for call in plan_prefetch(guess) if _worth_guessing(call)
+        }
+        self.tasks: Dict[str, asyncio.Task] = {
+            key: asyncio.create_task(call_tool(kernel, call)) for key, call in self.calls.items()
+        }
+        self._resolved = False
+        if self.tasks:
+            logger.debug(f"Speculating on {list(self.tasks)} for guess {guess}")
+
+    @classmethod
+    def start(cls, kernel: Kernel, guess: Dict[str, Any]) -> Optional["Speculation"]:
+        """Start speculation if it is enabled and the guess implies any tool calls."""
+        if not speculation_enabled():
+            return None
+        speculation = cls(kernel, guess)
+        return speculation if speculation.tasks else None
+
+    def resolve(self, calls: List[ToolCall]) -> Dict[str, asyncio.Task]:
+        """
+        Keep speculative tasks that match the real tool calls and cancel the rest.
+
+        Returns:
+            Mapping of call key to the still-running (or finished) task, ready to
+            pass to ``execute_prefetch`` as ``in_flight``
+        """
+        wanted = {call.key: call for call in calls}
+        kept: Dict[str, asyncio.Task] = {}
+        for key, task in self.tasks.items():
+            call = wanted.get(key)
+            if call is not None and _stable_arguments(call) == _stable_arguments(self.calls[key]):
+                kept[key] = task
+            else:
+                _discard(task)
+
+        wasted = len(self.tasks) - len(kept)
+        speculation_stats.record(len(self.tasks), len(kept), wasted)
+        self._resolved = True
+        logger.debug(f"Speculation kept {list(kept)}, wasted {wasted}")
+        return kept
+
+    def cancel(self) -> None:
+        """Cancel everything (e.g. when extraction failed); counts as wasted."""
+        if self._resolved:
+            return
+        for task in self.tasks.values():
+            _discard(task)
+        speculation_stats.record(len(self.tasks), 0, len(self.tasks))
+        self._resolved = True
@@ -29,6 +29,10 @@ class AgentState:
         self.tool_outputs: Dict[str, Any] = {}
         self.iteration: int = 0
         self.max_iterations: int = 15
+        # Request deadline (app.deadline.Deadline) and latency trace
+        # (app.tracing.RequestTrace); phases are recorded on the trace
+        self.deadline = None
+        self.trace = None
     
     def set_requirements(self, requirements: Dict[str, Any]):
         """Set requirements."""
@@ -74,9 +78,26 @@ class AgentState:
             
         elif self.phase == Phase.Done:
             pass # Stay in Done
+        
+        self.iteration += 1
+        if self.phase not in (Phase.Synthesize, Phase.Done) and self._out_of_budget():
+            # No time or iterations left for tools: go straight to synthesis
+            logger.warning(f"Iteration/time budget exhausted in {previous_phase.value}, skipping to synthesis")
+            self.phase = Phase.Synthesize
+        if self.trace is not None:
+            self.trace.enter(self.phase)
             
         logger.info(f"State transition: {previous_phase.value} -> {self.phase.value}")
     
+    @property
+    def remaining_iterations(self) -> int:
+        """Iterations (phase steps and model tool turns) still allowed."""
+        return max(0, self.max_iterations - self.iteration)
+    
+    def _out_of_budget(self) -> bool:
+        """Check whether the iteration limit or the request deadline is reached."""
+        return self.remaining_iterations == 0 or (self.deadline is not None and self.deadline.expired)
+
     def _has_basic_requirements(self) -> bool:
         """Check if we have minimum requirements."""
         return "destination" in self.requirements and "dates" in self.requirements
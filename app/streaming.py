@@ -0,0 +1,169 @@
+# app/streaming.py
+"""
+Section-by-section delivery of a TripPlan while it is being planned.
+
+The planning pipeline emits sections as soon as they are known: the
+destination and dates after extraction, weather/card/currency as each
+prefetched tool returns, and any remaining TripPlan field as soon as the
+model's streamed JSON completes it. ``SectionStream`` queues those emissions
+for a consumer (see ``app.main.run_request_stream``), passes on the first
+version of each section, and finishes with the complete plan. A plan shared
+by several requests (single flight) emits through a ``SectionBroadcast``, so
+every request waiting on it streams the same sections.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+# TripPlan sections in display order; "requirements" carries destination and dates
+HEADER_SECTION = "requirements"
+PLAN_SECTIONS = ("weather", "card_recommendation", "currency_info", "results", "citations", "next_steps")
+
+_DONE = object()
+
+
+class StreamStats:
+    """
+    Latency of streamed plans.
+
+    The key number is time to first useful byte (TTFUB): how long until the
+    first TripPlan section (not just the header) reaches the consumer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def record(self, first_section_time: Optional[float], total_time: float) -> None:
+        with self._lock:
+            self.metrics["streams"] += 1
+            self.metrics["total_time"] += total_time
+            if first_section_time is not None:
+                self.metrics["with_sections"] += 1
+                self.metrics["total_ttfub"] += first_section_time
+                self.metrics["max_ttfub"] = max(self.metrics["max_ttfub"], first_section_time)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get stream counts with average/max TTFUB and average total time (seconds)."""
+        metrics: Dict[str, Any] = dict(self.metrics)
+        with_sections = metrics["with_sections"]
+        metrics["avg_ttfub"] = metrics["total_ttfub"] / with_sections if with_sections else 0.0
+        metrics["avg_total_time"] = metrics["total_time"] / metrics["streams"] if metrics["streams"] else 0.0
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {
+            "streams": 0,
+            "with_sections": 0,
+            "total_ttfub": 0.0,
+            "max_ttfub": 0.0,
+            "total_time": 0.0,
+        }
+
+
+stream_stats = StreamStats()
+
+
+class SectionStream:
+    """
+    Queue between a planning task and the consumer of its sections.
+
+    ``emit`` is called from the planning task; ``close`` hands over the final
+    planning output. ``events`` yields ``{"section": name, "data": ...}``
+    dicts, each section at most once, then ``{"section": "plan", ...}`` with
+    the complete plan or ``{"section": "error", ...}``.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.emitted = set()
+        self.started_at = time.perf_counter()
+        self.first_section_time: Optional[float] = None
+
+    def emit(self, section: str, data: Any) -> None:
+        """
+        Offer a section; names that are not sections (e.g. TripPlan scalars)
+        and later offers of an already sent section are dropped.
+        """
+        if section == HEADER_SECTION or section in PLAN_SECTIONS:
+            self._queue.put_nowait((section, data))
+
+    def close(self, output: str) -> None:
+        """Finish the stream with the planning output (TripPlan or error JSON)."""
+        self._queue.put_nowait((_DONE, output))
+
+    def _event(self, section: str, data: Any) -> Dict[str, Any]:
+        self.emitted.add(section)
+        if section in PLAN_SECTIONS and self.first_section_time is None:
+            self.first_section_time = time.perf_counter() - self.started_at
+        return {"section": section, "data": data}
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield sections as they arrive, then the outcome."""
+        while True:
+            section, data = await self._queue.get()
+            if section is _DONE:
+                output = data
+                break
+            if section not in self.emitted:
+                yield self._event(section, data)
+
+        try:
+            result = json.loads(output)
+        except (TypeError, ValueError):
+            result = {"error": "Invalid planning output", "raw": output}
+
+        plan = result.get("plan") if isinstance(result, dict) else None
+        if isinstance(plan, dict):
+            # Whatever was not streamed comes from the finished plan
+            if HEADER_SECTION not in self.emitted:
+                yield self._event(HEADER_SECTION, {
+                    "destination": plan.get("destination"),
+                    "travel_dates": plan.get("travel_dates"),
+                })
+            for section in PLAN_SECTIONS:
+                if section not in self.emitted and plan.get(section) is not None:
+                    yield self._event(section, plan[section])
+            yield {"section": "plan", "data": plan}
+        else:
+            error = result.get("error") if isinstance(result, dict) else None
+            yield {"section": "error", "data": error or "No plan returned"}
+
+        stream_stats.record(self.first_section_time, time.perf_counter() - self.started_at)
+
+
+class SectionBroadcast:
+    """
+    Sections of one shared plan, passed on to every request waiting on it.
+
+    Requests ``subscribe`` with their section callback (or None when they do
+    not stream) and are first sent the sections already emitted, so a
+    request that joins late still sees the whole plan build up.
+    """
+
+    def __init__(self):
+        self._sent: List[Tuple[str, Any]] = []
+        self._callbacks: List[Optional[Callable[[str, Any], None]]] = []
+
+    @property
+    def waiters(self) -> int:
+        """Number of requests currently subscribed."""
+        return len(self._callbacks)
+
+    def subscribe(self, callback: Optional[Callable[[str, Any], None]]) -> None:
+        if callback is not None:
+            for section, data in self._sent:
+                callback(section, data)
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: Optional[Callable[[str, Any], None]]) -> None:
+        self._callbacks.remove(callback)
+
+    def emit(self, section: str, data: Any) -> None:
+        self._sent.append((section, data))
+        for callback in list(self._callbacks):
+            if callback is not None:
+                callback(section, data)
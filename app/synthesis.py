@@ -1,6 +1,97 @@
 # app/synthesis.py
 import json
-from typing import Dict, Any
+import re
+from typing import Dict, Any, Optional, Tuple
+
+from app.forecast import Forecast
+
+def weather_section(weather_data: Any) -> Dict[str, Any]:
+    """
+    Build the TripPlan weather section from a weather tool result
+    (a Forecast or its decoded JSON columns).
+    """
+    weather_info = {
+        "temperature_c": None,
+        "conditions": "Unknown",
+        "recommendation": "N/A"
+    }
+    # Forecast columns are already numeric (see app.forecast); nothing to parse
+    forecast = Forecast.parse(weather_data)
+    if forecast:
+        max_temp = forecast.max_temp[0]
+        weather_info["temperature_c"] = 20.0 if max_temp is None else float(max_temp)
+        weather_info["conditions"] = "Good" # Simplified
+        weather_info["recommendation"] = "Pack appropriately"
+    return weather_info
+
+def card_section(card_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the TripPlan card_recommendation section from a card tool result.
+    """
+    card_data = card_data if isinstance(card_data, dict) else {}
+    return {
+        "card": card_data.get("card", "Unknown"),
+        "benefit": card_data.get("benefit", "Unknown"),
+        "fx_fee": card_data.get("fx_fee", "Unknown"),
+        "source": card_data.get("source", "Unknown")
+    }
+
+def currency_section(fx_output: Any) -> Dict[str, Any]:
+    """
+    Build the TripPlan currency_info section from an FX tool result
+    such as "100.0 USD = 92.00 EUR".
+    """
+    currency_info = {
+        "sample_meal_usd": None,
+        "sample_meal_eur": None,
+        "usd_to_eur": None,
+        "points_earned": None
+    }
+    match = re.match(r"\s*([\d.]+)\s+(\w+)\s*=\s*([\d.]+)\s+(\w+)", str(fx_output))
+    if match and match.group(2).upper() == "USD":
+        amount, converted = float(match.group(1)), float(match.group(3))
+        currency_info["sample_meal_usd"] = amount
+        if match.group(4).upper() == "EUR":
+            currency_info["sample_meal_eur"] = converted
+            currency_info["usd_to_eur"] = round(converted / amount, 4) if amount else None
+    return currency_info
+
+def tool_result_section(key: str, value: Any) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Map a tool result (keyed as in tool_outputs) to the TripPlan section it fills.
+    
+    Returns:
+        (section name, section data), or None if the tool has no section of its own
+    """
+    if key == "weather":
+        return "weather", weather_section(value)
+    if key == "card":
+        return "card_recommendation", card_section(value)
+    if key == "fx":
+        return "currency_info", currency_section(value)
+    return None
+
+def partial_tripplan(tool_results: Dict[str, Any], requirements: Dict[str, Any],
+                     fields: Optional[Dict[str, Any]] = None, reason: str = "") -> str:
+    """
+    Build a TripPlan from whatever is known when there is no time left to plan.
+    
+    TripPlan fields the model already produced (``fields``) are kept, sections
+    are filled from tool results where available, and everything else is
+    "Unknown". The output carries ``"partial": true`` and the reason.
+    """
+    plan = {
+        "destination": requirements.get("destination") or "Unknown",
+        "travel_dates": requirements.get("dates") or "Unknown",
+        "weather": weather_section(tool_results.get("weather", {})),
+        "results": [],
+        "card_recommendation": card_section(tool_results.get("card", {})),
+        "currency_info": currency_section(tool_results.get("fx", "")),
+        "citations": [],
+        "next_steps": ["Ask again for a complete plan"],
+    }
+    plan.update(fields or {})
+    return json.dumps({"plan": plan, "partial": True, "reason": reason or "Planning did not finish"})
 
 def synthesize_to_tripplan(tool_results: Dict[str, Any], requirements: Dict[str, str]) -> str:
     """
@@ -14,16 +105,7 @@ def synthesize_to_tripplan(tool_results: Dict[str, Any], requirements: Dict[str,
         rag_data = tool_results.get("rag", {})
         
         # Parse weather
-        weather_info = {
-            "temperature_c": None,
-            "conditions": "Unknown",
-            "recommendation": "N/A"
-        }
-        if "daily_forecast" in weather_data and weather_data["daily_forecast"]:
-            forecast = weather_data["daily_forecast"][0]
-            weather_info["temperature_c"] = float(forecast.get("max_temp", 20.0))
-            weather_info["conditions"] = "Good" # Simplified
-            weather_info["recommendation"] = "Pack appropriately"
+        weather_info = weather_section(weather_data)
 
         # Parse search
         # Search output might be a string or list
@@ -43,18 +125,8 @@ def synthesize_to_tripplan(tool_results: Dict[str, Any], requirements: Dict[str,
                         "category": "General"
                     }
                 ],
-                "card_recommendation": {
-                    "card": card_data.get("card", "Unknown"),
-                    "benefit": card_data.get("benefit", "Unknown"),
-                    "fx_fee": card_data.get("fx_fee", "Unknown"),
-                    "source": card_data.get("source", "Unknown")
-                },
-                "currency_info": {
-                    "sample_meal_usd": 100.0,
-                    "sample_meal_eur": 92.0,
-                    "usd_to_eur": 0.92,
-                    "points_earned": 400
-                },
+                "card_recommendation": card_section(card_data),
+                "currency_info": currency_section(tool_results.get("fx", "")),
                 "citations": ["https://bing.com"],
                 "next_steps": ["Book flight", "Reserve hotel"]
             }
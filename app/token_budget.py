@@ -0,0 +1,409 @@
+# app/token_budget.py
+"""
+Token counting and per-request token budgets.
+
+Every model call of a request (requirement extraction, the planning turn and
+each tool turn the model triggers) draws from one ``TokenBudget``. Prompts
+are counted with the model's tiktoken encoding before they are sent; when a
+chat history would not fit the prompt budget it is trimmed first (oversized
+tool results are cut, then the oldest tool exchanges are dropped) and the
+completion is capped with ``max_tokens``, recomputed before every turn from
+what the request has left. Once the request's prompt or completion total is
+spent, tool turns stop and the plan is synthesized from what is known, so a
+request cannot balloon however many tools the model calls.
+
+The encoder is loaded once and token counts are memoized by text, so the
+same system prompt or tool result is only encoded once. Loading may download
+tiktoken's BPE file, so on the event loop it happens in a worker thread
+(``preload_encoding``, awaited at service startup and before each plan).
+Without an encoding (not loaded yet, or tiktoken cannot fetch its BPE file)
+counts fall back to the usual four-characters-per-token estimate, and a
+failed load is retried after ENCODING_RETRY_SECONDS.
+
+Usage is tracked in ``token_stats``.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.utils.env import env_int
+
+logger = logging.getLogger(__name__)
+
+# Model whose encoding is used when the deployment name is not a known model
+DEFAULT_TOKEN_MODEL = "gpt-4o-mini"
+FALLBACK_ENCODING = "o200k_base"
+
+DEFAULT_PROMPT_BUDGET = 12000
+DEFAULT_COMPLETION_BUDGET = 2000
+# Prompt tokens of all model calls of a request together
+DEFAULT_REQUEST_PROMPT_BUDGET = 40000
+# Completion tokens reserved for each call
+EXTRACTION_MAX_TOKENS = 200
+PLAN_MAX_TOKENS = 1500
+# Tool results above this size are cut before exchanges are dropped
+TRIMMED_RESULT_TOKENS = 300
+
+# Tokens the chat format adds per message and to prime the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# Seconds before a failed encoding load is tried again
+ENCODING_RETRY_SECONDS = 300.0
+
+_encoding: Any = None
+_encoding_failed_at: Optional[float] = None
+_encoding_lock = threading.Lock()
+
+# Budget of the request being planned, used by kernel filters
+_current_budget: ContextVar[Optional["TokenBudget"]] = ContextVar("token_budget", default=None)
+
+
+def load_encoding() -> Any:
+    """
+    Load the tiktoken encoding for the chat deployment.
+
+    Blocks while tiktoken reads (or downloads) its BPE file; use
+    ``preload_encoding`` on the event loop.
+
+    Returns:
+        The encoding, or None when it cannot be loaded (retried after
+        ENCODING_RETRY_SECONDS)
+    """
+    global _encoding, _encoding_failed_at
+    with _encoding_lock:
+        if _encoding is not None:
+            return _encoding
+        if _encoding_failed_at is not None and time.monotonic() - _encoding_failed_at < ENCODING_RETRY_SECONDS:
+            return None
+        model = os.environ.get("AGENT_TOKEN_MODEL") or os.environ.get("AZURE_OPENAI_CHAT_DEPLOYMENT") or DEFAULT_TOKEN_MODEL
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+        except Exception as e:
+            logger.warning(f"tiktoken encoding unavailable, estimating tokens: {e}")
+            _encoding_failed_at = time.monotonic()
+            return None
+        _encoding, _encoding_failed_at = encoding, None
+    # Drop the counts estimated while the encoding was missing
+    _count.cache_clear()
+    return encoding
+
+
+async def preload_encoding() -> Any:
+    """Load the encoding in a worker thread so the event loop keeps running."""
+    if _encoding is not None:
+        return _encoding
+    return await asyncio.to_thread(load_encoding)
+
+
+def get_encoding() -> Any:
+    """
+    Get the tiktoken encoding for the chat deployment.
+
+    On a thread running an event loop the encoding is never loaded here
+    (see ``preload_encoding``); counts are estimated until it is.
+
+    Returns:
+        The encoding, or None when it is not available
+    """
+    if _encoding is not None:
+        return _encoding
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return load_encoding()
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _count(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_tokens(text: Any) -> int:
+    """Count the tokens of a text (memoized)."""
+    if not text:
+        return 0
+    return _count(str(text))
+
+
+def _message_text(message: Any) -> List[str]:
+    """Texts of a chat message that are sent to the model."""
+    from semantic_kernel.contents import FunctionCallContent, FunctionResultContent
+
+    texts = [message.content] if message.content else []
+    for item in message.items:
+        if isinstance(item, FunctionCallContent):
+            texts.append(f"{item.name}{item.arguments or ''}")
+        elif isinstance(item, FunctionResultContent):
+            texts.append(str(item.result))
+    return texts
+
+
+def count_message(message: Any) -> int:
+    """Count the tokens of one chat message, including format overhead."""
+    return TOKENS_PER_MESSAGE + sum(count_tokens(text) for text in _message_text(message))
+
+
+def count_history(chat_history: Any) -> int:
+    """Count the prompt tokens of a chat history."""
+    return TOKENS_PER_REPLY + sum(count_message(message) for message in chat_history.messages)
+
+
+def count_turn(chat_history: Any, call_id: str) -> Optional[Tuple[int, int]]:
+    """
+    Count the model turn that made tool call ``call_id``.
+
+    Returns:
+        (prompt tokens, completion tokens): the history before the
+        assistant message holding the call and that message, or None when
+        the call is not in the history
+    """
+    from semantic_kernel.contents import FunctionCallContent
+
+    messages = chat_history.messages
+    for index in range(len(messages) - 1, -1, -1):
+        if any(isinstance(item, FunctionCallContent) and item.id == call_id for item in messages[index].items):
+            prompt = TOKENS_PER_REPLY + sum(count_message(message) for message in messages[:index])
+            return prompt, count_message(messages[index])
+    return None
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut a text to about ``max_tokens`` tokens."""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+class TokenBudgetStats:
+    """Counts tokens used per phase and how often budgets forced trimming."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def record_usage(self, phase: str, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self.metrics["calls"] += 1
+            self.metrics["prompt_tokens"] += prompt_tokens
+            self.metrics["completion_tokens"] += completion_tokens
+            by_phase = self.metrics["tokens_by_phase"]
+            by_phase[phase] = by_phase.get(phase, 0) + prompt_tokens + completion_tokens
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.metrics["requests"] += 1
+
+    def record_trim(self, tokens_removed: int, results_cut: int, messages_dropped: int) -> None:
+        with self._lock:
+            self.metrics["trims"] += 1
+            self.metrics["tokens_trimmed"] += tokens_removed
+            self.metrics["results_cut"] += results_cut
+            self.metrics["messages_dropped"] += messages_dropped
+
+    def record_exhausted(self) -> None:
+        with self._lock:
+            self.metrics["exhausted"] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get token totals, per-request averages and trimming counts."""
+        metrics: Dict[str, Any] = dict(self.metrics)
+        metrics["tokens_by_phase"] = dict(self.metrics["tokens_by_phase"])
+        requests = metrics["requests"]
+        total = metrics["prompt_tokens"] + metrics["completion_tokens"]
+        metrics["avg_tokens_per_request"] = total / requests if requests else 0.0
+        metrics["exact_counts"] = get_encoding() is not None
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {
+            "requests": 0,
+            "calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "tokens_by_phase": {},
+            "trims": 0,
+            "tokens_trimmed": 0,
+            "results_cut": 0,
+            "messages_dropped": 0,
+            "exhausted": 0,
+        }
+
+
+token_stats = TokenBudgetStats()
+
+
+class TokenBudget:
+    """
+    Prompt and completion token budget shared by all model calls of a request.
+
+    Args:
+        prompt_tokens: Largest prompt a single call may send
+        completion_tokens: Completion tokens available to the whole request
+        request_prompt_tokens: Prompt tokens available to the whole request
+    """
+
+    def __init__(self, prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+                 request_prompt_tokens: Optional[int] = None):
+        self.prompt_limit = prompt_tokens or env_int("AGENT_PROMPT_TOKEN_BUDGET", DEFAULT_PROMPT_BUDGET)
+        self.completion_limit = completion_tokens or env_int("AGENT_COMPLETION_TOKEN_BUDGET", DEFAULT_COMPLETION_BUDGET)
+        self.request_prompt_limit = request_prompt_tokens or env_int(
+            "AGENT_REQUEST_PROMPT_TOKEN_BUDGET", DEFAULT_REQUEST_PROMPT_BUDGET
+        )
+        self.prompt_used = 0
+        self.completion_used = 0
+        self._turns_charged: Set[int] = set()
+
+    @property
+    def completion_remaining(self) -> int:
+        return max(0, self.completion_limit - self.completion_used)
+
+    @property
+    def prompt_remaining(self) -> int:
+        return max(0, self.request_prompt_limit - self.prompt_used)
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the request's prompt or completion total is spent."""
+        return self.prompt_remaining == 0 or self.completion_remaining == 0
+
+    def max_tokens(self, wanted: int) -> int:
+        """Completion cap for the next call: ``wanted``, limited by what is left."""
+        return max(1, min(wanted, self.completion_remaining))
+
+    def charge(self, phase: str, prompt_tokens: int, completion_tokens: int = 0) -> None:
+        """Record the tokens of one model call (or tool turn) against the budget."""
+        self.prompt_used += prompt_tokens
+        self.completion_used += completion_tokens
+        token_stats.record_usage(phase, prompt_tokens, completion_tokens)
+
+    def charge_turn(self, index: int, prompt_tokens: int, completion_tokens: int) -> bool:
+        """
+        Charge a model turn that requested tools, once however many tools it called.
+
+        Returns:
+            True when the turn had not been charged yet
+        """
+        if index in self._turns_charged:
+            return False
+        self._turns_charged.add(index)
+        self.charge("tool", prompt_tokens, completion_tokens)
+        return True
+
+    def fit(self, chat_history: Any, reserve: int = 0) -> bool:
+        """
+        Trim a chat history in place until it fits the prompt budget (the
+        per-call limit, or what the request has left if that is less).
+
+        Tool results larger than ``TRIMMED_RESULT_TOKENS`` are cut first, then
+        whole tool exchanges (the assistant's calls with their results) are
+        dropped oldest first. System messages and the first user message are
+        never touched.
+
+        Args:
+            chat_history: The ChatHistory to trim
+            reserve: Tokens about to be added to the history
+
+        Returns:
+            True when the history (plus ``reserve``) fits the budget
+        """
+        limit = min(self.prompt_limit, self.prompt_remaining) - reserve
+        before = count_history(chat_history)
+        if before <= limit:
+            return True
+
+        results_cut = self._cut_results(chat_history, before - limit)
+        messages_dropped = 0
+        tokens = count_history(chat_history)
+        while tokens > limit:
+            dropped = self._drop_oldest_exchange(chat_history)
+            if not dropped:
+                break
+            messages_dropped += dropped
+            tokens = count_history(chat_history)
+
+        token_stats.record_trim(before - tokens, results_cut, messages_dropped)
+        logger.info(f"Trimmed chat history from {before} to {tokens} tokens (limit {limit})")
+        if tokens > limit:
+            token_stats.record_exhausted()
+            return False
+        return True
+
+    @staticmethod
+    def _cut_results(chat_history: Any, excess: int) -> int:
+        """Cut the largest tool results until ``excess`` tokens are removed."""
+        from semantic_kernel.contents import FunctionResultContent
+
+        results = [
+            item
+            for message in chat_history.messages
+            for item in message.items
+            if isinstance(item, FunctionResultContent)
+        ]
+        results.sort(key=lambda item: count_tokens(item.result), reverse=True)
+        cut = 0
+        for item in results:
+            if excess <= 0:
+                break
+            tokens = count_tokens(item.result)
+            if tokens <= TRIMMED_RESULT_TOKENS:
+                break
+            item.result = _truncate(str(item.result), TRIMMED_RESULT_TOKENS) + " [truncated]"
+            excess -= tokens - count_tokens(item.result)
+            cut += 1
+        return cut
+
+    @staticmethod
+    def _drop_oldest_exchange(chat_history: Any) -> int:
+        """Remove the oldest assistant tool-call message and its tool results."""
+        from semantic_kernel.contents import AuthorRole, FunctionCallContent
+
+        messages = chat_history.messages
+        for index, message in enumerate(messages):
+            call_ids = {item.id for item in message.items if isinstance(item, FunctionCallContent)}
+            if message.role != AuthorRole.ASSISTANT or not call_ids:
+                continue
+            end = index + 1
+            while end < len(messages) and messages[end].role == AuthorRole.TOOL:
+                end += 1
+            del messages[index:end]
+            return end - index
+        return 0
+
+
+@contextmanager
+def budget_scope(budget: Optional[TokenBudget] = None) -> Iterator[TokenBudget]:
+    """
+    Make a request's token budget available to the model calls in this block.
+
+    Tool turns run in the same task, so the kernel filter charges the budget
+    of the request that triggered them.
+    """
+    budget = budget or TokenBudget()
+    token_stats.record_request()
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+def current_budget() -> Optional[TokenBudget]:
+    """Get the token budget of the request being planned, if any."""
+    return _current_budget.get()
@@ -1,34 +1,16 @@
 from semantic_kernel.functions import kernel_function
 import json
 
+from app.tools.card_catalog import CARD_CATALOG
+
+
 class CardTools:
     @kernel_function(name="get_card_recommendation", description="Get credit card recommendation based on card name.")
     def get_card_recommendation(self, card_name: str) -> str:
         """
         Get details and benefits for a specific credit card.
         """
-        cards = {
-            "BankGold": {
-                "card": "BankGold",
-                "benefit": "4x points on dining worldwide",
-                "fx_fee": "None",
-                "source": "Internal Policy DB"
-            },
-            "BankPlatinum": {
-                "card": "BankPlatinum",
-                "benefit": "5x points on flights and hotels",
-                "fx_fee": "None",
-                "source": "Internal Policy DB"
-            },
-            "BankRewards": {
-                "card": "BankRewards",
-                "benefit": "3x points on gas and groceries",
-                "fx_fee": "3%",
-                "source": "Internal Policy DB"
-            }
-        }
-        
-        card_info = cards.get(card_name)
+        card_info = CARD_CATALOG.get(card_name)
         if card_info:
             return json.dumps(card_info)
         else:
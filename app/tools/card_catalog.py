@@ -0,0 +1,28 @@
+# app/tools/card_catalog.py
+"""
+Card catalog shared by the Card tool and the rule-based requirements parser.
+
+Kept apart from app/tools/card.py so the parser can match card names
+without importing Semantic Kernel.
+"""
+
+CARD_CATALOG = {
+    "BankGold": {
+        "card": "BankGold",
+        "benefit": "4x points on dining worldwide",
+        "fx_fee": "None",
+        "source": "Internal Policy DB"
+    },
+    "BankPlatinum": {
+        "card": "BankPlatinum",
+        "benefit": "5x points on flights and hotels",
+        "fx_fee": "None",
+        "source": "Internal Policy DB"
+    },
+    "BankRewards": {
+        "card": "BankRewards",
+        "benefit": "3x points on gas and groceries",
+        "fx_fee": "3%",
+        "source": "Internal Policy DB"
+    }
+}
@@ -0,0 +1,15 @@
+from semantic_kernel.functions import kernel_function
+from app.geo import geocode
+import json
+
+class GeoTools:
+    @kernel_function(name="geocode", description="Get latitude and longitude for a city or airport (name or IATA code).")
+    def geocode(self, place: str) -> str:
+        """
+        Resolve a place to coordinates using the offline gazetteer (no network).
+        """
+        found = geocode(place)
+        if found:
+            return json.dumps(found.to_dict())
+        else:
+            return json.dumps({"error": f"Place not found: {place}"})
@@ -1,46 +1,396 @@
 from semantic_kernel.functions import kernel_function
-import requests
+import asyncio
+import glob
 import json
-from typing import Dict, Any
+import math
+import os
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from pydantic import ValidationError
+from semantic_kernel.kernel_pydantic import KernelBaseModel
+
+from app.cache import LRUCache
+from app.climate import climate_normals
+from app.forecast import Forecast
+from app.http_client import http_client
+from app.singleflight import SingleFlight
+from app.utils.env import env_float, env_int
+
+# Open-Meteo forecast endpoint; OPEN_METEO_URL points it at a local stand-in
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Forecasts are shared by every point in a grid tile (0.1 degrees is about 11 km)
+DEFAULT_TILE_DEGREES = 0.1
+# Forecast models are re-run every few hours; a cached forecast is kept until the next run
+DEFAULT_UPDATE_HOURS = 6
+DEFAULT_FORECAST_CACHE_SIZE = 512
+# Most coordinates sent to Open-Meteo in one request
+MAX_BATCH_LOCATIONS = 50
+# Open-Meteo forecasts reach 16 days ahead; later days are answered from climate normals
+FORECAST_HORIZON_DAYS = 16
+# Days forecast when no travel dates are given
+DEFAULT_FORECAST_DAYS = 10
+# Longest date range answered in one call
+MAX_WINDOW_DAYS = 31
+
+Window = Tuple[date, date]
+# Tile centre, forecast issue time, first and last forecast day
+TileKey = Tuple[float, float, int, str, str]
+
+
+def _today(now: Optional[float] = None) -> date:
+    return datetime.fromtimestamp(time.time() if now is None else now, timezone.utc).date()
+
+
+def travel_window(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  today: Optional[date] = None) -> Window:
+    """
+    Days to forecast: the travel dates (YYYY-MM-DD), or DEFAULT_FORECAST_DAYS
+    from today (or from ``start_date`` when only that is given).
+
+    Raises:
+        ValueError: If a date is malformed, the range is reversed or longer than MAX_WINDOW_DAYS
+    """
+    start = date.fromisoformat(start_date) if start_date else (today or _today())
+    end = date.fromisoformat(end_date) if end_date else start + timedelta(days=DEFAULT_FORECAST_DAYS - 1)
+    if end < start:
+        raise ValueError(f"end_date {end} is before start_date {start}")
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise ValueError(f"Date range is longer than {MAX_WINDOW_DAYS} days")
+    return start, end
+
+
+def split_window(window: Window, today: Optional[date] = None) -> Tuple[Optional[Window], List[date]]:
+    """
+    Split a date range into the days Open-Meteo can forecast and the later
+    days answered from climate normals. Days already past are dropped.
+    """
+    today = today or _today()
+    horizon = today + timedelta(days=FORECAST_HORIZON_DAYS - 1)
+    start = max(window[0], today)
+    forecast_end = min(window[1], horizon)
+    forecast = (start, forecast_end) if start <= forecast_end else None
+    first_normal = max(start, horizon + timedelta(days=1))
+    normal_days = [first_normal + timedelta(days=i) for i in range((window[1] - first_normal).days + 1)]
+    return forecast, normal_days
+
+
+class ForecastCache:
+    """
+    Forecasts keyed by grid tile and forecast issue time.
+
+    Coordinates are snapped to the centre of a ``tile_degrees`` grid tile and
+    the forecast is fetched for that centre, so all requests within the tile
+    (for the same days) share one entry. The key also holds the issue time of
+    the current model run (every ``update_hours`` hours, aligned to 00:00 UTC)
+    and entries expire when the next run is issued, so the cache never serves
+    a forecast that Open-Meteo has already replaced.
+
+    Entries are immutable ``Forecast`` columns. They live in an in-memory
+    LRU and, when ``disk_dir`` is set, in one JSON file per tile that other
+    worker processes read too.
+
+    Args:
+        tile_degrees: Grid tile size (WEATHER_TILE_DEG)
+        update_hours: Hours between forecast runs (WEATHER_UPDATE_HOURS)
+        max_size: Entries kept in memory (WEATHER_CACHE_SIZE)
+        disk_dir: Directory of the shared on-disk tier (WEATHER_CACHE_DIR; off when unset)
+    """
+
+    def __init__(self, tile_degrees: Optional[float] = None, update_hours: Optional[float] = None,
+                 max_size: Optional[int] = None, disk_dir: Optional[str] = None):
+        self.tile_degrees = tile_degrees or env_float("WEATHER_TILE_DEG", DEFAULT_TILE_DEGREES)
+        self.update_seconds = 3600 * (update_hours or env_float("WEATHER_UPDATE_HOURS", DEFAULT_UPDATE_HOURS))
+        self.memory = LRUCache(max_size or env_int("WEATHER_CACHE_SIZE", DEFAULT_FORECAST_CACHE_SIZE))
+        self.disk_dir = disk_dir if disk_dir is not None else os.environ.get("WEATHER_CACHE_DIR")
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def tile(self, lat: float, lon: float) -> Tuple[float, float]:
+        """Centre of the grid tile containing (lat, lon)."""
+        size = self.tile_degrees
+        # Rounding first keeps points on a tile edge (41.9 / 0.1 = 418.999...) in the right tile
+        return (
+            round((math.floor(round(lat / size, 9)) + 0.5) * size, 6),
+            round((math.floor(round(lon / size, 9)) + 0.5) * size, 6),
+        )
+
+    def issue_time(self, now: Optional[float] = None) -> int:
+        """Unix time of the forecast run in effect at ``now``."""
+        now = time.time() if now is None else now
+        return int(now // self.update_seconds * self.update_seconds)
+
+    def key(self, lat: float, lon: float, now: Optional[float] = None, window: Optional[Window] = None) -> TileKey:
+        """Key of the forecast for (lat, lon) over ``window`` (default: see ``travel_window``)."""
+        start, end = window or travel_window(today=_today(now))
+        return (*self.tile(lat, lon), self.issue_time(now), start.isoformat(), end.isoformat())
+
+    def ttl(self, key: TileKey, now: Optional[float] = None) -> float:
+        """Seconds until the run after ``key``'s is issued."""
+        now = time.time() if now is None else now
+        return max(0.0, key[2] + self.update_seconds - now)
+
+    def _path(self, key: TileKey) -> str:
+        return os.path.join(self.disk_dir, "_".join(str(part) for part in key) + ".json")
+
+    def _record(self, name: str) -> None:
+        with self._lock:
+            self.metrics[name] += 1
+
+    def get(self, key: TileKey) -> Optional[Forecast]:
+        """Get the forecast for a tile from memory, then disk (promoting it to memory)."""
+        forecast = self.memory.get(key, record=False)
+        if forecast is not None:
+            self._record("memory_hits")
+            return forecast
+        if self.disk_dir:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    forecast = Forecast.from_dict(json.load(f))
+            except (OSError, ValueError, TypeError, AttributeError):
+                forecast = None
+            if forecast is not None:
+                self.memory.set(key, forecast, ttl=self.ttl(key))
+                self._record("disk_hits")
+                return forecast
+        self._record("misses")
+        return None
+
+    def set(self, key: TileKey, forecast: Forecast) -> None:
+        """Store a tile's forecast in memory and on disk until the next run is issued."""
+        ttl = self.ttl(key)
+        if ttl <= 0:
+            return
+        self.memory.set(key, forecast, ttl=ttl)
+        self._record("stores")
+        if self.disk_dir:
+            self._write(key, forecast)
+
+    def _write(self, key: TileKey, forecast: Forecast) -> None:
+        """Write atomically (readers in other processes never see a partial file) and drop the tile's older runs."""
+        path = self._path(key)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(forecast.to_dict(), f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+            for old in glob.glob(os.path.join(self.disk_dir, f"{key[0]}_{key[1]}_*.json")):
+                if os.path.basename(old)[:-len(".json")].split("_")[2] != str(key[2]):
+                    os.remove(old)
+        except OSError:
+            pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get memory/disk hits, misses and the hit rate."""
+        with self._lock:
+            metrics: Dict[str, Any] = dict(self.metrics)
+        hits = metrics["memory_hits"] + metrics["disk_hits"]
+        lookups = hits + metrics["misses"]
+        metrics["hit_rate"] = hits / lookups if lookups else 0.0
+        metrics["size"] = len(self.memory)
+        metrics["disk"] = bool(self.disk_dir)
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def clear(self) -> None:
+        """Drop the in-memory tier (the disk tier is shared and left alone)."""
+        self.memory.clear()
+
+
+forecast_cache = ForecastCache()
+# Concurrent misses for the same tile wait for one fetch
+forecast_flights = SingleFlight()
+
+
+class Location(KernelBaseModel):
+    """A point to forecast; ``name`` is echoed back in the result."""
+    lat: float
+    lon: float
+    name: Optional[str] = None
+
+
+def _with_normals(forecast: Forecast, lat: float, lon: float, days: List[date]) -> Forecast:
+    """
+    Extend a forecast with climate-normal days from the local climatology
+    table (no network call). ``climatology_from`` marks where they start.
+    """
+    if not days:
+        return forecast
+    normals = climate_normals(lat, lon)
+    if normals is None:
+        return replace(forecast, note=f"No forecast or climate normals from {days[0].isoformat()}")
+    return forecast.with_normals((day.isoformat(), *normals.on(day)) for day in days)
+
+
+def _passed(window: Window) -> Forecast:
+    """Empty forecast for travel dates that are already over."""
+    return Forecast(note=f"Travel dates {window[0].isoformat()} to {window[1].isoformat()} have already passed")
+
 
 class WeatherTools:
-    @kernel_function(name="get_weather", description="Get weather forecast for a location.")
-    def get_weather(self, lat: float, lon: float) -> str:
+    @kernel_function(
+        name="get_weather",
+        description=(
+            "Get weather forecast for a location. Pass the travel dates (YYYY-MM-DD) as start_date and "
+            "end_date; days beyond the 16-day forecast are answered with climate normals."
+        ),
+    )
+    async def get_weather(self, lat: float, lon: float,
+                          start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
         """
         Get weather forecast for given coordinates using Open-Meteo API.
-        Returns a JSON string with daily max/min temps and weather codes.
+        Returns minimal JSON with parallel daily columns: dates, max/min
+        temperatures and weather codes (see app.forecast).
+
+        Only the travel dates are fetched (DEFAULT_FORECAST_DAYS from today
+        without them). Days past the forecast horizon come from the bundled
+        climatology table (app.climate) as normal max/min temperatures,
+        starting at ``climatology_from``; a trip entirely past the horizon
+        makes no network call. Travel dates that are already over get empty
+        columns and a ``note`` saying so.
+
+        The request goes through the shared keep-alive pool in app.http_client
+        (retried on timeouts and 429/5xx), so it does not block the event loop.
+        Forecasts are cached per grid tile until the next model run (see
+        ForecastCache), so nearby and repeated lookups skip Open-Meteo.
         """
         from app.utils.logger import get_logger
         logger = get_logger("travel_agent")
-        logger.debug(f"WeatherTools: Requesting weather for lat={lat}, lon={lon}")
+        logger.debug(f"WeatherTools: Requesting weather for lat={lat}, lon={lon}, {start_date} to {end_date}")
         try:
-            url = "https://api.open-meteo.com/v1/forecast"
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "daily": "weathercode,temperature_2m_max,temperature_2m_min",
-                "timezone": "UTC",
-                "forecast_days": 10
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Simplified result for the agent
-            daily = data.get("daily", {})
-            result = {
-                "daily_forecast": [
-                    {
-                        "date": date,
-                        "max_temp": str(daily["temperature_2m_max"][i]),
-                        "min_temp": str(daily["temperature_2m_min"][i]),
-                        "code": str(daily["weathercode"][i])
-                    }
-                    for i, date in enumerate(daily.get("time", []))
-                ]
-            }
-            return json.dumps(result)
-            
+            window = travel_window(start_date, end_date)
+            forecast_days, normal_days = split_window(window)
+            result = Forecast() if forecast_days or normal_days else _passed(window)
+            if forecast_days:
+                key = forecast_cache.key(lat, lon, window=forecast_days)
+                result = forecast_cache.get(key)
+                if result is None:
+                    result = await forecast_flights.do(key, lambda: self._fetch(key))
+            return _with_normals(result, lat, lon, normal_days).to_json()
+
         except Exception as e:
-            return json.dumps({"error": str(e)})
\ No newline at end of file
+            return json.dumps({"error": str(e)})
+
+    @kernel_function(
+        name="get_weather_batch",
+        description=(
+            "Get weather forecasts for several locations in one call (e.g. multi-city trips), "
+            "with the same optional start_date/end_date as get_weather."
+        ),
+    )
+    async def get_weather_batch(self, locations: List[Location],
+                                start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
+        """
+        Get forecasts for many coordinates with as few Open-Meteo requests as possible.
+
+        Locations in the same grid tile share one forecast, tiles already in
+        the forecast cache are not fetched, and the rest are fetched together
+        (Open-Meteo takes comma-separated coordinate lists), up to
+        MAX_BATCH_LOCATIONS per request, with the requests running
+        concurrently. Tiles being fetched by another call wait for that
+        fetch, as in ``get_weather``. Dates work as in ``get_weather``.
+
+        Returns:
+            JSON with one entry per location, in order: its name/lat/lon and
+            either the forecast columns or "error" (only "error" for a
+            malformed location)
+        """
+        try:
+            window = travel_window(start_date, end_date)
+            forecast_days, normal_days = split_window(window)
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
+        points: List[Optional[Location]] = []
+        invalid: Dict[int, str] = {}
+        for index, loc in enumerate(locations):
+            try:
+                points.append(loc if isinstance(loc, Location) else Location.model_validate(loc))
+            except ValidationError as e:
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error["loc"]) or "location"
+                points.append(None)
+                invalid[index] = f"Invalid location ({field}): {error['msg']}"
+        keys = [forecast_cache.key(point.lat, point.lon, window=forecast_days) if point and forecast_days else None
+                for point in points]
+
+        forecasts: Dict[Optional[TileKey], Forecast] = {
+            None: Forecast() if forecast_days or normal_days else _passed(window),
+        }
+        missing: List[TileKey] = []
+        for key in dict.fromkeys(keys):
+            if key is None:
+                continue
+            cached = forecast_cache.get(key)
+            if cached is None:
+                missing.append(key)
+            else:
+                forecasts[key] = cached
+
+        errors: Dict[TileKey, str] = {}
+
+        async def fetch_chunk(chunk: List[TileKey]) -> None:
+            try:
+                forecasts.update(await forecast_flights.do_many(chunk, self._fetch_many))
+            except Exception as e:
+                errors.update({key: str(e) for key in chunk})
+
+        await asyncio.gather(*(fetch_chunk(missing[start:start + MAX_BATCH_LOCATIONS])
+                               for start in range(0, len(missing), MAX_BATCH_LOCATIONS)))
+
+        results = []
+        for index, (point, key) in enumerate(zip(points, keys)):
+            if point is None:
+                results.append({"error": invalid[index]})
+                continue
+            entry: Dict[str, Any] = {"name": point.name} if point.name else {}
+            entry.update({"lat": point.lat, "lon": point.lon})
+            if key in forecasts:
+                entry.update(_with_normals(forecasts[key], point.lat, point.lon, normal_days).to_dict())
+            else:
+                entry["error"] = errors.get(key, "No forecast")
+            results.append(entry)
+        return json.dumps({"locations": results}, separators=(",", ":"))
+
+    @classmethod
+    async def _fetch(cls, key: TileKey) -> Forecast:
+        """Fetch the forecast for a tile's centre and cache it."""
+        return (await cls._fetch_many([key]))[key]
+
+    @staticmethod
+    async def _fetch_many(keys: List[TileKey]) -> Dict[TileKey, Forecast]:
+        """
+        Fetch the forecasts for several tiles' centres in one request and cache them.
+
+        The keys must share their days (Open-Meteo applies one date range to
+        every coordinate in a request).
+        """
+        url = os.environ.get("OPEN_METEO_URL", FORECAST_URL)
+        params = {
+            "latitude": ",".join(str(key[0]) for key in keys),
+            "longitude": ",".join(str(key[1]) for key in keys),
+            "daily": "weathercode,temperature_2m_max,temperature_2m_min",
+            "timezone": "UTC",
+            "start_date": keys[0][3],
+            "end_date": keys[0][4],
+        }
+
+        data = await http_client.get_json(url, params=params)
+        # One location comes back as an object, several as a list
+        items = data if isinstance(data, list) else [data]
+        if len(items) != len(keys):
+            raise ValueError(f"Expected {len(keys)} forecasts, got {len(items)}")
+
+        results = {}
+        for key, item in zip(keys, items):
+            results[key] = Forecast.from_open_meteo(item)
+            forecast_cache.set(key, results[key])
+        return results
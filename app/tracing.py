@@ -0,0 +1,243 @@
+# app/tracing.py
+"""
+Per-request latency traces.
+
+A ``RequestTrace`` follows one request through the phases of
+``app.state.Phase`` and records a span for every phase, tool call and LLM
+call, with ``time.perf_counter`` offsets from the start of the request. The
+trace is attached to the ``AgentState`` (``state.trace``) and reachable from
+anywhere in the request through ``current_trace()``, so prefetch, kernel
+filters and the model calls add their spans without it being passed around.
+
+Finished traces are exported as JSON (``RequestTrace.to_json``, the recent
+ones from ``/traces``, and one line per request to ``AGENT_TRACE_FILE`` if
+set) and aggregated into ``latency_histogram``, which shows which phase,
+tool or model call dominates wall time across requests.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.state import Phase
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, in milliseconds (last bucket is open)
+BUCKETS_MS: Tuple[float, ...] = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# Finished traces kept for /traces
+RECENT_TRACES = 50
+
+# Trace of the request being planned
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+
+
+@dataclass
+class Span:
+    """
+    One timed part of a request.
+
+    ``kind`` is "phase", "tool" or "llm"; ``start`` and ``end`` are seconds
+    since the start of the request.
+    """
+    kind: str
+    name: str
+    start: float
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+
+class RequestTrace:
+    """
+    Phase, tool and LLM spans of one request.
+    """
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._phase: Optional[Span] = None
+        self.total = 0.0
+        self.finished = False
+
+    def now(self) -> float:
+        """Seconds since the start of the request."""
+        return time.perf_counter() - self._origin
+
+    def enter(self, phase: Phase) -> None:
+        """Close the current phase span and open one for ``phase`` (no-op if already in it)."""
+        if self._phase is not None and self._phase.name == phase.value:
+            return
+        now = self.now()
+        if self._phase is not None:
+            self._phase.end = now
+        self._phase = Span("phase", phase.value, now)
+        self.spans.append(self._phase)
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time the block as a span; exceptions are recorded and re-raised."""
+        span = Span(kind, name, self.now(), attributes=attributes)
+        self.spans.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            span.end = self.now()
+
+    def finish(self) -> None:
+        """Close the open phase span and fix the total duration."""
+        if self.finished:
+            return
+        now = self.now()
+        if self._phase is not None and self._phase.end is None:
+            self._phase.end = now
+        self.total = now
+        self.finished = True
+
+    def phase_durations(self) -> Dict[str, float]:
+        """Seconds spent in each phase."""
+        durations: Dict[str, float] = {}
+        for span in self.spans:
+            if span.kind == "phase":
+                durations[span.name] = durations.get(span.name, 0.0) + span.duration
+        return durations
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "total": self.total if self.finished else self.now(),
+            "phases": self.phase_durations(),
+            "spans": [asdict(span) for span in self.spans],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+class LatencyHistogram:
+    """
+    Duration histograms of spans across requests, keyed by "kind:name"
+    (e.g. "phase:ExecuteTools", "tool:get_weather", "llm:planning"), plus
+    "request:total".
+    """
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def observe(self, key: str, seconds: float) -> None:
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(self.buckets_ms) if ms <= bound), len(self.buckets_ms))
+        with self._lock:
+            entry = self.metrics.setdefault(key, {
+                "count": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": [0] * (len(self.buckets_ms) + 1),
+            })
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["buckets"][index] += 1
+
+    def observe_trace(self, trace: RequestTrace) -> None:
+        """Add every span of a finished trace, and its total."""
+        for span in trace.spans:
+            self.observe(f"{span.kind}:{span.name}", span.duration)
+        self.observe("request:total", trace.total)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get per-key counts, average/max and the share of request time, with
+        buckets labelled by their upper bound in ms.
+        """
+        labels = [f"<={bound:g}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]:g}ms"]
+        with self._lock:
+            entries = {key: dict(entry) for key, entry in self.metrics.items()}
+        request_ms = entries.get("request:total", {}).get("total_ms", 0.0)
+        metrics = {}
+        for key, entry in sorted(entries.items()):
+            metrics[key] = {
+                "count": entry["count"],
+                "avg_ms": entry["total_ms"] / entry["count"],
+                "max_ms": entry["max_ms"],
+                "share": entry["total_ms"] / request_ms if request_ms else 0.0,
+                "buckets": dict(zip(labels, entry["buckets"])),
+            }
+        return metrics
+
+    def reset_metrics(self) -> None:
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+
+
+latency_histogram = LatencyHistogram()
+recent_traces: Deque[RequestTrace] = deque(maxlen=RECENT_TRACES)
+
+
+def _export(trace: RequestTrace) -> None:
+    path = os.environ.get("AGENT_TRACE_FILE")
+    if not path:
+        return
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(trace.to_json() + "\n")
+    except OSError as e:
+        logger.warning(f"Could not write trace to {path}: {e}")
+
+
+@contextmanager
+def trace_scope() -> Iterator[RequestTrace]:
+    """
+    Trace the request run within this block.
+
+    On exit the trace is finished, added to ``latency_histogram`` and
+    ``recent_traces``, and exported to AGENT_TRACE_FILE.
+    """
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        latency_histogram.observe_trace(trace)
+        recent_traces.append(trace)
+        _export(trace)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Get the trace of the request being planned, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def traced(kind: str, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record the block as a span of the current trace; a no-op outside a request."""
+    trace = current_trace()
+    if trace is None:
+        yield None
+        return
+    with trace.span(kind, name, **attributes) as span:
+        yield span
+
+
+def enter_phase(phase: Phase) -> None:
+    """Move the current trace (if any) into ``phase``."""
+    trace = current_trace()
+    if trace is not None:
+        trace.enter(phase)
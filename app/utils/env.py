@@ -0,0 +1,71 @@
+"""
+Numeric settings read from environment variables.
+
+A setting that is unset, not a number or out of range falls back to its
+default (with a warning), so a typo in the environment cannot stop the
+agent from starting or break it later on.
+"""
+
+import logging
+import math
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def _fallback(name: str, raw: str, default, reason: str):
+    logger.warning(f"Ignoring {name}={raw!r} ({reason}); using {default}")
+    return default
+
+
+def env_int(name: str, default: int, minimum: int = 1) -> int:
+    """
+    Read an integer setting.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or invalid
+        minimum: Smallest accepted value
+
+    Returns:
+        The configured value, or ``default``
+    """
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        return _fallback(name, raw, default, "not an integer")
+    if value < minimum:
+        return _fallback(name, raw, default, f"below {minimum}")
+    return value
+
+
+def env_float(name: str, default: float, minimum: float = 0.0, inclusive: bool = False) -> float:
+    """
+    Read a number setting.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or invalid
+        minimum: Lower bound for the value
+        inclusive: Whether ``minimum`` itself is accepted (by default the
+                   value must be greater than it)
+
+    Returns:
+        The configured value, or ``default``
+    """
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        return _fallback(name, raw, default, "not a number")
+    if not math.isfinite(value):
+        return _fallback(name, raw, default, "not finite")
+    if value < minimum or (value == minimum and not inclusive):
+        bound = "below" if inclusive else "not above"
+        return _fallback(name, raw, default, f"{bound} {minimum}")
+    return value
@@ -0,0 +1,199 @@
+"""
+Minimal HTTP/1.1 server on asyncio streams.
+
+Used by the agent service and local stand-in servers so they can run on a
+single event loop without pulling in a web framework.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+@dataclass
+class HttpRequest:
+    """Parsed HTTP request."""
+    method: str
+    path: str
+    query: Dict[str, list] = field(default_factory=dict)
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    def json(self) -> Any:
+        """Decode the body as JSON."""
+        return json.loads(self.body.decode("utf-8")) if self.body else None
+
+
+@dataclass
+class HttpResponse:
+    """
+    HTTP response to send back to the client.
+
+    When ``stream`` is set the body is sent with chunked transfer encoding,
+    one chunk per item, as the iterator produces them (e.g. server-sent events).
+    """
+    status: int = 200
+    body: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+    stream: Optional[AsyncIterator[bytes]] = None
+
+
+def json_response(data: Any, status: int = 200) -> HttpResponse:
+    """Build a JSON response from a Python object or an already-encoded JSON string."""
+    body = data if isinstance(data, str) else json.dumps(data)
+    return HttpResponse(
+        status=status,
+        body=body.encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+Handler = Callable[[HttpRequest], Awaitable[HttpResponse]]
+
+
+class AsyncHttpServer:
+    """
+    Keep-alive HTTP/1.1 server that dispatches every request to one async handler.
+    """
+
+    def __init__(self, handler: Handler, host: str = "127.0.0.1", port: int = 8080,
+                 max_body_bytes: int = MAX_BODY_BYTES):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.max_body_bytes = max_body_bytes
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        """Start listening; with port 0 the bound port is stored in ``self.port``."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"HTTP server listening on http://{self.host}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        """Stop listening and close open keep-alive connections."""
+        if self._server is not None:
+            self._server.close()
+            connections = dict(self._connections)
+            for writer in connections:
+                writer.close()
+            await asyncio.gather(*connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[HttpRequest]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, target, _version = request_line.decode("latin-1").strip().split(" ", 2)
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0) or 0)
+        if length > self.max_body_bytes:
+            raise ValueError("payload too large")
+        body = await reader.readexactly(length) if length else b""
+
+        parts = urlsplit(target)
+        return HttpRequest(
+            method=method.upper(),
+            path=parts.path,
+            query=parse_qs(parts.query),
+            headers=headers,
+            body=body,
+        )
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, response: HttpResponse, keep_alive: bool) -> None:
+        length = {"Transfer-Encoding": "chunked"} if response.stream is not None else {
+            "Content-Length": str(len(response.body)),
+        }
+        headers = {
+            **length,
+            "Connection": "keep-alive" if keep_alive else "close",
+            **response.headers,
+        }
+        head = f"HTTP/1.1 {response.status} {REASONS.get(response.status, 'Unknown')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        if response.stream is None:
+            writer.write(head.encode("latin-1") + b"\r\n" + response.body)
+            await writer.drain()
+            return
+
+        writer.write(head.encode("latin-1") + b"\r\n")
+        try:
+            async for chunk in response.stream:
+                if chunk:
+                    writer.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+                    await writer.drain()
+        finally:
+            # Stop the producer right away when the client goes away
+            if hasattr(response.stream, "aclose"):
+                await response.stream.aclose()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError as e:
+                    status = 413 if "too large" in str(e) else 400
+                    await self._write_response(writer, json_response({"error": str(e)}, status), False)
+                    break
+                if request is None:
+                    break
+
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                try:
+                    response = await self.handler(request)
+                except Exception as e:
+                    logger.error(f"Unhandled error serving {request.method} {request.path}: {e}")
+                    response = json_response({"error": str(e)}, 500)
+                await self._write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
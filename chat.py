@@ -7,8 +7,7 @@ Run this to start chatting with the travel agent!
 import os
 import sys
 import json
-import asyncio
-from app.main import run_request
+from app.main import run_request_stream, run_sync
 
 def main():
     """Interactive chat interface for the travel agent"""
@@ -67,16 +66,9 @@ def main():
             print("\n🤖 Agent: Let me help you plan your trip...")
             
             try:
-                # Direct synchronous call since run_request handles asyncio.run
-                result = run_request(user_input)
-                
-                # Parse and display the result
-                try:
-                    plan_data = json.loads(result)
-                    display_plan(plan_data)
-                except json.JSONDecodeError:
-                    print("❌ Error: Could not parse the JSON response")
-                    print(f"Raw response: {result}")
+                # Stream the plan so each section shows up as soon as it is ready.
+                # Every turn runs on the same loop, so kernels are reused
+                run_sync(display_plan_stream(run_request_stream(user_input)))
                     
             except Exception as e:
                 print(f"❌ Error during request: {e}")
@@ -90,6 +82,92 @@ def main():
             print(f"\n❌ Error: {e}")
             print("Please try again or type 'help' for assistance.")
 
+def _print_items(title, items):
+    """Print up to three restaurants/attractions (strings or dicts)"""
+    print(title)
+    print("-" * 30)
+    for i, item in enumerate(items[:3], 1):
+        # Handle both string and dict items
+        if isinstance(item, str):
+            print(f"{i}. {item}")
+        elif isinstance(item, dict):
+            name = item.get('name', item.get('title', 'N/A'))
+            print(f"{i}. {name}")
+            desc = item.get('description', item.get('snippet'))
+            if desc:
+                print(f"   {desc[:100]}...")
+    print()
+
+def render_header(plan):
+    """Banner with destination and dates"""
+    print("\n" + "="*60)
+    print("🎯 TRAVEL PLAN")
+    print("="*60)
+    
+    # Destination and dates
+    print(f"📍 Destination: {plan.get('destination', 'N/A')}")
+    print(f"📅 Travel Dates: {plan.get('travel_dates', plan.get('dates', 'N/A'))}")
+    print()
+
+def render_weather(weather):
+    print("🌤️  WEATHER")
+    print("-" * 30)
+    print(f"Temperature: {weather.get('temperature_c', weather.get('temperature', 'N/A'))}°C")
+    print(f"Conditions: {weather.get('conditions', weather.get('condition', 'N/A'))}")
+    print(f"Recommendation: {weather.get('recommendation', 'N/A')}")
+    print()
+
+def render_restaurants(restaurants):
+    _print_items("🍽️  RESTAURANTS", restaurants)
+
+def render_attractions(attractions):
+    _print_items("🏛️  ATTRACTIONS", attractions)
+
+def render_card(card):
+    print("💳 CARD RECOMMENDATION")
+    print("-" * 30)
+    if isinstance(card, dict):
+        print(f"Card: {card.get('card', card.get('recommendedCard', 'N/A'))}")
+        print(f"Benefit: {card.get('benefit', card.get('benefits', 'N/A'))}")
+        print(f"FX Fee: {card.get('fx_fee', card.get('fxFee', 'N/A'))}")
+    else:
+        print(f"Card: {card}")
+    print()
+
+def render_currency(currency):
+    print("💰 CURRENCY INFO")
+    print("-" * 30)
+    if isinstance(currency, dict):
+        print(f"Currency: {currency.get('name', currency.get('currency', 'N/A'))}")
+        print(f"Sample Meal: ${currency.get('sample_meal_usd', 'N/A')}")
+        if currency.get('sample_meal_eur'):
+            print(f"Sample Meal (EUR): €{currency['sample_meal_eur']}")
+        if currency.get('usd_to_eur'):
+            print(f"Exchange Rate: 1 USD = {currency['usd_to_eur']} EUR")
+    else:
+        print(f"Currency: {currency}")
+    print()
+
+def render_next_steps(steps):
+    print("📋 NEXT STEPS")
+    print("-" * 30)
+    for i, step in enumerate(steps, 1):
+        print(f"{i}. {step}")
+    print()
+
+def render_footer():
+    print("="*60)
+
+# Renderers for the sections emitted by app.main.run_request_stream
+SECTION_RENDERERS = {
+    "requirements": render_header,
+    "weather": render_weather,
+    "results": render_restaurants,
+    "card_recommendation": render_card,
+    "currency_info": render_currency,
+    "next_steps": render_next_steps,
+}
+
 def display_plan(plan_data):
     """Display the travel plan in a formatted way"""
     if "plan" not in plan_data:
@@ -102,97 +180,57 @@ def display_plan(plan_data):
     if "trip" in plan:
         plan = plan["trip"]
     
-    print("\n" + "="*60)
-    print("🎯 TRAVEL PLAN")
-    print("="*60)
-    
-    # Destination and dates
-    print(f"📍 Destination: {plan.get('destination', 'N/A')}")
-    print(f"📅 Travel Dates: {plan.get('travel_dates', plan.get('dates', 'N/A'))}")
-    print()
+    render_header(plan)
     
     # Weather
     weather = plan.get('weather', plan.get('weatherInfo'))
     if weather:
-        print("🌤️  WEATHER")
-        print("-" * 30)
-        print(f"Temperature: {weather.get('temperature_c', weather.get('temperature', 'N/A'))}°C")
-        print(f"Conditions: {weather.get('conditions', weather.get('condition', 'N/A'))}")
-        print(f"Recommendation: {weather.get('recommendation', 'N/A')}")
-        print()
+        render_weather(weather)
     
     # Restaurants and Attractions
     restaurants = plan.get('restaurants', plan.get('results', []))
     attractions = plan.get('attractions', [])
-    
     if restaurants:
-        print("🍽️  RESTAURANTS")
-        print("-" * 30)
-        for i, item in enumerate(restaurants[:3], 1):
-            # Handle both string and dict items
-            if isinstance(item, str):
-                print(f"{i}. {item}")
-            elif isinstance(item, dict):
-                name = item.get('name', item.get('title', 'N/A'))
-                print(f"{i}. {name}")
-                desc = item.get('description', item.get('snippet'))
-                if desc:
-                    print(f"   {desc[:100]}...")
-        print()
-    
+        render_restaurants(restaurants)
     if attractions:
-        print("🏛️  ATTRACTIONS")
-        print("-" * 30)
-        for i, item in enumerate(attractions[:3], 1):
-            # Handle both string and dict items
-            if isinstance(item, str):
-                print(f"{i}. {item}")
-            elif isinstance(item, dict):
-                name = item.get('name', item.get('title', 'N/A'))
-                print(f"{i}. {name}")
-                desc = item.get('description', item.get('snippet'))
-                if desc:
-                    print(f"   {desc[:100]}...")
-        print()
+        render_attractions(attractions)
     
     # Card recommendation
     card = plan.get('card_recommendation', plan.get('cardRecommendations', plan.get('credit_card')))
     if card:
-        print("💳 CARD RECOMMENDATION")
-        print("-" * 30)
-        if isinstance(card, dict):
-            print(f"Card: {card.get('card', card.get('recommendedCard', 'N/A'))}")
-            print(f"Benefit: {card.get('benefit', card.get('benefits', 'N/A'))}")
-            print(f"FX Fee: {card.get('fx_fee', card.get('fxFee', 'N/A'))}")
-        else:
-            print(f"Card: {card}")
-        print()
+        render_card(card)
     
     # Currency info
     currency = plan.get('currency_info', plan.get('currency'))
     if currency:
-        print("💰 CURRENCY INFO")
-        print("-" * 30)
-        if isinstance(currency, dict):
-            print(f"Currency: {currency.get('name', currency.get('currency', 'N/A'))}")
-            print(f"Sample Meal: ${currency.get('sample_meal_usd', 'N/A')}")
-            if currency.get('sample_meal_eur'):
-                print(f"Sample Meal (EUR): €{currency['sample_meal_eur']}")
-            if currency.get('usd_to_eur'):
-                print(f"Exchange Rate: 1 USD = {currency['usd_to_eur']} EUR")
-        else:
-            print(f"Currency: {currency}")
-        print()
+        render_currency(currency)
     
     # Next steps
     if 'next_steps' in plan and plan['next_steps']:
-        print("📋 NEXT STEPS")
-        print("-" * 30)
-        for i, step in enumerate(plan['next_steps'], 1):
-            print(f"{i}. {step}")
-        print()
+        render_next_steps(plan['next_steps'])
     
-    print("="*60)
+    render_footer()
+
+async def display_plan_stream(events):
+    """
+    Render plan sections progressively as they arrive from run_request_stream.
+    
+    Returns:
+        The complete plan dict, or None if planning failed
+    """
+    async for event in events:
+        section, data = event["section"], event["data"]
+        if section == "plan":
+            render_footer()
+            return data
+        if section == "error":
+            print(f"❌ Error: {data}")
+            return None
+        renderer = SECTION_RENDERERS.get(section)
+        if renderer and data:
+            renderer(data)
+            sys.stdout.flush()
+    return None
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
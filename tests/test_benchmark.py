@@ -0,0 +1,77 @@
+"""
+Unit tests for the end-to-end benchmark suite
+"""
+
+import asyncio
+from app.mock_openai import MockSettings
+from app.scripts.benchmark import (
+    InMemoryContainer,
+    RunConfig,
+    StandIns,
+    benchmark,
+    compare,
+    percentile,
+    query_for,
+)
+
+
+def results(**scenarios):
+    return {"scenarios": scenarios}
+
+
+class TestBenchmarkHelpers:
+    """Test cases for percentiles, queries and run-over-run comparison"""
+
+    def test_percentile_nearest_rank(self):
+        """Test that percentiles use the nearest rank of the samples"""
+        samples = [float(value) for value in range(100, 0, -1)]
+        assert percentile(samples, 0.50) == 50.0
+        assert percentile(samples, 0.99) == 99.0
+        assert percentile([], 0.95) == 0.0
+
+    def test_queries_are_distinct(self):
+        """Test that benchmark requests do not repeat (no cache or single-flight hits)"""
+        queries = [query_for(index) for index in range(100)]
+        assert len(set(queries)) == len(queries)
+
+    def test_compare_flags_regressions(self):
+        """Test that slower p95 and lower throughput beyond the threshold are reported"""
+        baseline = results(tools={"throughput": 100.0, "p95_ms": 10.0, "p99_ms": 12.0})
+        current = results(tools={"throughput": 80.0, "p95_ms": 10.5, "p99_ms": 20.0}, retrieve={"throughput": 1.0})
+
+        regressions = compare(current, baseline, threshold=0.1)
+
+        assert [line.split(":")[0] for line in regressions] == ["tools.throughput", "tools.p99_ms"]
+
+    def test_in_memory_container_queries(self):
+        """Test that the Cosmos stand-in answers vector and session queries"""
+        container = InMemoryContainer()
+        container.upsert_item({"id": "a", "content": "x", "source": "s", "vector": [1.0, 0.0]})
+        container.upsert_item({"id": "b", "content": "y", "source": "s", "vector": [0.0, 1.0]})
+        container.upsert_item({"id": "m", "session_id": "s1", "pk": "memory", "content": "z"})
+
+        nearest = list(container.query_items("", [{"name": "@embedding", "value": [0.1, 0.9]},
+                                                  {"name": "@top_k", "value": 1}]))
+        memories = list(container.query_items("", [{"name": "@session_id", "value": "s1"}]))
+
+        assert [item["content"] for item in nearest] == ["y"]
+        assert [item["id"] for item in memories] == ["m"]
+
+
+class TestBenchmarkScenarios:
+    """Test cases for running scenarios against the stand-ins"""
+
+    def test_tools_and_memory_scenarios(self):
+        """Test that scenarios run without errors and report latency and allocations"""
+        config = RunConfig(iterations=5, concurrency=2, warmup=1)
+        with StandIns(MockSettings(embedding_dim=256)):
+            reports = {
+                name: asyncio.run(benchmark(name, config))
+                for name in ("tools", "short_term_memory", "long_term_memory", "memory_pruning", "retrieve")
+            }
+
+        for report in reports.values():
+            assert report["errors"] == 0
+            assert report["throughput"] > 0
+            assert report["p50_ms"] <= report["p95_ms"] <= report["p99_ms"]
+            assert "alloc_peak_kb" in report
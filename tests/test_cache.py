@@ -0,0 +1,65 @@
+"""
+Unit tests for the in-process caches
+"""
+
+import time
+import pytest
+from app.cache import LRUCache, normalize_query
+
+
+class TestNormalizeQuery:
+    """Test cases for cache key normalization"""
+
+    def test_ignores_case_punctuation_and_whitespace(self):
+        """Test that near-identical queries share a key"""
+        assert normalize_query("Paris, June 1-8 BankGold!") == normalize_query("paris june 1-8   bankgold")
+
+    def test_keeps_date_separators(self):
+        """Test that characters meaningful in dates are kept"""
+        assert normalize_query("2026-06-01 to 2026/06/08") == "2026-06-01 to 2026/06/08"
+
+
+class TestLRUCache:
+    """Test cases for LRUCache class"""
+
+    def test_get_and_set(self):
+        """Test basic storage with hit/miss metrics"""
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+        metrics = cache.get_metrics()
+        assert metrics["hits"] == 1
+        assert metrics["misses"] == 1
+        assert metrics["hit_rate"] == 0.5
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.get_metrics()["evictions"] == 1
+
+    def test_entries_expire(self):
+        """Test that entries past their TTL are treated as misses"""
+        cache = LRUCache(max_size=4, ttl=0.01)
+        cache.set("short", 1)
+        cache.set("long", 2, ttl=60)
+        time.sleep(0.02)
+
+        assert cache.get("short") is None
+        assert cache.get("long") == 2
+        assert cache.get_metrics()["expirations"] == 1
+
+    def test_invalid_size(self):
+        """Test that a cache must hold at least one entry"""
+        with pytest.raises(ValueError):
+            LRUCache(max_size=0)
@@ -0,0 +1,95 @@
+"""
+Unit tests for the offline climatology table
+"""
+
+import os
+from datetime import date
+import pytest
+from app.climate import DEFAULT_TABLE_PATH, ClimateIndex, build_table, cell_of, climate_normals
+
+HEADER = "name,lat,lon," + ",".join(f"max_{m:02d}" for m in range(1, 13)) + "," + \
+    ",".join(f"min_{m:02d}" for m in range(1, 13)) + "\n"
+
+
+def normals_row(name, lat, lon, max_temp, min_temp):
+    return f"{name},{lat},{lon}," + ",".join([str(max_temp)] * 12) + "," + ",".join([str(min_temp)] * 12) + "\n"
+
+
+@pytest.fixture
+def small_table(tmp_path):
+    source = tmp_path / "normals.csv"
+    source.write_text(
+        HEADER
+        + normals_row("Paris", 48.8566, 2.3522, 20.0, 10.0)
+        + normals_row("Paris suburb", 48.9, 2.4, 22.0, 12.0)
+        + normals_row("Sydney", -33.8688, 151.2093, 25.0, 18.0),
+        encoding="utf-8",
+    )
+    path = tmp_path / "climatology.bin"
+    assert build_table(str(source), str(path)) == 2
+    index = ClimateIndex(str(path))
+    yield index
+    index.close()
+
+
+class TestClimateIndex:
+    """Test cases for the memory-mapped climatology table"""
+
+    def test_places_in_a_cell_are_averaged(self, small_table):
+        """Test that normals are per grid cell"""
+        normals = small_table.normals(48.8566, 2.3522)
+        assert (normals.lat, normals.lon) == (48.75, 2.25)
+        assert normals.max_temp == [21.0] * 12
+        assert normals.min_temp == [11.0] * 12
+
+    def test_nearest_cell_within_search_range(self, small_table):
+        """Test that a point near a cell with normals uses it and a remote point gets none"""
+        assert small_table.normals(49.2, 3.1).max_temp[0] == 21.0
+        assert small_table.normals(-34.2, 151.0).min_temp[0] == 18.0
+        assert small_table.normals(0.0, -30.0) is None
+
+    def test_cell_edges(self):
+        """Test that points on a cell edge land in the cell they start"""
+        assert cell_of(41.5, -0.5) == (83, -1)
+        assert cell_of(-0.1, 0.1) == (-1, 0)
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file that is not a table is refused"""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"not a table at all")
+        with pytest.raises(ValueError):
+            ClimateIndex(str(path))
+
+
+class TestMonthlyNormals:
+    """Test cases for daily values from monthly normals"""
+
+    def test_interpolated_between_months(self):
+        """Test that mid-month days get the monthly mean and other days are interpolated"""
+        normals = ClimateIndex(DEFAULT_TABLE_PATH).normals(48.8566, 2.3522)
+        june, july = normals.max_temp[5], normals.max_temp[6]
+
+        assert normals.on(date(2026, 6, 15))[0] == pytest.approx(june, abs=0.2)
+        assert june < normals.on(date(2026, 6, 30))[0] < july
+        assert normals.on(date(2026, 12, 31)) == pytest.approx(normals.on(date(2027, 1, 1)), abs=0.1)
+
+
+class TestBundledTable:
+    """Test cases for the bundled table"""
+
+    def test_table_is_current(self, tmp_path):
+        """Test that the bundled table matches its CSV source"""
+        rebuilt = tmp_path / "climatology.bin"
+        build_table(table_path=str(rebuilt))
+        with open(DEFAULT_TABLE_PATH, "rb") as bundled:
+            assert bundled.read() == rebuilt.read_bytes()
+
+    def test_destinations_have_normals(self):
+        """Test that gazetteer cities resolve to plausible normals"""
+        paris = climate_normals(48.8566, 2.3522)
+        sydney = climate_normals(-33.8688, 151.2093)
+
+        assert paris.max_temp[6] > paris.max_temp[0]
+        assert sydney.max_temp[0] > sydney.max_temp[6]
+        assert all(high > low for high, low in zip(paris.max_temp, paris.min_temp))
+        assert os.path.getsize(DEFAULT_TABLE_PATH) < 16 * 1024
@@ -0,0 +1,131 @@
+"""
+Unit tests for tool-result compaction
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from semantic_kernel import Kernel
+from semantic_kernel.functions import FunctionResult
+from app.compaction import (
+    MAX_SEARCH_CHARS,
+    CompactionStats,
+    compact_tool_result,
+    compaction_stats,
+    travel_dates_scope,
+)
+from app.filters import ToolResultCompactionFilter
+from app.token_budget import count_tokens
+from app.tools.card import CardTools
+
+WEATHER = json.dumps({
+    "dates": [f"2026-06-{day:02d}" for day in range(1, 11)],
+    "max_temp": [24] * 10,
+    "min_temp": [15.3] * 10,
+    "code": [3] * 10,
+}, indent=1)
+
+
+class TestCompactors:
+    """Test cases for per-tool compaction"""
+
+    def test_weather_trimmed_to_travel_dates(self):
+        """Test that only travel days are kept, with numeric values"""
+        with travel_dates_scope({"dates": "2026-06-03 to 2026-06-05"}):
+            result = json.loads(compact_tool_result("get_weather", WEATHER))
+        assert result == {
+            "dates": ["2026-06-03", "2026-06-04", "2026-06-05"],
+            "max_temp": [24, 24, 24], "min_temp": [15.3, 15.3, 15.3], "code": [3, 3, 3],
+        }
+
+    def test_weather_without_dates_keeps_all_days(self):
+        """Test that unknown dates keep the whole forecast, still compacted"""
+        result = compact_tool_result("get_weather", WEATHER)
+        assert len(json.loads(result)["dates"]) == 10
+        assert len(result) < len(WEATHER)
+
+    def test_weather_beyond_forecast_range(self):
+        """Test travel dates outside the forecast"""
+        with travel_dates_scope({"dates": "2026-09-01 to 2026-09-05"}):
+            result = json.loads(compact_tool_result("get_weather", WEATHER))
+        assert result["dates"] == []
+        assert "beyond" in result["note"]
+
+    def test_weather_climate_normals_kept(self):
+        """Test that climate-normal days keep their marker and have no weather code"""
+        value = json.dumps({
+            "dates": ["2026-06-01", "2026-06-02", "2026-06-03"], "max_temp": [24, 21.5, 21.6],
+            "min_temp": [14, 12.4, 12.5], "code": [1, None, None], "climatology_from": "2026-06-02",
+        }, indent=1)
+        with travel_dates_scope({"dates": "2026-06-02 to 2026-06-03"}):
+            result = json.loads(compact_tool_result("get_weather", value))
+        assert result == {
+            "dates": ["2026-06-02", "2026-06-03"], "max_temp": [21.5, 21.6], "min_temp": [12.4, 12.5],
+            "climatology_from": "2026-06-02",
+        }
+
+    def test_weather_batch_trims_each_location(self):
+        """Test that every location of a batch is trimmed to the travel dates"""
+        batch = json.dumps({"locations": [
+            {"name": "Paris", "lat": 48.85, "lon": 2.35, **json.loads(WEATHER)},
+            {"name": "Atlantis", "lat": 0.0, "lon": 0.0, "error": "No forecast"},
+        ]})
+        with travel_dates_scope({"dates": "2026-06-03 to 2026-06-04"}):
+            result = json.loads(compact_tool_result("get_weather_batch", batch))
+        paris, atlantis = result["locations"]
+        assert paris["name"] == "Paris"
+        assert paris["max_temp"] == [24, 24]
+        assert atlantis["error"] == "No forecast"
+
+    def test_search_truncated_with_sources(self):
+        """Test that long search text is cut and its sources kept"""
+        text = "Great food here.   " * 150 + "See https://example.com/paris-food for more."
+        result = compact_tool_result("web_search", text)
+        assert len(result) < MAX_SEARCH_CHARS + 100
+        assert result.endswith("Sources: https://example.com/paris-food")
+        assert "  " not in result
+
+    def test_knowledge_drops_scores(self):
+        """Test that similarity scores are dropped and snippets truncated"""
+        snippets = json.dumps([{"content": "x" * 1000, "source": "cards.md", "score": 0.123456}])
+        result = json.loads(compact_tool_result("search_knowledge", snippets))
+        assert set(result[0]) == {"content", "source"}
+        assert len(result[0]["content"]) < 500
+
+    def test_errors_and_small_results_unchanged(self):
+        """Test that errors and results that cannot shrink pass through"""
+        error = json.dumps({"error": "Place not found"})
+        assert compact_tool_result("get_weather", error) is error
+        assert compact_tool_result("convert_fx", "100.0 USD = 92.00 EUR") == "100.0 USD = 92.00 EUR"
+
+
+class TestCompactionStats:
+    """Test cases for CompactionStats class"""
+
+    def test_savings(self):
+        """Test character and token savings per tool"""
+        stats = CompactionStats()
+        stats.record("get_weather", "x" * 400, "x" * 100)
+        metrics = stats.get_metrics()
+        saved = count_tokens("x" * 400) - count_tokens("x" * 100)
+        assert metrics["tokens_saved"] == saved
+        assert metrics["tokens_saved_by_tool"] == {"get_weather": saved}
+        assert metrics["reduction"] == 0.75
+
+
+class TestCompactionFilter:
+    """Test cases for compacting results of model-initiated tool calls"""
+
+    def test_filter_replaces_function_result(self):
+        """Test that the auto function invocation filter compacts the result"""
+        function = Kernel().add_plugin(CardTools(), plugin_name="Card")["get_card_recommendation"]
+        context = SimpleNamespace(function=SimpleNamespace(name="get_weather"), function_result=None)
+
+        async def next_filter(ctx):
+            ctx.function_result = FunctionResult(function=function.metadata, value=WEATHER)
+
+        before = compaction_stats.get_metrics()["results"]
+        asyncio.run(ToolResultCompactionFilter()(context, next_filter))
+
+        assert len(context.function_result.value) < len(WEATHER)
+        assert compaction_stats.get_metrics()["results"] == before + 1
@@ -0,0 +1,188 @@
+"""
+Unit tests for request deadlines and graceful degradation
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from semantic_kernel import Kernel
+from semantic_kernel.functions import kernel_function
+from app import main
+from app.deadline import (
+    DEFAULT_REQUEST_DEADLINE, Deadline, DeadlineExceeded, DeadlineStats, deadline_scope, request_deadline_seconds,
+    within_deadline,
+)
+from app.models import TripPlan
+from app.prefetch import ToolCall, execute_prefetch
+from app.requirements_parser import parse_requirements
+from app.state import AgentState, Phase
+from app.synthesis import partial_tripplan
+from app.tools.card import CardTools
+
+
+class HangingWeatherTools:
+    @kernel_function(name="get_weather", description="Fake weather that never answers in time")
+    async def get_weather(self, lat: float, lon: float) -> str:
+        await asyncio.sleep(5)
+        return "{}"
+
+
+class TestDeadline:
+    """Test cases for Deadline class"""
+
+    def test_call_timeout_uses_phase_share(self):
+        """Test that a call gets its cap or the phase's share of the time left"""
+        deadline = Deadline(10)
+        assert deadline.call_timeout(2.0, Phase.ExecuteTools) == 2.0
+        assert deadline.call_timeout(8.0, Phase.ClarifyRequirements) == pytest.approx(4.0, abs=0.01)
+        assert not deadline.expired
+
+    def test_timeout_raises_deadline_exceeded(self):
+        """Test that slow calls are cancelled with DeadlineExceeded"""
+        async def run():
+            with deadline_scope(Deadline(0.05)):
+                await within_deadline(asyncio.sleep(1), 5.0, Phase.ExecuteTools)
+
+        with pytest.raises(DeadlineExceeded) as error:
+            asyncio.run(run())
+        assert error.value.phase is Phase.ExecuteTools
+
+    def test_invalid_request_deadline_falls_back(self, monkeypatch):
+        """Test that a malformed AGENT_REQUEST_DEADLINE uses the default"""
+        monkeypatch.setenv("AGENT_REQUEST_DEADLINE", "30s")
+        assert request_deadline_seconds() == DEFAULT_REQUEST_DEADLINE
+        monkeypatch.setenv("AGENT_REQUEST_DEADLINE", "12.5")
+        assert request_deadline_seconds() == 12.5
+
+    def test_stats(self):
+        """Test timeouts per phase and the degraded rate"""
+        stats = DeadlineStats()
+        stats.record_request()
+        stats.record_request()
+        stats.record_timeout(Phase.ExecuteTools)
+        stats.record_degraded()
+        metrics = stats.get_metrics()
+        assert metrics["timeouts_by_phase"] == {"ExecuteTools": 1}
+        assert metrics["degraded_rate"] == 0.5
+
+
+class TestAgentStateDeadline:
+    """Test cases for deadline and iteration limits in AgentState"""
+
+    def test_expired_deadline_skips_to_synthesis(self):
+        """Test that no tool phases are entered once the deadline has passed"""
+        state = AgentState()
+        state.deadline = Deadline(0)
+        state.advance()
+        assert state.phase == Phase.Synthesize
+
+    def test_iteration_limit(self):
+        """Test that max_iterations is enforced"""
+        state = AgentState()
+        state.max_iterations = 1
+        state.advance()
+        assert state.phase == Phase.Synthesize
+        assert state.remaining_iterations == 0
+
+
+class TestDegradation:
+    """Test cases for degrading instead of waiting past the deadline"""
+
+    def test_slow_extraction_uses_fast_path_requirements(self):
+        """Test that the partial fast-path parse is used when the LLM is too slow"""
+        async def slow_llm(kernel, user_input):
+            await asyncio.sleep(1)
+            return {"destination": "Lisbon"}
+
+        parsed = parse_requirements("somewhere warm in Lisbon")
+
+        async def run():
+            with deadline_scope(Deadline(0.1)):
+                return await main.extract_requirements(None, "somewhere warm in Lisbon", parsed)
+
+        with patch("app.main.extract_requirements_with_llm", side_effect=slow_llm):
+            assert asyncio.run(run()) == parsed.requirements
+
+    def test_slow_tool_left_out_of_prefetch(self):
+        """Test that a tool over its timeout does not hold up the others"""
+        kernel = Kernel()
+        kernel.add_plugin(HangingWeatherTools(), plugin_name="Weather")
+        kernel.add_plugin(CardTools(), plugin_name="Card")
+        calls = [
+            ToolCall("weather", "Weather", "get_weather", {"lat": 1.0, "lon": 2.0}),
+            ToolCall("card", "Card", "get_card_recommendation", {"card_name": "BankGold"}),
+        ]
+
+        async def run():
+            with deadline_scope(Deadline(0.2)):
+                return await execute_prefetch(kernel, calls)
+
+        assert list(asyncio.run(run())) == ["card"]
+
+    def test_request_deadline_returns_partial_plan(self, monkeypatch):
+        """Test that the request backstop answers with a valid partial TripPlan"""
+        async def hanging(pool, user_input, emit=None):
+            await asyncio.sleep(5)
+
+        monkeypatch.setenv("AGENT_REQUEST_DEADLINE", "0.1")
+        with patch("app.main.get_kernel_pool"), \
+             patch("app.main._plan_with_pool", side_effect=hanging):
+            output = json.loads(asyncio.run(main.run_request_async("Paris June 1-8")))
+
+        assert output["partial"] is True
+        assert output["plan"]["destination"] == "Paris"
+        assert output["plan"]["card_recommendation"]["card"] == "Unknown"
+        TripPlan.model_validate(output["plan"])
+
+    def test_exhausted_budget_skips_tools_and_planning(self):
+        """Test that no tools or model calls run once the deadline has passed"""
+        kernel = Kernel()
+        kernel.add_plugin(HangingWeatherTools(), plugin_name="Weather")
+
+        async def run():
+            with deadline_scope(Deadline(0)):
+                return await main._run_plan(kernel, "Paris June 1-8", {"destination": "Paris", "dates": "June 1-8"})
+
+        with patch("app.main.execute_prefetch") as prefetch:
+            output = json.loads(asyncio.run(run()))
+
+        prefetch.assert_not_called()
+        assert output["partial"] is True
+        assert output["reason"] == "Request budget exhausted"
+        TripPlan.model_validate(output["plan"])
+
+    def test_plan_stream_closed_in_the_task_reading_it(self, monkeypatch):
+        """Test that the planning stream is opened, read and closed in one task under the deadline"""
+        monkeypatch.delenv("AGENT_CASSETTE", raising=False)
+        tasks = []
+
+        class ClosingChat:
+            async def get_streaming_chat_message_content(self, chat_history, settings, kernel):
+                tasks.append(asyncio.current_task())
+                try:
+                    yield '{"plan": {"destination": "Paris"}}'
+                    yield " trailing text"
+                finally:
+                    tasks.append(asyncio.current_task())
+
+        async def run():
+            with deadline_scope(Deadline(5)):
+                return await main._run_plan(Kernel(), "Paris", {"destination": "Atlantis"})
+
+        with patch.object(Kernel, "get_service", return_value=ClosingChat()), \
+             patch("app.main.response_cache.put"):
+            asyncio.run(run())
+
+        assert len(tasks) == 2 and tasks[0] is tasks[1]
+
+    def test_partial_plan_keeps_streamed_fields(self):
+        """Test that fields the model already produced are kept"""
+        output = json.loads(partial_tripplan(
+            {"fx": "100.0 USD = 92.00 EUR"}, {"destination": "Paris"},
+            {"next_steps": ["Book a table"]}, "timed out",
+        ))
+        assert output["plan"]["next_steps"] == ["Book a table"]
+        assert output["plan"]["travel_dates"] == "Unknown"
+        assert output["plan"]["currency_info"]["usd_to_eur"] == 0.92
+        assert output["reason"] == "timed out"
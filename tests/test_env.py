@@ -0,0 +1,64 @@
+"""
+Unit tests for numeric settings read from the environment
+"""
+
+import pytest
+from app.token_budget import (
+    DEFAULT_COMPLETION_BUDGET, DEFAULT_PROMPT_BUDGET, DEFAULT_REQUEST_PROMPT_BUDGET, TokenBudget,
+)
+from app.utils.env import env_float, env_int
+
+
+class TestEnvInt:
+    """Test cases for env_int"""
+
+    def test_unset_uses_default(self, monkeypatch):
+        """Test that an unset or blank variable gives the default"""
+        monkeypatch.delenv("TEST_SETTING", raising=False)
+        assert env_int("TEST_SETTING", 7) == 7
+        monkeypatch.setenv("TEST_SETTING", " ")
+        assert env_int("TEST_SETTING", 7) == 7
+
+    @pytest.mark.parametrize("raw", ["lots", "2.5", "0", "-3"])
+    def test_invalid_falls_back(self, monkeypatch, raw):
+        """Test that malformed or out-of-range values give the default"""
+        monkeypatch.setenv("TEST_SETTING", raw)
+        assert env_int("TEST_SETTING", 7) == 7
+
+    def test_minimum(self, monkeypatch):
+        """Test that values at or above the minimum are used"""
+        monkeypatch.setenv("TEST_SETTING", "0")
+        assert env_int("TEST_SETTING", 3, minimum=0) == 0
+        monkeypatch.setenv("TEST_SETTING", "12")
+        assert env_int("TEST_SETTING", 3) == 12
+
+
+class TestEnvFloat:
+    """Test cases for env_float"""
+
+    @pytest.mark.parametrize("raw", ["fast", "nan", "inf", "0", "-1.5"])
+    def test_invalid_falls_back(self, monkeypatch, raw):
+        """Test that malformed, non-finite or non-positive values give the default"""
+        monkeypatch.setenv("TEST_SETTING", raw)
+        assert env_float("TEST_SETTING", 1.5) == 1.5
+
+    def test_inclusive_minimum(self, monkeypatch):
+        """Test that the minimum itself is accepted only when inclusive"""
+        monkeypatch.setenv("TEST_SETTING", "0")
+        assert env_float("TEST_SETTING", 1.5, inclusive=True) == 0.0
+        monkeypatch.setenv("TEST_SETTING", "0.25")
+        assert env_float("TEST_SETTING", 1.5) == 0.25
+
+
+class TestTokenBudgetConfig:
+    """Test cases for token budgets read from the environment"""
+
+    def test_malformed_budgets_fall_back(self, monkeypatch):
+        """Test that bad budget settings use the defaults instead of failing the request"""
+        monkeypatch.setenv("AGENT_PROMPT_TOKEN_BUDGET", "12k")
+        monkeypatch.setenv("AGENT_COMPLETION_TOKEN_BUDGET", "0")
+        monkeypatch.setenv("AGENT_REQUEST_PROMPT_TOKEN_BUDGET", "-1")
+        budget = TokenBudget()
+        assert budget.prompt_limit == DEFAULT_PROMPT_BUDGET
+        assert budget.completion_limit == DEFAULT_COMPLETION_BUDGET
+        assert budget.request_prompt_limit == DEFAULT_REQUEST_PROMPT_BUDGET
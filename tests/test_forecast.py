@@ -0,0 +1,68 @@
+"""
+Unit tests for columnar forecasts
+"""
+
+import json
+from app.forecast import Forecast
+from app.synthesis import weather_section
+
+OPEN_METEO = {
+    "daily": {
+        "time": ["2026-06-01", "2026-06-02", "2026-06-03"],
+        "temperature_2m_max": [24.0, 25.5, 23.1],
+        "temperature_2m_min": [14.0, 15.0, 13.2],
+        "weathercode": [1, 61, 3],
+    }
+}
+
+
+class TestForecast:
+    """Test cases for the Forecast columns"""
+
+    def test_from_open_meteo_to_minimal_json(self):
+        """Test that Open-Meteo columns are kept numeric and written compactly"""
+        forecast = Forecast.from_open_meteo(OPEN_METEO)
+
+        assert forecast.to_json() == (
+            '{"dates":["2026-06-01","2026-06-02","2026-06-03"],'
+            '"max_temp":[24,25.5,23.1],"min_temp":[14,15,13.2],"code":[1,61,3]}'
+        )
+        assert Forecast.from_dict(json.loads(forecast.to_json())) == forecast
+        assert len(Forecast.from_open_meteo({})) == 0
+
+    def test_smaller_than_per_day_records(self):
+        """Test that the columns are smaller than one stringified record per day"""
+        per_day = json.dumps({"daily_forecast": [
+            {"date": date, "max_temp": str(high), "min_temp": str(low), "code": str(code)}
+            for date, high, low, code in zip(*OPEN_METEO["daily"].values())
+        ]})
+        assert len(Forecast.from_open_meteo(OPEN_METEO).to_json()) < len(per_day) / 2
+
+    def test_between(self):
+        """Test slicing by date, including the climatology marker"""
+        forecast = Forecast.from_open_meteo(OPEN_METEO).with_normals([("2026-06-04", 22.4, 12.9)])
+
+        assert forecast.climatology_from == "2026-06-04"
+        assert forecast.between("2026-06-02", "2026-06-03").dates == ("2026-06-02", "2026-06-03")
+        assert forecast.between("2026-06-02", "2026-06-03").climatology_from is None
+        assert forecast.between("2026-06-04", "2026-06-30").to_dict() == {
+            "dates": ["2026-06-04"], "max_temp": [22.4], "min_temp": [12.9], "climatology_from": "2026-06-04",
+        }
+
+    def test_parse(self):
+        """Test that only forecasts and their dict form are parsed"""
+        forecast = Forecast.from_open_meteo(OPEN_METEO)
+        assert Forecast.parse(forecast) is forecast
+        assert Forecast.parse(forecast.to_dict()) == forecast
+        assert Forecast.parse({"error": "boom"}) is None
+        assert Forecast.parse("24C") is None
+
+
+class TestWeatherSection:
+    """Test cases for the TripPlan weather section from forecast columns"""
+
+    def test_first_day_max_temperature(self):
+        """Test that synthesis reads the numeric column directly"""
+        assert weather_section(Forecast.from_open_meteo(OPEN_METEO))["temperature_c"] == 24.0
+        assert weather_section(Forecast.from_open_meteo(OPEN_METEO).to_dict())["temperature_c"] == 24.0
+        assert weather_section(Forecast())["conditions"] == "Unknown"
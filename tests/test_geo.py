@@ -0,0 +1,102 @@
+"""
+Unit tests for the offline geocoding index
+"""
+
+import json
+import pytest
+from app.geo import GeoIndex, build_index, geocode, get_geo_index, normalize_place
+from app.tools.geo import GeoTools
+
+
+@pytest.fixture
+def small_index(tmp_path):
+    source = tmp_path / "places.csv"
+    source.write_text(
+        "name,aliases,kind,code,country,lat,lon,currency\n"
+        "Paris,Paris France,city,,FR,48.8566,2.3522,EUR\n"
+        "Paris Charles de Gaulle Airport,Charles de Gaulle,airport,CDG,FR,49.0097,2.5479,EUR\n"
+        "Munich,München;Muenchen,city,,DE,48.1351,11.5820,EUR\n",
+        encoding="utf-8",
+    )
+    path = tmp_path / "gazetteer.tsv"
+    build_index(str(source), str(path))
+    index = GeoIndex(str(path))
+    yield index
+    index.close()
+
+
+class TestNormalizePlace:
+    """Test cases for index key normalization"""
+
+    def test_case_accents_and_punctuation(self):
+        """Test that case, accents and punctuation are folded"""
+        assert normalize_place("  München ") == "munchen"
+        assert normalize_place("O'Hare") == "o hare"
+        assert normalize_place("Paris,  France") == "paris france"
+
+
+class TestGeoIndex:
+    """Test cases for the memory-mapped gazetteer"""
+
+    def test_build_writes_sorted_keys(self, small_index):
+        """Test that every name, alias and code is indexed in sorted order"""
+        keys = small_index.keys()
+        assert keys == sorted(keys)
+        assert {"paris", "cdg", "munchen", "muenchen", "charles de gaulle"} <= set(keys)
+
+    def test_exact_lookup(self, small_index):
+        """Test exact lookups by name, alias and airport code"""
+        assert small_index.lookup("Paris").lat == 48.8566
+        assert small_index.lookup("münchen").name == "Munich"
+        airport = small_index.lookup("cdg")
+        assert airport.kind == "airport"
+        assert airport.code == "CDG"
+        assert small_index.lookup("Atlantis") is None
+        assert small_index.lookup("") is None
+
+    def test_prefix(self, small_index):
+        """Test prefix lookups return each place once"""
+        names = [place.name for place in small_index.prefix("par")]
+        assert names == ["Paris", "Paris Charles de Gaulle Airport"]
+        assert small_index.prefix("zzz") == []
+
+    def test_fuzzy(self, small_index):
+        """Test that small misspellings still resolve"""
+        assert small_index.fuzzy("Munnich")[0].name == "Munich"
+        assert small_index.fuzzy("Atlantis") == []
+
+    def test_geocode_fallbacks(self, small_index):
+        """Test exact, comma head, unique prefix and fuzzy resolution"""
+        assert small_index.geocode("Paris").name == "Paris"
+        assert small_index.geocode("Munich, Germany").name == "Munich"
+        assert small_index.geocode("Muni").name == "Munich"
+        assert small_index.geocode("Pariss").name == "Paris"
+        assert small_index.geocode("Atlantis") is None
+
+
+class TestBundledGazetteer:
+    """Test cases for the bundled index"""
+
+    def test_process_wide_index(self):
+        """Test that the bundled index is shared and covers common destinations"""
+        assert get_geo_index() is get_geo_index()
+        paris = geocode("Paris, France")
+        assert (paris.lat, paris.lon, paris.currency) == (48.8566, 2.3522, "EUR")
+        assert geocode("NYC").name == "New York"
+        assert geocode("JFK").kind == "airport"
+
+
+class TestGeoTools:
+    """Test cases for the Geo kernel function"""
+
+    def test_geocode_returns_place_json(self):
+        """Test that the tool returns the place as JSON"""
+        result = json.loads(GeoTools().geocode("Tokyo"))
+        assert result["name"] == "Tokyo"
+        assert result["currency"] == "JPY"
+        assert {"lat", "lon", "country", "kind"} <= set(result)
+
+    def test_geocode_unknown_place(self):
+        """Test that unknown places return an error"""
+        result = json.loads(GeoTools().geocode("Atlantis"))
+        assert "error" in result
@@ -0,0 +1,98 @@
+"""
+Unit tests for the shared async HTTP client
+"""
+
+import asyncio
+import time
+import httpx
+import pytest
+from app import http_client
+from app.http_client import PooledHttpClient, http_stats
+
+
+def client_for(handler, **kwargs):
+    kwargs.setdefault("backoff", 0)
+    return PooledHttpClient(transport=httpx.MockTransport(handler), **kwargs)
+
+
+class TestPooledHttpClient:
+    """Test cases for PooledHttpClient class"""
+
+    def test_retries_transient_failures(self):
+        """Test that 5xx responses and connection errors are retried until success"""
+        outcomes = [httpx.ConnectError("refused"), httpx.Response(502), httpx.Response(200, json={"ok": True})]
+
+        def handler(request):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        http_stats.reset_metrics()
+        result = asyncio.run(client_for(handler, retries=2).get_json("https://api.test/forecast"))
+
+        assert result == {"ok": True}
+        assert http_stats.get_metrics()["retries"] == 2
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 404 fails immediately"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(404)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(client_for(handler, retries=3).get("https://api.test/forecast"))
+        assert len(calls) == 1
+
+    def test_retry_after_is_honoured(self):
+        """Test that the delay before a retry follows Retry-After"""
+        responses = [httpx.Response(429, headers={"Retry-After": "0.1"}), httpx.Response(200, json={})]
+
+        async def run():
+            start = time.perf_counter()
+            await client_for(lambda request: responses.pop(0), retries=1).get("https://api.test/forecast")
+            return time.perf_counter() - start
+
+        assert asyncio.run(run()) >= 0.1
+
+    def test_jittered_backoff_is_bounded(self):
+        """Test that backoff grows exponentially and stays within its bound"""
+        client = PooledHttpClient(backoff=0.1)
+        delays = [client._delay(2, None) for _ in range(200)]
+        assert all(0 <= delay <= 0.4 for delay in delays)
+        assert max(delays) > 0.2
+
+    def test_invalid_settings_fall_back(self, monkeypatch):
+        """Test that bad HTTP_* settings use the defaults instead of failing at import"""
+        for name, raw in [("HTTP_POOL_SIZE", "many"), ("HTTP_KEEPALIVE", "-1"), ("HTTP_CONNECT_TIMEOUT", "0"),
+                          ("HTTP_READ_TIMEOUT", "5s"), ("HTTP_RETRIES", "two"), ("HTTP_RETRY_BACKOFF", "nan")]:
+            monkeypatch.setenv(name, raw)
+        client = PooledHttpClient()
+
+        assert (client.pool_size, client.keepalive, client.retries) == (
+            http_client.DEFAULT_POOL_SIZE, http_client.DEFAULT_KEEPALIVE, http_client.DEFAULT_RETRIES
+        )
+        assert (client.connect_timeout, client.read_timeout, client.backoff) == (
+            http_client.DEFAULT_CONNECT_TIMEOUT, http_client.DEFAULT_READ_TIMEOUT, http_client.DEFAULT_RETRY_BACKOFF
+        )
+
+    def test_one_pool_per_event_loop(self):
+        """Test that calls on one loop share a client and concurrent calls overlap"""
+        async def handler(request):
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={})
+
+        client = client_for(handler)
+
+        async def run():
+            start = time.perf_counter()
+            await asyncio.gather(*(client.get("https://api.test/forecast") for _ in range(10)))
+            return client.client(), time.perf_counter() - start
+
+        first, elapsed = asyncio.run(run())
+        second, _ = asyncio.run(run())
+
+        assert elapsed < 0.25
+        assert first is not second
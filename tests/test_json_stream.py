@@ -0,0 +1,113 @@
+"""
+Unit tests for incremental JSON extraction
+"""
+
+import asyncio
+import json
+import pytest
+from app.json_stream import JsonObjectStream, JsonStreamError, TripPlanStream, consume, extract_json
+
+PLAN = {
+    "destination": "Paris",
+    "travel_dates": "2026-06-01 to 2026-06-08",
+    "weather": {"temperature_c": 22.0, "conditions": "Sunny"},
+    "card_recommendation": {"card": "BankGold", "benefit": "4x dining", "fx_fee": "0%", "source": "rules"},
+    "currency_info": {"usd_to_eur": 0.92},
+    "next_steps": ["Book {flights}", "Pack \"light\""],
+}
+
+
+def chunked(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestJsonObjectStream:
+    """Test cases for JsonObjectStream class"""
+
+    def test_first_balanced_object_in_chunks(self):
+        """Test that prose is skipped and braces inside strings are ignored"""
+        text = "Sure, here you go:\n```json\n" + json.dumps({"a": "} {", "b": [1, {"c": 2}]}) + "\n```\n{\"x\": 1}"
+        stream = JsonObjectStream()
+        results = [stream.feed(chunk) for chunk in chunked(text)]
+
+        assert stream.done
+        assert stream.close() == {"a": "} {", "b": [1, {"c": 2}]}
+        # The object is returned by the chunk that closes it
+        assert results.index(stream.value) < len(results) - 1
+
+    def test_reports_members_as_they_complete(self):
+        """Test member callbacks with their enclosing path"""
+        members = []
+        stream = JsonObjectStream(on_member=lambda path, key, value: members.append((path, key, value)))
+        stream.feed('{"plan": {"destination": "Rome", "tags": [{"x": 1}]}')
+        assert members == [(("plan",), "destination", "Rome"), (("plan",), "tags", [{"x": 1}])]
+
+        stream.feed(', "ok": true}')
+        assert members[-2:] == [((), "plan", {"destination": "Rome", "tags": [{"x": 1}]}), ((), "ok", True)]
+
+    @pytest.mark.parametrize("text", [
+        "{'destination': 'Paris'}",
+        '{"a": [1, 2}',
+        '{"a": 1 "b": 2}',
+        '{"bad\\q": 1}',
+        '{"tab\there": 1}',
+    ])
+    def test_fails_fast_on_malformed_json(self, text):
+        """Test that malformed objects raise before the stream ends"""
+        stream = JsonObjectStream(on_member=lambda *args: None)
+        with pytest.raises(JsonStreamError):
+            for chunk in chunked(text + " " * 100, size=4):
+                stream.feed(chunk)
+
+    def test_missing_or_incomplete_object(self):
+        """Test errors for text without a complete object"""
+        with pytest.raises(JsonStreamError, match="No JSON object"):
+            extract_json("I could not plan this trip.")
+        with pytest.raises(JsonStreamError, match="ended before"):
+            extract_json('{"destination": "Paris"')
+
+
+class TestTripPlanStream:
+    """Test cases for TripPlan validation while streaming"""
+
+    @pytest.mark.parametrize("wrapper", [None, "plan", "TripPlan"])
+    def test_valid_plan_with_or_without_wrapper(self, wrapper):
+        """Test that wrapped and bare plans validate and unwrap"""
+        stream = TripPlanStream()
+        extract_json(json.dumps({wrapper: PLAN} if wrapper else PLAN), stream)
+        assert stream.plan() == PLAN
+        assert stream.fields_validated == len(PLAN)
+
+    def test_invalid_field_fails_before_object_closes(self):
+        """Test that a wrongly typed field raises as soon as it completes"""
+        stream = TripPlanStream()
+        stream.feed('{"plan": {"destination": "Paris", "weather": "sunny"')
+        with pytest.raises(JsonStreamError, match="weather"):
+            stream.feed(', ')
+
+    def test_missing_required_fields(self):
+        """Test that the complete object must be a full TripPlan"""
+        stream = TripPlanStream()
+        extract_json(json.dumps({"plan": {"destination": "Paris"}}), stream)
+        with pytest.raises(JsonStreamError, match="next_steps"):
+            stream.plan()
+
+
+class TestConsume:
+    """Test cases for consuming async chunk streams"""
+
+    def test_stops_reading_once_object_completes(self):
+        """Test that the stream is not read past the end of the object"""
+        read = []
+
+        async def chunks():
+            for chunk in [None, ["Plan: "], '{"destination": ', '"Rome"}', " trailing", " text"]:
+                read.append(chunk)
+                yield chunk
+
+        stream = JsonObjectStream()
+        text = asyncio.run(consume(chunks(), stream))
+
+        assert stream.value == {"destination": "Rome"}
+        assert text == 'Plan: {"destination": "Rome"}'
+        assert len(read) == 4
@@ -0,0 +1,109 @@
+"""
+Unit tests for the kernel pool
+"""
+
+import asyncio
+import pytest
+from app.kernel_pool import KernelPool, get_kernel_pool, hold_checkout
+
+
+class FakeKernel:
+    """Stand-in for a Semantic Kernel instance"""
+
+
+class TestKernelPool:
+    """Test cases for KernelPool class"""
+
+    def test_kernels_are_reused(self):
+        """Test that a returned kernel is handed out again"""
+        pool = KernelPool(FakeKernel, size=2)
+
+        async def run():
+            async with pool.checkout() as first:
+                pass
+            async with pool.checkout() as second:
+                pass
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        assert first is second
+        assert pool.created == 1
+        assert pool.get_metrics()["checkouts"] == 2
+
+    def test_warm_builds_up_to_size(self):
+        """Test that warming pre-builds kernels without exceeding the size"""
+        pool = KernelPool(FakeKernel, size=3)
+
+        assert pool.warm() == 3
+        assert pool.warm() == 0
+        assert pool.created == 3
+        assert pool.idle == 3
+
+    def test_checkout_waits_when_exhausted(self):
+        """Test that checkouts wait for a kernel and record the wait time"""
+        pool = KernelPool(FakeKernel, size=1)
+
+        async def hold(delay):
+            async with pool.checkout() as kernel:
+                await asyncio.sleep(delay)
+                return kernel
+
+        async def run():
+            return await asyncio.gather(hold(0.05), hold(0))
+
+        first, second = asyncio.run(run())
+        metrics = pool.get_metrics()
+
+        assert first is second
+        assert pool.created == 1
+        assert metrics["waits"] == 1
+        assert metrics["max_wait_time"] > 0
+        assert metrics["avg_wait_time"] > 0
+
+    def test_kernel_returned_on_error(self):
+        """Test that a kernel goes back to the pool when the request fails"""
+        pool = KernelPool(FakeKernel, size=1)
+
+        async def fail():
+            async with pool.checkout():
+                raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(fail())
+        assert pool.idle == 1
+
+    def test_held_kernel_returned_when_work_finishes(self):
+        """Test that a kernel stays out of the pool until held work outlasting its checkout finishes"""
+        pool = KernelPool(FakeKernel, size=1)
+
+        async def run():
+            async with pool.checkout():
+                work = asyncio.create_task(asyncio.sleep(0.02))
+                hold_checkout(work)
+            idle_after_checkout = pool.idle
+            await work
+            await asyncio.sleep(0)
+            return idle_after_checkout
+
+        assert asyncio.run(run()) == 0
+        assert pool.idle == 1
+
+    def test_invalid_size(self):
+        """Test that a pool must hold at least one kernel"""
+        with pytest.raises(ValueError):
+            KernelPool(FakeKernel, size=0)
+
+    def test_pool_per_event_loop(self, monkeypatch):
+        """Test that each event loop gets its own pool with the configured size"""
+        monkeypatch.setenv("KERNEL_POOL_SIZE", "2")
+
+        async def get_twice():
+            return get_kernel_pool(FakeKernel), get_kernel_pool(FakeKernel)
+
+        first_a, first_b = asyncio.run(get_twice())
+        second, _ = asyncio.run(get_twice())
+
+        assert first_a is first_b
+        assert first_a is not second
+        assert first_a.size == 2
@@ -0,0 +1,107 @@
+"""
+Unit tests for the agent entry points
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from app import main
+from app.deadline import current_deadline
+from app.kernel_pool import KernelPool, get_kernel_pool
+from app.tracing import current_trace
+
+
+class FakeKernel:
+    """Stand-in for a Semantic Kernel instance"""
+
+
+async def fake_plan_trip(kernel, user_input, parsed=None, emit=None):
+    # Later inputs finish first to check that results keep input order
+    await asyncio.sleep(0.01 * (5 - len(user_input) % 5))
+    if user_input == "raise":
+        raise RuntimeError("tool crashed")
+    if user_input == "bad":
+        return json.dumps({"error": "No JSON found in response"})
+    return json.dumps({"plan": {"destination": user_input}})
+
+
+@pytest.fixture
+def fake_pool():
+    pool = KernelPool(FakeKernel, size=2)
+    with patch("app.main.get_kernel_pool", return_value=pool), \
+         patch("app.main._plan_trip", side_effect=fake_plan_trip):
+        yield pool
+
+
+class TestRunRequestsBatch:
+    """Test cases for run_requests_batch"""
+
+    def test_results_in_input_order(self, fake_pool):
+        """Test that results come back in input order with latencies"""
+        inputs = ["Paris", "Rome", "Tokyo", "Lima"]
+
+        results = main.run_requests_batch(inputs, max_concurrency=3)
+
+        assert [item["input"] for item in results] == inputs
+        assert [item["index"] for item in results] == [0, 1, 2, 3]
+        assert all(item["error"] is None for item in results)
+        assert all(item["latency_s"] > 0 for item in results)
+        assert json.loads(results[2]["output"])["plan"]["destination"] == "Tokyo"
+
+    def test_failures_do_not_abort_batch(self, fake_pool):
+        """Test that failing items are reported without stopping the batch"""
+        results = main.run_requests_batch(["Paris", "raise", "bad", "Rome"], max_concurrency=2)
+
+        assert results[0]["error"] is None
+        assert results[1]["error"] == "tool crashed"
+        assert results[2]["error"] == "No JSON found in response"
+        assert results[3]["error"] is None
+        assert fake_pool.idle == fake_pool.created
+
+    def test_items_run_under_deadline_and_trace(self, fake_pool):
+        """Test that every item gets its own request deadline and trace"""
+        scopes = []
+
+        async def plan_trip(kernel, user_input, parsed=None, emit=None):
+            scopes.append((current_deadline(), current_trace()))
+            return json.dumps({"plan": {"destination": user_input}})
+
+        with patch("app.main._plan_trip", side_effect=plan_trip):
+            main.run_requests_batch(["Paris", "Rome"], max_concurrency=2)
+
+        assert len(scopes) == 2
+        assert all(deadline is not None and trace is not None for deadline, trace in scopes)
+        assert scopes[0][0] is not scopes[1][0]
+        assert scopes[0][1] is not scopes[1][1]
+
+    def test_invalid_concurrency(self, fake_pool):
+        """Test that max_concurrency must be positive"""
+        with pytest.raises(ValueError):
+            main.run_requests_batch(["Paris"], max_concurrency=0)
+
+
+class TestRunSync:
+    """Test cases for the shared event loop of the synchronous entry points"""
+
+    def test_calls_share_loop_and_kernel_pool(self):
+        """Test that repeated sync calls reuse one loop and the kernels pooled on it"""
+        async def pool_and_loop():
+            return get_kernel_pool(FakeKernel), asyncio.get_running_loop()
+
+        first_pool, first_loop = main.run_sync(pool_and_loop())
+        second_pool, second_loop = main.run_sync(pool_and_loop())
+
+        assert first_loop is second_loop
+        assert first_pool is second_pool
+
+
+class TestCacheSizeConfig:
+    """Test cases for cache sizes read from the environment"""
+
+    def test_invalid_requirements_cache_size_falls_back(self, monkeypatch):
+        """Test that a malformed REQUIREMENTS_CACHE_SIZE uses the default instead of failing"""
+        monkeypatch.setenv("REQUIREMENTS_CACHE_SIZE", "lots")
+        assert main.get_requirements_cache_size() == main.DEFAULT_REQUIREMENTS_CACHE_SIZE
+        monkeypatch.setenv("REQUIREMENTS_CACHE_SIZE", "32")
+        assert main.get_requirements_cache_size() == 32
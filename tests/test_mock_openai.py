@@ -0,0 +1,142 @@
+"""
+Unit tests for the local mock Azure OpenAI server
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import pytest
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+from semantic_kernel.connectors.ai.open_ai import (
+    AzureChatCompletion,
+    AzureTextEmbedding,
+    OpenAIChatPromptExecutionSettings,
+)
+from semantic_kernel.contents import AuthorRole, ChatHistory
+from app.mock_openai import LatencyModel, MockOpenAIService, MockSettings, ScriptRule
+from app.tools.geo import GeoTools
+from app.utils.http_server import AsyncHttpServer
+
+PLANNING_MESSAGE = (
+    "User Input: Paris in June\n"
+    "Context - Destination: Paris, Dates: 2026-06-01 to 2026-06-08, Card: BankGold\n"
+    "Please use this context to plan the trip."
+)
+
+
+def run_with_mock(service, scenario):
+    async def run():
+        server = AsyncHttpServer(service.handle, "127.0.0.1", 0)
+        await server.start()
+        try:
+            return await scenario(f"http://127.0.0.1:{server.port}/openai")
+        finally:
+            await server.stop()
+    return asyncio.run(run())
+
+
+def planning_kernel(base_url):
+    kernel = Kernel()
+    chat = AzureChatCompletion(service_id="chat", deployment_name="gpt", base_url=base_url, api_key="mock")
+    kernel.add_service(chat)
+    kernel.add_plugin(GeoTools(), plugin_name="Geo")
+    history = ChatHistory(system_message="You are a travel agent.")
+    history.add_user_message(PLANNING_MESSAGE)
+    settings = OpenAIChatPromptExecutionSettings(function_choice_behavior=FunctionChoiceBehavior.Auto())
+    return kernel, chat, history, settings
+
+
+class TestLatencyModel:
+    """Test cases for LatencyModel class"""
+
+    def test_distributions(self):
+        """Test that each distribution samples non-negative values in range"""
+        rng = random.Random(1)
+        assert LatencyModel("0.25").sample(rng) == 0.25
+        assert all(0.1 <= LatencyModel("uniform:0.1:0.2").sample(rng) <= 0.2 for _ in range(50))
+        assert all(LatencyModel("normal:0:1").sample(rng) >= 0 for _ in range(50))
+        samples = sorted(LatencyModel("lognormal:0.5:0.3").sample(rng) for _ in range(501))
+        assert samples[250] == pytest.approx(0.5, rel=0.15)
+
+    def test_invalid_spec(self):
+        """Test that unknown distributions and wrong parameter counts are rejected"""
+        with pytest.raises(ValueError):
+            LatencyModel("pareto:1")
+        with pytest.raises(ValueError):
+            LatencyModel("uniform:0.1")
+
+
+class TestMockOpenAIService:
+    """Test cases for MockOpenAIService class"""
+
+    def test_scripted_tool_call_then_plan(self):
+        """Test that the bundled script calls Geo first and then returns the plan"""
+        service = MockOpenAIService()
+
+        async def scenario(base_url):
+            kernel, chat, history, settings = planning_kernel(base_url)
+            replies = await chat.get_chat_message_contents(history, settings, kernel=kernel)
+            return history, str(replies[0])
+
+        history, reply = run_with_mock(service, scenario)
+
+        assert AuthorRole.TOOL in [message.role for message in history.messages]
+        plan = json.loads(reply)["plan"]
+        assert plan["destination"] == "Paris"
+        assert plan["card_recommendation"]["card"] == "BankGold"
+        assert service.get_metrics()["requests"]["chat"] == 2
+
+    def test_streaming(self):
+        """Test that streamed replies arrive as several server-sent events"""
+        rules = [ScriptRule(re.compile("(?P<city>Paris)"), [{"content": "Sunny and warm in $city today"}])]
+        service = MockOpenAIService(MockSettings(token_interval=LatencyModel("fixed:0.001")), rules)
+
+        async def scenario(base_url):
+            kernel, chat, history, settings = planning_kernel(base_url)
+            chunks = []
+            async for messages in chat.get_streaming_chat_message_contents(history, settings, kernel=kernel):
+                chunks.extend(str(message) for message in messages if str(message))
+            return chunks
+
+        chunks = run_with_mock(service, scenario)
+
+        assert "".join(chunks) == "Sunny and warm in Paris today"
+        assert len(chunks) > 1
+        assert service.get_metrics()["in_flight"] == 0
+
+    def test_embeddings_are_deterministic_unit_vectors(self):
+        """Test that the same text always embeds to the same unit vector"""
+        service = MockOpenAIService(MockSettings(embedding_dim=64))
+
+        async def scenario(base_url):
+            embedding = AzureTextEmbedding(deployment_name="embed", base_url=base_url, api_key="mock")
+            return await embedding.generate_embeddings(["Paris", "Tokyo", "Paris"])
+
+        vectors = run_with_mock(service, scenario)
+
+        assert vectors.shape == (3, 64)
+        assert list(vectors[0]) == list(vectors[2])
+        assert math.isclose(sum(value * value for value in vectors[1]), 1.0, rel_tol=1e-6)
+
+    def test_injected_errors(self):
+        """Test that the configured share of requests fails with the configured status"""
+        service = MockOpenAIService(MockSettings(error_rate=1.0, error_status=503))
+
+        async def scenario(base_url):
+            port = int(base_url.split(":")[2].split("/")[0])
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            payload = json.dumps({"messages": [{"role": "user", "content": "hi"}]}).encode()
+            writer.write(
+                b"POST /openai/chat/completions HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+            raw = await reader.read()
+            writer.close()
+            return int(raw.split(b" ")[1])
+
+        assert run_with_mock(service, scenario) == 503
+        assert service.get_metrics()["errors"] == 1
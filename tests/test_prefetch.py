@@ -0,0 +1,111 @@
+"""
+Unit tests for parallel tool pre-fetch
+"""
+
+import asyncio
+import json
+import time
+from semantic_kernel import Kernel
+from semantic_kernel.contents import AuthorRole, ChatHistory
+from semantic_kernel.functions import kernel_function
+from app.prefetch import add_prefetch_to_history, execute_prefetch, plan_prefetch, prefetched_tool_outputs
+from app.tools.card import CardTools
+from app.tools.fx import FxTools
+
+
+class SlowWeatherTools:
+    @kernel_function(name="get_weather", description="Fake weather")
+    def get_weather(self, lat: float, lon: float) -> str:
+        time.sleep(0.1)
+        return json.dumps({"dates": ["2026-06-01"], "max_temp": [24.0], "min_temp": [15.0], "code": [1]})
+
+
+class SlowKnowledgeTools:
+    @kernel_function(name="search_knowledge", description="Fake knowledge")
+    async def search_knowledge(self, query: str) -> str:
+        await asyncio.sleep(0.1)
+        return json.dumps({"error": "Cosmos unavailable"})
+
+
+def build_kernel():
+    kernel = Kernel()
+    kernel.add_plugin(SlowWeatherTools(), plugin_name="Weather")
+    kernel.add_plugin(FxTools(), plugin_name="Fx")
+    kernel.add_plugin(CardTools(), plugin_name="Card")
+    kernel.add_plugin(SlowKnowledgeTools(), plugin_name="Knowledge")
+    return kernel
+
+
+class TestPlanPrefetch:
+    """Test cases for prefetch planning"""
+
+    def test_full_requirements(self):
+        """Test that known destination and card plan all lookups"""
+        calls = plan_prefetch({"destination": "Paris", "dates": "2026-06-01 to 2026-06-08", "card": "BankGold"})
+
+        assert [call.key for call in calls] == ["weather", "fx", "card", "rag"]
+        assert calls[0].arguments == {
+            "lat": 48.8566, "lon": 2.3522, "start_date": "2026-06-01", "end_date": "2026-06-08",
+        }
+        assert calls[1].arguments["to_currency"] == "EUR"
+
+    def test_unknown_destination_and_card(self):
+        """Test that only dependable lookups are planned"""
+        calls = plan_prefetch({"destination": "Atlantis", "card": "Unknown"})
+
+        assert [call.key for call in calls] == ["rag"]
+
+    def test_usd_destination_skips_fx(self):
+        """Test that no conversion is planned for USD destinations"""
+        keys = [call.key for call in plan_prefetch({"destination": "New York", "card": "Unknown"})]
+
+        assert "fx" not in keys
+        assert "weather" in keys
+
+    def test_weather_without_dates(self):
+        """Test that the forecast is not limited to dates that could not be parsed"""
+        calls = plan_prefetch({"destination": "Paris", "dates": "sometime soon", "card": "Unknown"})
+
+        assert calls[0].arguments == {"lat": 48.8566, "lon": 2.3522}
+
+    def test_knowledge_query_uses_gazetteer_name(self):
+        """Test that the knowledge query does not depend on how the destination was written"""
+        short = plan_prefetch({"destination": "paris", "card": "BankGold"})
+        long = plan_prefetch({"destination": "Paris, France", "card": "BankGold"})
+
+        assert short[-1].arguments == long[-1].arguments
+        assert short[-1].arguments["query"] == "BankGold card benefits for travel to Paris"
+
+
+class TestExecutePrefetch:
+    """Test cases for concurrent prefetch execution"""
+
+    def test_calls_run_concurrently(self):
+        """Test that slow lookups overlap and failed ones are dropped"""
+        kernel = build_kernel()
+        calls = plan_prefetch({"destination": "Paris", "card": "BankGold"})
+
+        start = time.perf_counter()
+        results = asyncio.run(execute_prefetch(kernel, calls))
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.19
+        assert set(results) == {"weather", "fx", "card"}
+        outputs = prefetched_tool_outputs(results)
+        assert outputs["card"]["card"] == "BankGold"
+        assert outputs["fx"] == "100.0 USD = 92.00 EUR"
+
+    def test_results_added_as_tool_messages(self):
+        """Test that results appear as completed tool calls in the history"""
+        kernel = build_kernel()
+        results = asyncio.run(execute_prefetch(kernel, plan_prefetch({"destination": "Paris", "card": "BankGold"})))
+        history = ChatHistory(system_message="system")
+
+        call_ids = add_prefetch_to_history(history, results)
+
+        assistant, *tools = history.messages[1:]
+        assert assistant.role == AuthorRole.ASSISTANT
+        assert len(assistant.items) == 3
+        assert [message.role for message in tools] == [AuthorRole.TOOL] * 3
+        assert tools[0].items[0].id == assistant.items[0].id
+        assert list(call_ids.values()) == [item.id for item in assistant.items]
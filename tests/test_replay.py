@@ -0,0 +1,172 @@
+"""
+Unit tests for recording and replaying LLM and tool calls
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from semantic_kernel import Kernel
+from app import main
+from app.replay import Cassette, CassetteMiss, get_cassette, interaction_key
+from app.tools.card import CardTools
+
+REQUIREMENTS = {"destination": "Paris", "dates": "2026-06-01 to 2026-06-08", "card": "BankGold"}
+PLAN = {
+    "destination": "Paris",
+    "travel_dates": "2026-06-01 to 2026-06-08",
+    "card_recommendation": {"card": "BankGold", "benefit": "4x dining", "fx_fee": "None", "source": "rules"},
+    "currency_info": {"usd_to_eur": 0.92},
+    "next_steps": ["Book"],
+}
+
+
+class ScriptedChat:
+    """Chat service that streams a fixed reply"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get_streaming_chat_message_content(self, chat_history, settings, kernel):
+        self.calls += 1
+        text = json.dumps({"plan": PLAN})
+        for i in range(0, len(text), 40):
+            await asyncio.sleep(0.01)
+            yield text[i:i + 40]
+
+
+class UnreachableChat:
+    async def get_streaming_chat_message_content(self, chat_history, settings, kernel):
+        raise AssertionError("Replay must not call the model")
+        yield
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestCassette:
+    """Test cases for Cassette class"""
+
+    def test_call_record_then_replay(self, tmp_path):
+        """Test that results and errors are served back in recorded order"""
+        path = str(tmp_path / "calls.jsonl")
+        recorder = Cassette(path, "record")
+
+        async def fail():
+            raise ValueError("Bing unavailable")
+
+        async def record():
+            await recorder.call("tool", "k", lambda: asyncio.sleep(0, result="first"))
+            await recorder.call("tool", "k", lambda: asyncio.sleep(0, result="second"))
+            with pytest.raises(ValueError):
+                await recorder.call("tool", "bad", fail)
+        asyncio.run(record())
+
+        player = Cassette(path, "replay")
+
+        async def replay():
+            results = [await player.call("tool", "k", None) for _ in range(3)]
+            with pytest.raises(ValueError, match="^Bing unavailable$"):
+                await player.call("tool", "bad", None)
+            with pytest.raises(CassetteMiss):
+                await player.call("tool", "unknown", None)
+            return results
+
+        assert asyncio.run(replay()) == ["first", "second", "second"]
+        assert player.get_metrics()["misses"] == 1
+
+    def test_stream_replay_with_latency(self, tmp_path):
+        """Test that stream chunks and their timing are reproduced"""
+        path = str(tmp_path / "stream.jsonl")
+
+        async def source():
+            for text in ("ab", "cd"):
+                await asyncio.sleep(0.05)
+                yield text
+
+        asyncio.run(collect(Cassette(path, "record").stream("llm", "k", source)))
+        player = Cassette(path, "replay", latency_scale=1.0)
+
+        async def replay():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            chunks = await collect(player.stream("llm", "k", None))
+            return chunks, loop.time() - start
+
+        chunks, elapsed = asyncio.run(replay())
+        assert chunks == ["ab", "cd"]
+        assert elapsed >= 0.09
+
+    def test_stream_failure_replayed_with_its_type(self, tmp_path):
+        """Test that a stream that failed while recording fails the same way on replay"""
+        path = str(tmp_path / "stream.jsonl")
+
+        async def source():
+            yield "ab"
+            raise TimeoutError("model timed out")
+
+        with pytest.raises(TimeoutError):
+            asyncio.run(collect(Cassette(path, "record").stream("llm", "k", source)))
+
+        chunks = []
+
+        async def replay():
+            async for chunk in Cassette(path, "replay").stream("llm", "k", None):
+                chunks.append(chunk)
+
+        with pytest.raises(TimeoutError, match="model timed out"):
+            asyncio.run(replay())
+        assert chunks == ["ab"]
+
+    def test_record_session_replaces_old_recording(self, tmp_path):
+        """Test that a new recording does not keep interactions from an earlier one"""
+        path = str(tmp_path / "calls.jsonl")
+        asyncio.run(Cassette(path, "record").call("tool", "k", lambda: asyncio.sleep(0, result="old")))
+        asyncio.run(Cassette(path, "record").call("tool", "k", lambda: asyncio.sleep(0, result="new")))
+
+        player = Cassette(path, "replay")
+
+        assert asyncio.run(player.call("tool", "k", None)) == "new"
+        with open(path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 1
+
+    def test_malformed_latency_falls_back(self, tmp_path, monkeypatch):
+        """Test that a bad AGENT_CASSETTE_LATENCY replays without delay instead of failing"""
+        monkeypatch.setenv("AGENT_CASSETTE", str(tmp_path / "calls.jsonl"))
+        monkeypatch.setenv("AGENT_CASSETTE_MODE", "record")
+        monkeypatch.setenv("AGENT_CASSETTE_LATENCY", "realtime")
+        assert get_cassette().latency_scale == 0.0
+        monkeypatch.setenv("AGENT_CASSETTE_LATENCY", "1")
+        assert get_cassette().latency_scale == 1.0
+
+    def test_interaction_key_ignores_dict_order(self):
+        """Test that argument order does not change the key"""
+        assert interaction_key("Card", {"a": 1, "b": 2}) == interaction_key("Card", {"b": 2, "a": 1})
+
+
+class TestPlanReplay:
+    """Test cases for replaying a whole planning run offline"""
+
+    def test_plan_replays_without_model_or_tools(self, tmp_path, monkeypatch):
+        """Test that a recorded plan is reproduced with no chat service or plugins"""
+        path = str(tmp_path / "plan.jsonl")
+        monkeypatch.setenv("AGENT_CASSETTE", path)
+
+        monkeypatch.setenv("AGENT_CASSETTE_MODE", "record")
+        kernel = Kernel()
+        kernel.add_plugin(CardTools(), plugin_name="Card")
+        chat = ScriptedChat()
+        with patch.object(Kernel, "get_service", return_value=chat):
+            recorded = asyncio.run(main._run_plan(kernel, "Paris with BankGold", REQUIREMENTS))
+        assert chat.calls == 1
+
+        monkeypatch.setenv("AGENT_CASSETTE_MODE", "replay")
+        with patch.object(Kernel, "get_service", return_value=UnreachableChat()), \
+             patch("app.main.response_cache.put"):
+            replayed = asyncio.run(main._run_plan(Kernel(), "Paris with BankGold", REQUIREMENTS))
+
+        assert json.loads(replayed) == json.loads(recorded)
+        kinds = [json.loads(line)["kind"] for line in open(path)]
+        assert kinds.count("llm") == 1 and "tool" in kinds
+
@@ -0,0 +1,136 @@
+"""
+Unit tests for the fast-path requirement parser
+"""
+
+import pytest
+from datetime import date
+from app.requirements_parser import (
+    FastPathStats,
+    find_card,
+    find_destination,
+    parse_date_range,
+    parse_requirements,
+)
+
+TODAY = date(2026, 1, 15)
+
+
+class TestParseDateRange:
+    """Test cases for date range parsing"""
+
+    def test_iso_range(self):
+        """Test ISO date ranges"""
+        result = parse_date_range("from 2026-06-01 to 2026-06-08", TODAY)
+        assert result == (date(2026, 6, 1), date(2026, 6, 8))
+
+    @pytest.mark.parametrize("text", [
+        "June 1-8",
+        "june 1 to june 8",
+        "Jun 1st - 8th",
+        "1-8 June",
+        "June 1 - 8, 2026",
+    ])
+    def test_month_name_ranges(self, text):
+        """Test month-name ranges resolve to the next occurrence"""
+        assert parse_date_range(text, TODAY) == (date(2026, 6, 1), date(2026, 6, 8))
+
+    def test_range_across_months(self):
+        """Test ranges that span two months"""
+        result = parse_date_range("June 28 - July 3", TODAY)
+        assert result == (date(2026, 6, 28), date(2026, 7, 3))
+
+    def test_past_dates_roll_to_next_year(self):
+        """Test that dates without a year earlier than today use next year"""
+        result = parse_date_range("January 2-5", TODAY)
+        assert result == (date(2027, 1, 2), date(2027, 1, 5))
+
+    def test_invalid_or_missing_dates(self):
+        """Test that impossible or absent dates are rejected"""
+        assert parse_date_range("June 31-33", TODAY) is None
+        assert parse_date_range("sometime next summer", TODAY) is None
+        assert parse_date_range("2026-06-08 to 2026-06-01", TODAY) is None
+
+
+class TestFindDestination:
+    """Test cases for destination lookup"""
+
+    def test_single_and_multi_word(self):
+        """Test single and multi-word destination names"""
+        assert find_destination("trip to Paris") == ("Paris", False)
+        assert find_destination("a week in New York") == ("New York", False)
+
+    def test_cued_destination_wins(self):
+        """Test that the place after 'to' wins over the origin"""
+        assert find_destination("flying from London to Rome") == ("Rome", False)
+
+    def test_ambiguous_destination(self):
+        """Test that several uncued places are ambiguous"""
+        assert find_destination("Paris or Rome?") == (None, True)
+
+
+class TestFindCard:
+    """Test cases for card matching"""
+
+    def test_catalog_card(self):
+        """Test matching catalog card names with spacing variations"""
+        assert find_card("with my BankGold card") == ("BankGold", True)
+        assert find_card("using bank platinum") == ("BankPlatinum", True)
+        assert find_card("paying with Bank-Rewards") == ("BankRewards", True)
+
+    def test_longer_name_is_not_a_catalog_card(self):
+        """Test that a card whose name only contains a catalog name is not matched"""
+        assert find_card("with my BankGoldPlus card") == (None, True)
+        assert find_card("Tokyo with BankGoldPlus") == (None, True)
+        assert not parse_requirements("Paris June 1-8 with BankGoldPlus", TODAY).is_confident()
+
+    def test_unknown_card_mention(self):
+        """Test that an unmatched card mention is reported"""
+        assert find_card("with my travel card") == (None, True)
+        assert find_card("no payment details") == (None, False)
+        result = parse_requirements("Paris 2026-06-01 to 2026-06-08 with my Chase Sapphire card", TODAY)
+        assert not result.is_confident()
+        assert "card" not in result.requirements
+
+
+class TestParseRequirements:
+    """Test cases for the combined fast-path parse"""
+
+    def test_typical_request_is_confident(self):
+        """Test the typical request shape from main()"""
+        result = parse_requirements(
+            "I want to go to Paris from 2026-06-01 to 2026-06-08 with my BankGold card", TODAY
+        )
+        assert result.is_confident()
+        assert result.requirements == {
+            "destination": "Paris",
+            "dates": "2026-06-01 to 2026-06-08",
+            "card": "BankGold",
+        }
+
+    def test_no_card_defaults_to_unknown(self):
+        """Test that requests without a card still resolve"""
+        result = parse_requirements("Tokyo July 10-17", TODAY)
+        assert result.is_confident()
+        assert result.requirements["card"] == "Unknown"
+
+    def test_low_confidence_falls_back(self):
+        """Test that incomplete requests are not confident"""
+        result = parse_requirements("somewhere warm with my travel card", TODAY)
+        assert not result.is_confident()
+        assert result.confidence == 0.0
+
+
+class TestFastPathStats:
+    """Test cases for fast-path hit rate metrics"""
+
+    def test_hit_rate(self):
+        """Test hit rate calculation"""
+        stats = FastPathStats()
+        stats.record(True)
+        stats.record(True)
+        stats.record(False)
+
+        metrics = stats.get_metrics()
+        assert metrics["attempts"] == 3
+        assert metrics["fallbacks"] == 1
+        assert metrics["hit_rate"] == pytest.approx(2 / 3)
@@ -0,0 +1,120 @@
+"""
+Unit tests for the TripPlan response cache
+"""
+
+import asyncio
+import json
+from datetime import date
+from unittest.mock import patch
+from app import main
+from app.kernel_pool import KernelPool
+from app.response_cache import DEFAULT_PLAN_CACHE_SIZE, SECTION_TTLS, ResponseCache, get_plan_cache_size, plan_cache_key, plan_ttl
+
+TODAY = date(2026, 1, 15)
+
+PLAN = {
+    "plan": {
+        "destination": "Paris",
+        "travel_dates": "2026-06-01 to 2026-06-08",
+        "weather": {"temperature_c": 22.0},
+        "card_recommendation": {"card": "BankGold", "benefit": "4x dining", "fx_fee": "0%", "source": "rules"},
+        "currency_info": {"usd_to_eur": 0.92},
+        "next_steps": ["Book"],
+    }
+}
+
+
+class TestPlanCacheKey:
+    """Test cases for requirement normalization"""
+
+    def test_equivalent_requirements_share_a_key(self):
+        """Test that aliases, date formats and card spelling normalize together"""
+        a = plan_cache_key({"destination": "NYC", "dates": "June 1-8", "card": "Bank Gold"}, TODAY)
+        b = plan_cache_key({"destination": "New York, USA", "dates": "2026-06-01 to 2026-06-08",
+                            "card": "bankgold"}, TODAY)
+        assert a == b == ("new york", "2026-06-01/2026-06-08", "bankgold")
+
+    def test_different_dates_differ(self):
+        """Test that date ranges are part of the key"""
+        a = plan_cache_key({"destination": "Paris", "dates": "June 1-8"}, TODAY)
+        b = plan_cache_key({"destination": "Paris", "dates": "June 2-8"}, TODAY)
+        assert a != b
+
+    def test_unknown_requirements_are_not_cacheable(self):
+        """Test that incomplete requirements have no key"""
+        assert plan_cache_key({"destination": "Unknown", "dates": "June 1-8"}) is None
+        assert plan_cache_key({"destination": "Paris"}) is None
+
+
+class TestPlanTtl:
+    """Test cases for volatility-based TTLs"""
+
+    def test_shortest_section_wins(self):
+        """Test that the most volatile section sets the TTL"""
+        assert plan_ttl(json.dumps(PLAN)) == SECTION_TTLS["weather"]
+        no_weather = {"plan": dict(PLAN["plan"], weather=None)}
+        assert plan_ttl(json.dumps(no_weather)) == SECTION_TTLS["currency_info"]
+
+    def test_errors_are_not_cached(self):
+        """Test that errors and non-plans get no TTL"""
+        assert plan_ttl(json.dumps({"error": "boom"})) is None
+        assert plan_ttl("not json") is None
+
+
+class TestResponseCache:
+    """Test cases for ResponseCache class"""
+
+    def test_put_and_get(self):
+        """Test that equivalent requirements hit the cached plan"""
+        cache = ResponseCache(max_size=4)
+        requirements = {"destination": "Paris", "dates": "2026-06-01 to 2026-06-08", "card": "BankGold"}
+        assert cache.get(requirements) is None
+        assert cache.put(requirements, json.dumps(PLAN))
+
+        assert cache.get({"destination": "paris, france", "dates": "2026-06-01 to 2026-06-08",
+                          "card": "BANKGOLD"}) == json.dumps(PLAN)
+        metrics = cache.get_metrics()
+        assert (metrics["hits"], metrics["misses"]) == (1, 1)
+
+    def test_skips_uncacheable_results(self):
+        """Test that errors and unknown requirements are skipped"""
+        cache = ResponseCache(max_size=4)
+        assert not cache.put({"destination": "Paris", "dates": "June 1-8"}, json.dumps({"error": "x"}))
+        assert not cache.put({"destination": "Unknown"}, json.dumps(PLAN))
+        assert len(cache) == 0
+        assert cache.get_metrics()["skipped"] == 2
+
+    def test_disabled_by_env(self, monkeypatch):
+        """Test that AGENT_PLAN_CACHE=0 turns the cache off"""
+        monkeypatch.setenv("AGENT_PLAN_CACHE", "0")
+        cache = ResponseCache(max_size=4)
+        requirements = {"destination": "Paris", "dates": "June 1-8"}
+        assert not cache.put(requirements, json.dumps(PLAN))
+        assert cache.get(requirements) is None
+
+    def test_invalid_size_falls_back(self, monkeypatch):
+        """Test that a malformed PLAN_CACHE_SIZE uses the default instead of failing"""
+        monkeypatch.setenv("PLAN_CACHE_SIZE", "big")
+        assert get_plan_cache_size() == DEFAULT_PLAN_CACHE_SIZE
+        monkeypatch.setenv("PLAN_CACHE_SIZE", "16")
+        assert get_plan_cache_size() == 16
+
+
+class TestPlanCacheInPipeline:
+    """Test cases for the cache in front of planning"""
+
+    def test_fast_path_hit_skips_kernel_checkout(self):
+        """Test that a cached plan is returned without building a kernel"""
+        def factory():
+            raise AssertionError("kernel should not be needed")
+
+        cache = ResponseCache(max_size=4)
+        parsed = main.parse_requirements("Trip to Paris June 1-8 with BankGold")
+        cache.put(parsed.requirements, json.dumps(PLAN))
+
+        with patch("app.main.response_cache", cache), \
+             patch("app.main.get_kernel_pool", return_value=KernelPool(factory, size=1)):
+            output = asyncio.run(main.run_request_async("paris, june 1-8, bankgold card"))
+
+        assert json.loads(output) == PLAN
+        assert cache.get_metrics()["hits"] == 1
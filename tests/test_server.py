@@ -0,0 +1,143 @@
+"""
+Unit tests for the trip planner HTTP service
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from app.server import TripPlannerService
+from app.utils.http_server import AsyncHttpServer
+
+
+async def http_request(port, method, path, body=None):
+    """Send one request over a fresh connection and return (status, json body)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, data = raw.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    return status, json.loads(data)
+
+
+async def fake_run_request(user_input):
+    await asyncio.sleep(0.02)
+    if "fail" in user_input:
+        return json.dumps({"error": "planning failed"})
+    return json.dumps({"plan": {"destination": user_input}})
+
+
+async def fake_run_request_stream(user_input):
+    yield {"section": "requirements", "data": {"destination": user_input, "travel_dates": "June 1-8"}}
+    await asyncio.sleep(0.05)
+    yield {"section": "weather", "data": {"temperature_c": 22.0}}
+    yield {"section": "plan", "data": {"destination": user_input}}
+
+
+async def stream_request(port, path, body):
+    """POST a streamed request and return (headers, [(event, seconds after the request)])"""
+    loop = asyncio.get_running_loop()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode()
+    start = loop.time()
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    events = []
+    while True:
+        size = int((await reader.readline()).strip(), 16)
+        if size == 0:
+            break
+        chunk = await reader.readexactly(size + 2)
+        events.append((json.loads(chunk[:-2]), loop.time() - start))
+    writer.close()
+    return head, events
+
+
+def run_with_server(service, scenario):
+    async def run():
+        server = AsyncHttpServer(service.handle, "127.0.0.1", 0)
+        await server.start()
+        try:
+            return await scenario(server.port)
+        finally:
+            await server.stop()
+    return asyncio.run(run())
+
+
+class TestTripPlannerService:
+    """Test cases for TripPlannerService"""
+
+    @patch("app.main.run_request_async", side_effect=fake_run_request)
+    def test_plan_endpoint(self, mock_run):
+        """Test that /plan returns the TripPlan JSON"""
+        service = TripPlannerService(max_concurrency=2)
+
+        status, data = run_with_server(service, lambda port: http_request(port, "POST", "/plan", {"input": "Paris"}))
+
+        assert status == 200
+        assert data == {"plan": {"destination": "Paris"}}
+
+    @patch("app.main.run_request_async", side_effect=fake_run_request)
+    def test_concurrency_limit(self, mock_run):
+        """Test that concurrent requests never exceed max_concurrency"""
+        service = TripPlannerService(max_concurrency=2)
+
+        async def scenario(port):
+            return await asyncio.gather(*[
+                http_request(port, "POST", "/plan", {"input": f"City {i}"}) for i in range(6)
+            ])
+
+        results = run_with_server(service, scenario)
+
+        assert all(status == 200 for status, _ in results)
+        assert service.metrics["completed"] == 6
+        assert service.metrics["max_in_flight"] == 2
+
+    @patch("app.main.run_request_async", side_effect=fake_run_request)
+    def test_failed_plan(self, mock_run):
+        """Test that planning errors are reported as failures"""
+        service = TripPlannerService(max_concurrency=1)
+
+        status, data = run_with_server(service, lambda port: http_request(port, "POST", "/plan", {"input": "fail"}))
+
+        assert status == 502
+        assert "error" in data
+        assert service.metrics["failed"] == 1
+
+    @patch("app.main.run_request_stream", side_effect=fake_run_request_stream)
+    def test_plan_stream(self, mock_stream):
+        """Test that /plan?stream=1 sends each section as its own chunk as soon as it is ready"""
+        service = TripPlannerService(max_concurrency=1)
+
+        head, events = run_with_server(
+            service, lambda port: stream_request(port, "/plan?stream=1", {"input": "Paris"})
+        )
+
+        assert "Transfer-Encoding: chunked" in head and "application/x-ndjson" in head
+        assert [event["section"] for event, _ in events] == ["requirements", "weather", "plan"]
+        assert events[0][1] < 0.05 <= events[1][1]
+        assert service.metrics["completed"] == 1 and service.metrics["in_flight"] == 0
+
+    @pytest.mark.parametrize("method,path,body,expected", [
+        ("POST", "/plan", {}, 400),
+        ("GET", "/plan", None, 405),
+        ("GET", "/missing", None, 404),
+        ("GET", "/health", None, 200),
+    ])
+    def test_routing_and_validation(self, method, path, body, expected):
+        """Test request validation and routing"""
+        service = TripPlannerService(max_concurrency=1)
+
+        status, _ = run_with_server(service, lambda port: http_request(port, method, path, body))
+
+        assert status == expected
@@ -0,0 +1,210 @@
+"""
+Unit tests for single-flight deduplication
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+from app import main
+from app.kernel_pool import KernelPool
+from app.response_cache import ResponseCache
+from app.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test cases for SingleFlight class"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test that identical concurrent keys run the work once"""
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "plan"
+
+        async def run():
+            return await asyncio.gather(*(flights.do("paris", work) for _ in range(5)))
+
+        assert asyncio.run(run()) == ["plan"] * 5
+        assert len(calls) == 1
+        metrics = flights.get_metrics()
+        assert (metrics["leaders"], metrics["followers"], metrics["in_flight"]) == (1, 4, 0)
+        assert metrics["dedup_rate"] == 0.8
+
+    def test_different_keys_and_later_calls_run_separately(self):
+        """Test that only in-flight calls with the same key are shared"""
+        flights = SingleFlight()
+        calls = []
+
+        async def work(name):
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return name
+
+        async def run():
+            first = await asyncio.gather(flights.do("a", lambda: work("a")), flights.do("b", lambda: work("b")))
+            second = await flights.do("a", lambda: work("a"))
+            return first, second
+
+        assert asyncio.run(run()) == (["a", "b"], "a")
+        assert calls == ["a", "b", "a"]
+
+    def test_exception_reaches_every_caller(self):
+        """Test that a failure is shared by all waiters"""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("model unavailable")
+
+        async def run():
+            return await asyncio.gather(*(flights.do("k", work) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flights.in_flight == 0
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        """Test that the shared work survives one waiter being cancelled"""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            first = asyncio.create_task(flights.do("k", work))
+            second = asyncio.create_task(flights.do("k", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == "done"
+
+    def test_do_many_joins_in_flight_keys(self):
+        """Test that a multi-key call computes only keys not already in flight, and shares the rest"""
+        flights = SingleFlight()
+        computed = []
+
+        async def one():
+            computed.append(["a"])
+            await asyncio.sleep(0.02)
+            return "A"
+
+        async def many(keys):
+            computed.append(keys)
+            await asyncio.sleep(0.02)
+            return {key: key.upper() for key in keys}
+
+        async def run():
+            single = asyncio.create_task(flights.do("a", one))
+            await asyncio.sleep(0)
+            both = await flights.do_many(["a", "b", "c"], many)
+            later = await asyncio.gather(flights.do("b", one), single)
+            return both, later
+
+        both, later = asyncio.run(run())
+
+        assert both == {"a": "A", "b": "B", "c": "C"}
+        assert later == ["A", "A"]
+        assert computed == [["a"], ["b", "c"], ["a"]]
+        assert flights.in_flight == 0
+
+
+class TestPlanDeduplication:
+    """Test cases for single-flight planning"""
+
+    def test_identical_requests_plan_once(self):
+        """Test that concurrent requests with the same requirements share one plan"""
+        calls = []
+
+        async def fake_plan_trip(kernel, user_input, parsed=None, emit=None):
+            calls.append(user_input)
+            await asyncio.sleep(0.05)
+            return json.dumps({"plan": {"destination": "Paris"}})
+
+        inputs = ["Trip to Paris June 1-8 with BankGold", "paris, june 1-8, bankgold card"] * 3
+        pool = KernelPool(object, size=4)
+        with patch("app.main.get_kernel_pool", return_value=pool), \
+             patch("app.main._plan_trip", side_effect=fake_plan_trip), \
+             patch("app.main.response_cache", ResponseCache()), \
+             patch("app.main.plan_flights", SingleFlight()):
+            async def run():
+                return await asyncio.gather(*(main.run_request_async(text) for text in inputs))
+            outputs = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert all(json.loads(output)["plan"]["destination"] == "Paris" for output in outputs)
+        assert pool.metrics["checkouts"] == 1
+
+    def test_cancelled_leader_keeps_kernel_until_plan_finishes(self, monkeypatch):
+        """Test that a shared plan's kernel is not returned to the pool when its leader is cancelled"""
+        monkeypatch.setenv("AGENT_SPECULATIVE_PREFETCH", "0")
+        requirements = {"destination": "Paris", "dates": "2026-06-01 to 2026-06-08", "card": "BankGold"}
+        running = []
+
+        async def fake_extract(kernel, user_input, parsed=None):
+            return dict(requirements)
+
+        async def fake_run_plan(kernel, user_input, requirements, speculation=None, emit=None):
+            running.append(kernel)
+            await asyncio.sleep(0.05)
+            running.remove(kernel)
+            return json.dumps({"plan": {"destination": "Paris"}})
+
+        pool = KernelPool(object, size=1)
+        with patch("app.main.extract_requirements", side_effect=fake_extract), \
+             patch("app.main._run_plan", side_effect=fake_run_plan), \
+             patch("app.main.response_cache", ResponseCache()), \
+             patch("app.main.plan_flights", SingleFlight()):
+            async def run():
+                leader = asyncio.create_task(main._plan_with_pool(pool, "somewhere nice"))
+                follower = asyncio.create_task(main._plan_with_pool(pool, "somewhere sunny"))
+                while not running:
+                    await asyncio.sleep(0.001)
+                leader.cancel()
+                await asyncio.sleep(0)
+                # The follower still waits on the plan running on the leader's kernel
+                assert running and pool.idle == 0
+                return await follower
+            output = asyncio.run(run())
+
+        assert json.loads(output)["plan"]["destination"] == "Paris"
+        assert pool.idle == 1
+
+    def test_followers_stream_leader_sections(self):
+        """Test that a request joining a shared plan streams its sections, including ones sent before it joined"""
+        card = {"card": "BankGold", "benefit": "4x dining", "fx_fee": "None", "source": "rules"}
+        weather = {"temperature_c": 22.0}
+
+        async def fake_plan_trip(kernel, user_input, parsed=None, emit=None):
+            emit("card_recommendation", card)
+            await asyncio.sleep(0.05)
+            emit("weather", weather)
+            await asyncio.sleep(0.2)
+            return json.dumps({"plan": {"destination": "Paris", "card_recommendation": card, "weather": weather}})
+
+        async def stream(user_input, delay):
+            await asyncio.sleep(delay)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            return [(event["section"], loop.time() - start)
+                    async for event in main.run_request_stream(user_input)]
+
+        with patch("app.main.get_kernel_pool", return_value=KernelPool(object, size=2)), \
+             patch("app.main._plan_trip", side_effect=fake_plan_trip), \
+             patch("app.main.response_cache", ResponseCache()), \
+             patch("app.main.plan_flights", SingleFlight()):
+            async def run():
+                return await asyncio.gather(stream("Trip to Paris June 1-8 with BankGold", 0),
+                                            stream("paris, june 1-8, bankgold card", 0.1))
+            leader, follower = asyncio.run(run())
+
+        follower_sections = dict(follower)
+        assert follower_sections["card_recommendation"] < 0.05
+        assert follower_sections["weather"] < 0.05
+        assert follower_sections["plan"] >= 0.1
+        assert [name for name, _ in leader] == [name for name, _ in follower]
+        assert main._flight_sections == {}
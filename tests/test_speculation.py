@@ -0,0 +1,166 @@
+"""
+Unit tests for speculative prefetch
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from semantic_kernel import Kernel
+from semantic_kernel.functions import kernel_function
+from app import main
+from app.prefetch import execute_prefetch, plan_prefetch
+from app.speculation import Speculation, speculation_stats
+
+
+class CountingTools:
+    """Fake weather/card tools that count invocations"""
+
+    def __init__(self):
+        self.calls = []
+
+    @kernel_function(name="get_weather", description="Fake weather")
+    async def get_weather(self, lat: float, lon: float, start_date: str = None, end_date: str = None) -> str:
+        self.calls.append(("weather", lat, lon))
+        await asyncio.sleep(0.01)
+        return json.dumps({"dates": [], "max_temp": [], "min_temp": []})
+
+    @kernel_function(name="get_card_recommendation", description="Fake card")
+    async def get_card_recommendation(self, card_name: str) -> str:
+        self.calls.append(("card", card_name))
+        return json.dumps({"card": card_name})
+
+
+def build_kernel(tools):
+    kernel = Kernel()
+    kernel.add_plugin(tools, plugin_name="Weather")
+    kernel.add_plugin(tools, plugin_name="Card")
+    return kernel
+
+
+DATES = "2026-06-01 to 2026-06-08"
+
+
+def weather_and_card(requirements):
+    return [call for call in plan_prefetch(requirements) if call.key in ("weather", "card")]
+
+
+class TestSpeculation:
+    """Test cases for Speculation"""
+
+    def setup_method(self):
+        speculation_stats.reset_metrics()
+
+    def test_matching_guess_is_reused(self, monkeypatch):
+        """Test that speculative calls matching the real plan are not repeated"""
+        tools = CountingTools()
+        kernel = build_kernel(tools)
+        monkeypatch.setattr("app.speculation.plan_prefetch", weather_and_card)
+
+        async def run():
+            speculation = Speculation.start(kernel, {"destination": "Paris", "dates": DATES, "card": "BankGold"})
+            calls = weather_and_card({"destination": "Paris", "dates": DATES, "card": "BankGold"})
+            in_flight = speculation.resolve(calls)
+            return await execute_prefetch(kernel, calls, in_flight)
+
+        results = asyncio.run(run())
+
+        assert set(results) == {"weather", "card"}
+        assert len(tools.calls) == 2
+        metrics = speculation_stats.get_metrics()
+        assert metrics["calls_used"] == 2
+        assert metrics["calls_wasted"] == 0
+        assert metrics["used_rate"] == 1.0
+
+    def test_wrong_guess_is_discarded(self, monkeypatch):
+        """Test that mismatched speculative calls are cancelled and counted as wasted"""
+        tools = CountingTools()
+        kernel = build_kernel(tools)
+        monkeypatch.setattr("app.speculation.plan_prefetch", weather_and_card)
+
+        async def run():
+            speculation = Speculation.start(kernel, {"destination": "Rome", "dates": DATES, "card": "BankGold"})
+            calls = weather_and_card({"destination": "Paris", "dates": DATES, "card": "BankGold"})
+            in_flight = speculation.resolve(calls)
+            return in_flight, await execute_prefetch(kernel, calls, in_flight)
+
+        in_flight, results = asyncio.run(run())
+
+        assert list(in_flight) == ["card"]
+        assert set(results) == {"weather", "card"}
+        metrics = speculation_stats.get_metrics()
+        assert metrics["calls_used"] == 1
+        assert metrics["calls_wasted"] == 1
+
+    def test_differently_written_guess_is_reused(self, monkeypatch):
+        """Test that calls match when the real requirements only differ in spelling"""
+        tools = CountingTools()
+        kernel = build_kernel(tools)
+        monkeypatch.setattr("app.speculation.plan_prefetch", weather_and_card)
+
+        async def run():
+            speculation = Speculation.start(kernel, {"destination": "paris", "dates": DATES, "card": "bankgold"})
+            calls = weather_and_card({"destination": "Paris, France", "dates": DATES, "card": "BankGold"})
+            return speculation.resolve(calls)
+
+        assert set(asyncio.run(run())) == {"weather", "card"}
+
+    def test_undated_guess_skips_weather(self, monkeypatch):
+        """Test that a guess without travel dates does not start the weather call"""
+        tools = CountingTools()
+        kernel = build_kernel(tools)
+        monkeypatch.setattr("app.speculation.plan_prefetch", weather_and_card)
+
+        async def run():
+            speculation = Speculation.start(kernel, {"destination": "Paris", "card": "BankGold"})
+            speculation.cancel()
+            return speculation
+
+        assert list(asyncio.run(run()).tasks) == ["card"]
+
+    def test_disabled_or_empty_guess(self, monkeypatch):
+        """Test that nothing starts when disabled or when the guess implies no calls"""
+        kernel = build_kernel(CountingTools())
+
+        async def run():
+            empty = Speculation.start(kernel, {})
+            monkeypatch.setenv("AGENT_SPECULATIVE_PREFETCH", "0")
+            disabled = Speculation.start(kernel, {"destination": "Paris"})
+            return empty, disabled
+
+        assert asyncio.run(run()) == (None, None)
+
+    def test_cancel_counts_as_wasted(self, monkeypatch):
+        """Test that cancelling an unresolved speculation wastes all calls"""
+        kernel = build_kernel(CountingTools())
+        monkeypatch.setattr("app.speculation.plan_prefetch", weather_and_card)
+
+        async def run():
+            speculation = Speculation.start(kernel, {"destination": "Paris", "dates": DATES, "card": "BankGold"})
+            speculation.cancel()
+            speculation.cancel()
+
+        asyncio.run(run())
+
+        metrics = speculation_stats.get_metrics()
+        assert metrics["speculations"] == 1
+        assert metrics["calls_wasted"] == 2
+
+    def test_failed_plan_cancels_unresolved_speculation(self, monkeypatch):
+        """Test that speculative lookups are cancelled when planning fails before resolving them"""
+        kernel = build_kernel(CountingTools())
+        monkeypatch.setattr("app.speculation.plan_prefetch", weather_and_card)
+        requirements = {"destination": "Paris", "dates": DATES, "card": "BankGold"}
+
+        async def run():
+            speculation = Speculation.start(kernel, requirements)
+            with patch("app.main.plan_prefetch", side_effect=RuntimeError("geocoder down")):
+                with pytest.raises(RuntimeError):
+                    await main._run_plan(kernel, "Paris", requirements, speculation)
+            await asyncio.sleep(0)
+            return speculation
+
+        speculation = asyncio.run(run())
+
+        assert all(task.cancelled() for task in speculation.tasks.values())
+        assert speculation_stats.get_metrics()["calls_wasted"] == 2
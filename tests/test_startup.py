@@ -0,0 +1,40 @@
+"""
+Unit tests for cold-start import time
+"""
+
+from app.scripts.startup_benchmark import DEFERRED_MODULES, by_package, measure, parse_importtime
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 | _io
+some warning printed while importing
+import time:      3000 |       3000 |     pydantic.main
+import time:       500 |       3500 |   pydantic
+import time:       900 |       4400 | app.models
+"""
+
+
+class TestImportTimeParsing:
+    """Test cases for parsing -X importtime output"""
+
+    def test_records_and_depth(self):
+        """Test that lines are parsed with nesting depth and other output is skipped"""
+        records = parse_importtime(IMPORTTIME)
+        assert [(r.name, r.depth) for r in records] == [
+            ("_io", 0), ("pydantic.main", 2), ("pydantic", 1), ("app.models", 0),
+        ]
+        assert records[-1].cumulative_us == 4400
+
+    def test_self_time_by_package(self):
+        """Test that self time is summed per top-level package"""
+        assert by_package(parse_importtime(IMPORTTIME)) == {"pydantic": 3500, "app": 900, "_io": 120}
+
+
+class TestColdStart:
+    """Test cases for lazily imported SDKs"""
+
+    def test_main_does_not_import_sdks(self):
+        """Test that importing app.main leaves Semantic Kernel and the Azure SDKs unloaded"""
+        result = measure("app.main")
+        assert result["eager_sdks"] == []
+        assert "semantic_kernel" in DEFERRED_MODULES
@@ -0,0 +1,146 @@
+"""
+Unit tests for section-by-section plan streaming
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from app import main
+from app.streaming import SectionStream, StreamStats
+from app.synthesis import currency_section, synthesize_to_tripplan, tool_result_section
+
+PLAN = {
+    "destination": "Paris",
+    "travel_dates": "June 1-8",
+    "weather": {"temperature_c": 22.0},
+    "results": [{"title": "Le Bistro"}],
+    "card_recommendation": {"card": "BankGold", "benefit": "4x dining", "fx_fee": "None", "source": "rules"},
+    "currency_info": {"usd_to_eur": 0.92},
+    "next_steps": ["Book"],
+}
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+class TestSectionStream:
+    """Test cases for SectionStream class"""
+
+    def test_streamed_sections_then_remaining_from_plan(self):
+        """Test that each section is sent once and the plan fills the gaps"""
+        async def run():
+            sections = SectionStream()
+            sections.emit("requirements", {"destination": "Paris", "travel_dates": "June 1-8"})
+            sections.emit("weather", {"temperature_c": 24.0})
+            sections.emit("weather", {"temperature_c": 22.0})
+            sections.emit("destination", "Paris")
+            sections.close(json.dumps({"plan": PLAN}))
+            return sections, await collect(sections.events())
+
+        sections, events = asyncio.run(run())
+        names = [event["section"] for event in events]
+        assert names == ["requirements", "weather", "card_recommendation", "currency_info",
+                         "results", "next_steps", "plan"]
+        # The first version of a section wins
+        assert events[1]["data"] == {"temperature_c": 24.0}
+        assert events[-1]["data"] == PLAN
+        assert sections.first_section_time is not None
+
+    def test_error_output(self):
+        """Test that failed plans end with an error event"""
+        async def run():
+            sections = SectionStream()
+            sections.close(json.dumps({"error": "model unavailable"}))
+            return await collect(sections.events())
+
+        assert asyncio.run(run()) == [{"section": "error", "data": "model unavailable"}]
+
+
+class TestStreamStats:
+    """Test cases for StreamStats class"""
+
+    def test_ttfub_metrics(self):
+        """Test average and max time to first useful byte"""
+        stats = StreamStats()
+        stats.record(0.2, 1.0)
+        stats.record(0.4, 2.0)
+        stats.record(None, 0.5)
+
+        metrics = stats.get_metrics()
+        assert metrics["streams"] == 3
+        assert metrics["avg_ttfub"] == pytest.approx(0.3)
+        assert metrics["max_ttfub"] == 0.4
+        assert metrics["avg_total_time"] == pytest.approx(3.5 / 3)
+
+
+class TestToolSections:
+    """Test cases for building plan sections from tool results"""
+
+    def test_weather_and_card_sections(self):
+        """Test that tool results map onto their TripPlan sections"""
+        weather = {"dates": ["2026-06-01"], "max_temp": [24], "min_temp": [15]}
+        assert tool_result_section("weather", weather) == ("weather", {
+            "temperature_c": 24.0, "conditions": "Good", "recommendation": "Pack appropriately",
+        })
+        name, card = tool_result_section("card", {"card": "BankGold", "benefit": "4x dining"})
+        assert name == "card_recommendation"
+        assert card["card"] == "BankGold"
+        assert card["fx_fee"] == "Unknown"
+        assert tool_result_section("rag", {"snippets": []}) is None
+
+    def test_currency_section(self):
+        """Test that FX tool output is parsed into currency info"""
+        info = currency_section("100.0 USD = 92.00 EUR")
+        assert (info["sample_meal_usd"], info["sample_meal_eur"], info["usd_to_eur"]) == (100.0, 92.0, 0.92)
+        assert currency_section("100.0 USD = 15000.00 JPY")["usd_to_eur"] is None
+
+    def test_synthesized_plan_uses_fx_result(self):
+        """Test that the fallback plan's currency info comes from the FX tool, not fixed values"""
+        requirements = {"destination": "Tokyo", "dates": "2026-06-01 to 2026-06-08"}
+        with_fx = json.loads(synthesize_to_tripplan({"fx": "100.0 USD = 15000.00 JPY"}, requirements))
+        without_fx = json.loads(synthesize_to_tripplan({}, requirements))
+
+        assert with_fx["plan"]["currency_info"] == currency_section("100.0 USD = 15000.00 JPY")
+        assert without_fx["plan"]["currency_info"]["usd_to_eur"] is None
+
+
+class TestRunRequestStream:
+    """Test cases for run_request_stream"""
+
+    def test_sections_arrive_before_plan_finishes(self):
+        """Test that emitted sections are yielded while planning is still running"""
+        async def fake_plan_with_pool(pool, user_input, emit=None):
+            emit("requirements", {"destination": "Paris", "travel_dates": "June 1-8"})
+            emit("card_recommendation", PLAN["card_recommendation"])
+            await asyncio.sleep(0.2)
+            return json.dumps({"plan": PLAN})
+
+        async def run():
+            received = []
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            async for event in main.run_request_stream("Paris June 1-8 with BankGold"):
+                received.append((event["section"], loop.time() - start))
+            return received
+
+        with patch("app.main.get_kernel_pool"), \
+             patch("app.main._plan_with_pool", side_effect=fake_plan_with_pool):
+            received = asyncio.run(run())
+
+        sections = dict(received)
+        assert sections["card_recommendation"] < 0.1
+        assert sections["plan"] >= 0.2
+        assert [name for name, _ in received][-1] == "plan"
+
+    def test_failure_becomes_error_event(self):
+        """Test that exceptions end the stream with an error event"""
+        async def failing(pool, user_input, emit=None):
+            raise RuntimeError("pool exhausted")
+
+        with patch("app.main.get_kernel_pool"), \
+             patch("app.main._plan_with_pool", side_effect=failing):
+            events = asyncio.run(collect(main.run_request_stream("Paris")))
+
+        assert events == [{"section": "error", "data": "pool exhausted"}]
@@ -0,0 +1,315 @@
+"""
+Unit tests for token counting and per-request token budgets
+"""
+
+import asyncio
+import pytest
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+from semantic_kernel import Kernel
+from semantic_kernel.contents import AuthorRole, ChatHistory, ChatMessageContent
+from semantic_kernel.contents import FunctionCallContent, FunctionResultContent
+from semantic_kernel.filters import FilterTypes
+from semantic_kernel.functions import FunctionResult
+from app import main, token_budget
+from app.filters import TokenBudgetFilter, setup_kernel_filters
+from app.token_budget import TokenBudget, TokenBudgetStats, budget_scope, count_history, count_tokens
+from app.tools.card import CardTools
+
+
+class WordEncoding:
+    """One token per whitespace-separated word"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.calls += 1
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture
+def encoding():
+    encoding = WordEncoding()
+    token_budget._count.cache_clear()
+    with patch("app.token_budget.get_encoding", return_value=encoding):
+        yield encoding
+    token_budget._count.cache_clear()
+
+
+def tool_exchange(history, call_id, result):
+    call = FunctionCallContent(id=call_id, plugin_name="Weather", function_name="get_weather", arguments="{}")
+    history.add_message(ChatMessageContent(role=AuthorRole.ASSISTANT, items=[call]))
+    history.add_message(FunctionResultContent.from_function_call_content_and_result(call, result).to_chat_message_content())
+
+
+class TestCounting:
+    """Test cases for token counting"""
+
+    def test_counts_are_memoized(self, encoding):
+        """Test that each distinct text is encoded once"""
+        assert count_tokens("sunny in Paris") == 3
+        assert count_tokens("sunny in Paris") == 3
+        assert encoding.calls == 1
+        assert count_tokens("") == 0
+
+    def test_estimate_without_encoding(self):
+        """Test the character estimate when no encoding can be loaded"""
+        token_budget._count.cache_clear()
+        with patch("app.token_budget.get_encoding", return_value=None):
+            assert count_tokens("x" * 40) == 10
+        token_budget._count.cache_clear()
+
+    def test_failed_load_is_retried(self, monkeypatch):
+        """Test that a failed encoding load is not remembered past the retry interval"""
+        attempts = []
+
+        def encoding_for_model(model):
+            attempts.append(model)
+            if len(attempts) == 1:
+                raise OSError("BPE download failed")
+            return "encoding"
+
+        monkeypatch.setattr(token_budget, "_encoding", None)
+        monkeypatch.setattr(token_budget, "_encoding_failed_at", None)
+        monkeypatch.setattr("tiktoken.encoding_for_model", encoding_for_model)
+
+        assert token_budget.load_encoding() is None
+        assert token_budget.load_encoding() is None
+        assert len(attempts) == 1
+        monkeypatch.setattr(token_budget, "ENCODING_RETRY_SECONDS", 0.0)
+        assert token_budget.load_encoding() == "encoding"
+        assert len(attempts) == 2
+
+    def test_not_loaded_on_event_loop(self, monkeypatch):
+        """Test that the event loop estimates instead of loading, and preloading uses a thread"""
+        loaded_on = []
+
+        def load_encoding():
+            loaded_on.append(threading.current_thread())
+            return "encoding"
+
+        monkeypatch.setattr(token_budget, "_encoding", None)
+        monkeypatch.setattr(token_budget, "load_encoding", load_encoding)
+
+        async def run():
+            return token_budget.get_encoding(), await token_budget.preload_encoding()
+
+        assert asyncio.run(run()) == (None, "encoding")
+        assert loaded_on and loaded_on[0] is not threading.main_thread()
+
+    def test_history_includes_tool_results(self, encoding):
+        """Test that tool results and message overhead are counted"""
+        history = ChatHistory(system_message="plan trips")
+        tool_exchange(history, "c1", "one two three")
+        expected = token_budget.TOKENS_PER_REPLY + 3 * token_budget.TOKENS_PER_MESSAGE + 2 + 1 + 3
+        assert count_history(history) == expected
+
+
+class TestTokenBudget:
+    """Test cases for TokenBudget class"""
+
+    def test_fit_cuts_results_then_drops_oldest_exchanges(self, encoding):
+        """Test that the system prompt and user message survive trimming"""
+        history = ChatHistory(system_message="plan trips")
+        history.add_user_message("Paris in June")
+        tool_exchange(history, "c1", "word " * 1000)
+        tool_exchange(history, "c2", "word " * 100)
+
+        budget = TokenBudget(prompt_tokens=200, completion_tokens=100)
+        assert budget.fit(history)
+        assert count_history(history) <= 200
+        roles = [message.role for message in history.messages]
+        assert roles == [AuthorRole.SYSTEM, AuthorRole.USER, AuthorRole.ASSISTANT, AuthorRole.TOOL]
+        assert history.messages[3].items[0].id == "c2"
+
+    def test_fit_reports_when_history_cannot_fit(self, encoding):
+        """Test that an untrimmable history is reported as over budget"""
+        history = ChatHistory(system_message="word " * 100)
+        assert not TokenBudget(prompt_tokens=50, completion_tokens=100).fit(history)
+
+    def test_completion_cap_shrinks_as_budget_is_used(self):
+        """Test that max_tokens is limited by the remaining completion budget"""
+        budget = TokenBudget(prompt_tokens=1000, completion_tokens=300)
+        assert budget.max_tokens(200) == 200
+        budget.charge("extraction", 50, 250)
+        assert budget.max_tokens(200) == 50
+
+
+class TestTokenBudgetStats:
+    """Test cases for TokenBudgetStats class"""
+
+    def test_tokens_by_phase(self):
+        """Test per-phase totals and the per-request average"""
+        stats = TokenBudgetStats()
+        stats.record_request()
+        stats.record_usage("extraction", 100, 20)
+        stats.record_usage("planning", 300, 80)
+        metrics = stats.get_metrics()
+        assert metrics["tokens_by_phase"] == {"extraction": 120, "planning": 380}
+        assert metrics["avg_tokens_per_request"] == 500
+
+
+class TestTokenBudgetFilter:
+    """Test cases for budgeting model-initiated tool turns"""
+
+    def tool_turn(self, history, call_ids, index=0):
+        """Add an assistant turn calling ``call_ids`` and return one filter context per call"""
+        calls = [
+            FunctionCallContent(id=call_id, plugin_name="Weather", function_name="get_weather", arguments="{}")
+            for call_id in call_ids
+        ]
+        history.add_message(ChatMessageContent(role=AuthorRole.ASSISTANT, items=calls))
+        settings = SimpleNamespace(max_tokens=None)
+        return [
+            SimpleNamespace(
+                function=SimpleNamespace(name="get_weather"),
+                function_call_content=call,
+                function_result=SimpleNamespace(value="rain"),
+                chat_history=history,
+                execution_settings=settings,
+                request_sequence_index=index,
+                terminate=False,
+            )
+            for call in calls
+        ]
+
+    def run_filter(self, contexts, budget):
+        async def next_filter(ctx):
+            pass
+
+        async def run():
+            with budget_scope(budget):
+                for context in contexts:
+                    await TokenBudgetFilter()(context, next_filter)
+
+        asyncio.run(run())
+
+    def test_each_turn_charged_once_and_next_turn_capped(self, encoding):
+        """Test that a tool turn is charged once for all its calls and the next turn gets what is left"""
+        history = ChatHistory(system_message="plan trips")
+        prompt = count_history(history)
+        contexts = self.tool_turn(history, ["c1", "c2"])
+        completion = token_budget.count_message(history.messages[-1])
+        budget = TokenBudget(prompt_tokens=1000, completion_tokens=100, request_prompt_tokens=1000)
+
+        self.run_filter(contexts, budget)
+
+        assert (budget.prompt_used, budget.completion_used) == (prompt, completion)
+        assert contexts[0].execution_settings.max_tokens == 100 - completion
+        assert not any(context.terminate for context in contexts)
+
+    def test_terminates_when_request_total_spent(self, encoding):
+        """Test that tool calls stop once the request's prompt total is used up"""
+        history = ChatHistory(system_message="word " * 100)
+        prompt = count_history(history)
+        contexts = self.tool_turn(history, ["c1"])
+        budget = TokenBudget(prompt_tokens=1000, completion_tokens=100, request_prompt_tokens=prompt)
+
+        self.run_filter(contexts, budget)
+
+        assert budget.exhausted
+        assert contexts[0].terminate is True
+
+    def test_terminates_when_result_cannot_fit(self, encoding):
+        """Test that a tool result that cannot fit the prompt budget stops further tool calls"""
+        history = ChatHistory(system_message="word " * 100)
+        contexts = self.tool_turn(history, ["c1"])
+        contexts[0].function_result = SimpleNamespace(value="rain " * 20)
+
+        self.run_filter(contexts, TokenBudget(prompt_tokens=110, completion_tokens=100))
+
+        assert contexts[0].terminate is True
+
+
+class TestFilterOrder:
+    """Test cases for the order of the tool-turn filters"""
+
+    def test_budget_charges_compacted_result(self, encoding):
+        """Test that filters run outermost-first as registered and the budget sees the compacted result"""
+        kernel = Kernel()
+        filters = setup_kernel_filters(kernel)
+        registered = [f for _, f in reversed(kernel.auto_function_invocation_filters)]
+        assert registered == [filters[name] for name in ("deadline", "tracing", "token_budget", "compaction")]
+
+        metadata = kernel.add_plugin(CardTools(), plugin_name="Card")["get_card_recommendation"].metadata
+        raw = "Great food here. " * 2500
+        context = SimpleNamespace(
+            function=SimpleNamespace(name="web_search", plugin_name="Search", metadata=metadata),
+            arguments={"query": "paris"},
+            function_result=None,
+            chat_history=ChatHistory(system_message="system"),
+            terminate=False,
+        )
+
+        async def function(ctx):
+            ctx.function_result = FunctionResult(function=metadata, value=raw)
+
+        async def run():
+            with budget_scope(TokenBudget(prompt_tokens=1000, completion_tokens=100)):
+                await kernel.construct_call_stack(FilterTypes.AUTO_FUNCTION_INVOCATION, function)(context)
+
+        asyncio.run(run())
+        # Only the compacted result has to fit the prompt budget
+        assert count_tokens(raw) > 1000
+        assert len(context.function_result.value) < len(raw)
+        assert context.terminate is False
+
+
+class TestPlanningBudget:
+    """Test cases for the planning call under a spent request budget"""
+
+    def test_spent_budget_skips_planning_call(self, encoding, monkeypatch):
+        """Test that no planning call is made once the request's tokens are used up"""
+        monkeypatch.delenv("AGENT_CASSETTE", raising=False)
+
+        class UnreachableChat:
+            async def get_streaming_chat_message_content(self, chat_history, settings, kernel):
+                raise AssertionError("The planning call must be skipped")
+                yield
+
+        async def run():
+            with budget_scope(TokenBudget(request_prompt_tokens=10)) as budget:
+                budget.charge("extraction", 10)
+                return await main._run_plan(Kernel(), "Atlantis", {"destination": "Atlantis"})
+
+        with patch.object(Kernel, "get_service", return_value=UnreachableChat()), \
+             patch("app.main.response_cache.put"):
+            output = asyncio.run(run())
+
+        assert "Token budget exhausted" in output
+
+    def test_prefetch_note_lists_only_kept_results(self, encoding, monkeypatch):
+        """Test that prefetched results dropped to fit the budget are not announced to the model"""
+        monkeypatch.delenv("AGENT_CASSETTE", raising=False)
+        prompts = []
+
+        class RecordingChat:
+            async def get_streaming_chat_message_content(self, chat_history, settings, kernel):
+                prompts.append(chat_history.messages[1].content)
+                yield "{}"
+
+        def drop_prefetch(self, chat_history, reserve=0):
+            TokenBudget._drop_oldest_exchange(chat_history)
+            return True
+
+        kernel = Kernel()
+        kernel.add_plugin(CardTools(), plugin_name="Card")
+        requirements = {"destination": "Atlantis", "card": "BankGold"}
+
+        async def run(fit):
+            with patch.object(TokenBudget, "fit", fit), budget_scope(TokenBudget()):
+                await main._run_plan(kernel, "Atlantis with BankGold", requirements)
+
+        with patch.object(Kernel, "get_service", return_value=RecordingChat()), \
+             patch("app.main.response_cache.put"):
+            asyncio.run(run(lambda self, chat_history, reserve=0: True))
+            asyncio.run(run(drop_prefetch))
+
+        kept, dropped = prompts
+        assert "Already retrieved" in kept and "get_card_recommendation" in kept
+        assert "Already retrieved" not in dropped
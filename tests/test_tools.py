@@ -2,9 +2,13 @@
 Unit tests for tool functions
 """
 
+import asyncio
+import json
+import httpx
 import pytest
 from unittest.mock import patch, Mock
-from app.tools.weather import WeatherTools
+from app.http_client import PooledHttpClient
+from app.tools.weather import WeatherTools, forecast_cache
 from app.tools.fx import FxTools
 from app.tools.search import SearchTools
 from app.tools.card import CardTools
@@ -13,41 +17,57 @@ from app.tools.card import CardTools
 class TestWeatherTool:
     """Test cases for weather tool"""
     
-    @patch('app.tools.weather.requests.get')
-    def test_get_weather_success(self, mock_get):
+    @pytest.fixture(autouse=True)
+    def empty_forecast_cache(self):
+        forecast_cache.clear()
+        yield
+        forecast_cache.clear()
+    
+    def test_get_weather_success(self):
         """Test successful weather data retrieval"""
-        # Mock response
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            'latitude': 48.8566,
-            'longitude': 2.3522,
-            'timezone': 'GMT',
-            'daily': {
-                'time': ['2025-09-03', '2025-09-04'],
-                'temperature_2m_max': [25.0, 26.0],
-                'temperature_2m_min': [15.0, 16.0],
-                'weathercode': [1, 2]
-            }
+        requests_seen = []
+        
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, json={
+                'latitude': 48.8566,
+                'longitude': 2.3522,
+                'timezone': 'GMT',
+                'daily': {
+                    'time': ['2025-09-03', '2025-09-04'],
+                    'temperature_2m_max': [25.0, 26.0],
+                    'temperature_2m_min': [15.0, 16.0],
+                    'weathercode': [1, 2]
+                }
+            })
+        
+        client = PooledHttpClient(transport=httpx.MockTransport(handler), backoff=0)
+        with patch('app.tools.weather.http_client', client):
+            result = json.loads(asyncio.run(WeatherTools().get_weather(48.8566, 2.3522)))
+        
+        assert result == {
+            'dates': ['2025-09-03', '2025-09-04'],
+            'max_temp': [25, 26],
+            'min_temp': [15, 16],
+            'code': [1, 2]
         }
-        mock_get.return_value = mock_response
+        assert len(requests_seen) == 1
+        assert requests_seen[0].url.params['latitude'] == '48.85'
+    
+    def test_get_weather_api_error(self):
+        """Test weather tool reports API errors after retrying"""
+        calls = []
         
-        weather_tool = WeatherTools()
-        result = weather_tool.get_weather(48.8566, 2.3522)
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503)
         
-        assert result['latitude'] == 48.8566
-        assert result['longitude'] == 2.3522
-        assert result['timezone'] == 'GMT'
-        assert 'daily' in result
-        mock_get.assert_called_once()
-    
-    @patch('app.tools.weather.requests.get')
-    def test_get_weather_api_error(self, mock_get):
-        """Test weather tool handles API errors"""
-        mock_get.side_effect = Exception("API Error")
+        client = PooledHttpClient(transport=httpx.MockTransport(handler), retries=2, backoff=0)
+        with patch('app.tools.weather.http_client', client):
+            result = json.loads(asyncio.run(WeatherTools().get_weather(48.8566, 2.3522)))
         
-        weather_tool = WeatherTools()
-        with pytest.raises(Exception):
-            weather_tool.get_weather(48.8566, 2.3522)
+        assert 'error' in result
+        assert len(calls) == 3
 
 
 class TestFxTool:
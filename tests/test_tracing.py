@@ -0,0 +1,101 @@
+"""
+Unit tests for per-request latency tracing
+"""
+
+import asyncio
+import json
+import time
+from semantic_kernel import Kernel
+from app.prefetch import ToolCall, execute_prefetch
+from app.state import AgentState, Phase
+from app.tools.card import CardTools
+from app.tracing import LatencyHistogram, RequestTrace, trace_scope, traced
+
+
+class TestRequestTrace:
+    """Test cases for RequestTrace class"""
+
+    def test_agent_state_records_phases(self):
+        """Test that advance() opens a phase span per transition"""
+        state = AgentState()
+        state.trace = RequestTrace()
+        state.trace.enter(Phase.Init)
+        for _ in range(3):
+            state.advance()
+        state.trace.finish()
+
+        names = [span.name for span in state.trace.spans if span.kind == "phase"]
+        assert names == ["Init", "ClarifyRequirements", "PlanTools", "ExecuteTools"]
+        assert all(span.end is not None for span in state.trace.spans)
+
+    def test_same_phase_is_not_reopened(self):
+        """Test that entering the current phase again keeps one span"""
+        trace = RequestTrace()
+        trace.enter(Phase.ClarifyRequirements)
+        trace.enter(Phase.ClarifyRequirements)
+        assert len(trace.spans) == 1
+
+    def test_spans_and_json_export(self):
+        """Test span durations, errors and the JSON layout"""
+        trace = RequestTrace()
+        trace.enter(Phase.ExecuteTools)
+        with trace.span("tool", "get_weather"):
+            time.sleep(0.01)
+        try:
+            with trace.span("llm", "planning"):
+                raise TimeoutError()
+        except TimeoutError:
+            pass
+        trace.finish()
+
+        data = json.loads(trace.to_json())
+        spans = {span["name"]: span for span in data["spans"]}
+        assert spans["get_weather"]["end"] - spans["get_weather"]["start"] >= 0.01
+        assert spans["planning"]["attributes"]["error"] == "TimeoutError"
+        assert data["phases"]["ExecuteTools"] <= data["total"]
+
+
+class TestLatencyHistogram:
+    """Test cases for LatencyHistogram class"""
+
+    def test_buckets_and_share(self):
+        """Test bucket placement and share of request time"""
+        histogram = LatencyHistogram(buckets_ms=(10, 100))
+        histogram.observe("phase:ExecuteTools", 0.005)
+        histogram.observe("phase:ExecuteTools", 0.5)
+        histogram.observe("request:total", 1.0)
+
+        metrics = histogram.get_metrics()["phase:ExecuteTools"]
+        assert metrics["buckets"] == {"<=10ms": 1, "<=100ms": 0, ">100ms": 1}
+        assert metrics["max_ms"] == 500
+        assert metrics["share"] == 0.505
+
+
+class TestTraceScope:
+    """Test cases for tracing a request"""
+
+    def test_prefetch_tools_traced_and_exported(self, tmp_path, monkeypatch):
+        """Test that tool calls become spans and the trace is written as JSON lines"""
+        path = tmp_path / "traces.jsonl"
+        monkeypatch.setenv("AGENT_TRACE_FILE", str(path))
+        kernel = Kernel()
+        kernel.add_plugin(CardTools(), plugin_name="Card")
+        calls = [ToolCall("card", "Card", "get_card_recommendation", {"card_name": "BankGold"})]
+
+        async def run():
+            with trace_scope() as trace:
+                trace.enter(Phase.ExecuteTools)
+                await execute_prefetch(kernel, calls)
+            return trace
+
+        trace = asyncio.run(run())
+        assert [(span.kind, span.name) for span in trace.spans] == [
+            ("phase", "ExecuteTools"), ("tool", "get_card_recommendation"),
+        ]
+        exported = json.loads(path.read_text().splitlines()[-1])
+        assert exported["trace_id"] == trace.trace_id
+
+    def test_traced_outside_request_is_noop(self):
+        """Test that spans outside a request are not recorded"""
+        with traced("tool", "get_weather") as span:
+            assert span is None
@@ -0,0 +1,339 @@
+"""
+Unit tests for the geo-tiled forecast cache
+"""
+
+import asyncio
+import json
+from datetime import date, datetime, timedelta, timezone
+import httpx
+import pytest
+from unittest.mock import patch
+from semantic_kernel import Kernel
+from semantic_kernel.functions import KernelArguments
+from app.http_client import PooledHttpClient
+from app.tools import weather
+from app.forecast import Forecast
+from app.tools.weather import ForecastCache, Location, WeatherTools, split_window, travel_window
+
+FORECAST = {
+    "daily": {
+        "time": ["2026-06-01", "2026-06-02"],
+        "temperature_2m_max": [24.0, 25.5],
+        "temperature_2m_min": [14.0, 15.0],
+        "weathercode": [1, 61],
+    }
+}
+
+
+@pytest.fixture
+def open_meteo(tmp_path):
+    """Fresh cache and a counting Open-Meteo stand-in (one forecast per coordinate)"""
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(request)
+        await asyncio.sleep(0.01)
+        count = len(request.url.params["latitude"].split(","))
+        return httpx.Response(200, json=FORECAST if count == 1 else [FORECAST] * count)
+
+    client = PooledHttpClient(transport=httpx.MockTransport(handler), backoff=0)
+    with patch.object(weather, "forecast_cache", ForecastCache(disk_dir="")), \
+         patch.object(weather, "http_client", client):
+        yield requests_seen
+
+
+class TestForecastCache:
+    """Test cases for ForecastCache class"""
+
+    def test_tiles_snap_to_centres(self):
+        """Test that points in one tile share a key and neighbouring tiles do not"""
+        cache = ForecastCache(tile_degrees=0.1, update_hours=6, disk_dir="")
+        assert cache.tile(48.8566, 2.3522) == (48.85, 2.35)
+        assert cache.tile(48.8012, 2.3999) == (48.85, 2.35)
+        assert cache.tile(-33.8688, 151.2093) == (-33.85, 151.25)
+        assert cache.tile(48.9001, 2.3522) != cache.tile(48.8999, 2.3522)
+        assert cache.tile(41.9, 12.5) == (41.95, 12.55)
+
+    def test_ttl_ends_at_next_model_run(self):
+        """Test that entries are keyed by issue time and expire when the next run is issued"""
+        cache = ForecastCache(update_hours=6, disk_dir="")
+        now = 1_780_000_000 + 3600  # one hour after a run
+        key = cache.key(48.85, 2.35, now)
+
+        assert key[2] == cache.issue_time(now) and key[2] % (6 * 3600) == 0
+        assert cache.ttl(key, now) == pytest.approx(cache.update_seconds - (now - key[2]))
+        assert cache.key(48.85, 2.35, now + 6 * 3600)[2] == key[2] + 6 * 3600
+
+    def test_disk_tier_is_shared(self, tmp_path):
+        """Test that a forecast stored by one process is found by another"""
+        writer = ForecastCache(disk_dir=str(tmp_path))
+        reader = ForecastCache(disk_dir=str(tmp_path))
+        key = writer.key(48.8566, 2.3522)
+
+        forecast = Forecast(("2026-06-01",), (24.0,), (14.0,), (1,))
+        writer.set(key, forecast)
+
+        assert reader.get(key) == forecast
+        assert reader.get(key) is reader.get(key)
+        metrics = reader.get_metrics()
+        assert (metrics["disk_hits"], metrics["memory_hits"], metrics["misses"]) == (1, 2, 0)
+
+    def test_disk_tier_keeps_only_current_run(self, tmp_path):
+        """Test that storing a newer run removes the tile's older file"""
+        cache = ForecastCache(disk_dir=str(tmp_path))
+        key = cache.key(48.8566, 2.3522)
+        older = (key[0], key[1], key[2] - int(cache.update_seconds))
+        (tmp_path / f"{older[0]}_{older[1]}_{older[2]}.json").write_text("{}")
+
+        cache.set(key, Forecast())
+
+        assert [path.name for path in tmp_path.iterdir()] == ["_".join(map(str, key)) + ".json"]
+
+    def test_invalid_settings_fall_back(self, monkeypatch):
+        """Test that bad WEATHER_* settings use the defaults instead of breaking tiling"""
+        monkeypatch.setenv("WEATHER_TILE_DEG", "0")
+        monkeypatch.setenv("WEATHER_UPDATE_HOURS", "hourly")
+        monkeypatch.setenv("WEATHER_CACHE_SIZE", "-5")
+        cache = ForecastCache(disk_dir="")
+
+        assert cache.tile_degrees == weather.DEFAULT_TILE_DEGREES
+        assert cache.update_seconds == 3600 * weather.DEFAULT_UPDATE_HOURS
+        assert cache.memory.max_size == weather.DEFAULT_FORECAST_CACHE_SIZE
+
+    def test_windows_are_cached_separately(self):
+        """Test that forecasts for different days of a tile do not share an entry"""
+        cache = ForecastCache(disk_dir="")
+        june = cache.key(48.8566, 2.3522, window=(date(2026, 6, 1), date(2026, 6, 8)))
+        july = cache.key(48.8566, 2.3522, window=(date(2026, 7, 1), date(2026, 7, 3)))
+
+        assert june[3:] == ("2026-06-01", "2026-06-08")
+        assert june[:3] == july[:3] and june != july
+
+
+class TestCachedWeatherTool:
+    """Test cases for WeatherTools with the forecast cache"""
+
+    def test_nearby_and_repeated_lookups_share_one_fetch(self, open_meteo):
+        """Test that lookups within a tile, including concurrent ones, hit Open-Meteo once"""
+        tools = WeatherTools()
+
+        async def run():
+            return await asyncio.gather(
+                tools.get_weather(48.8566, 2.3522),
+                tools.get_weather(48.8584, 2.3399),
+                tools.get_weather(48.8566, 2.3522),
+            )
+
+        results = asyncio.run(run())
+        again = asyncio.run(tools.get_weather(48.8530, 2.3499))
+
+        assert len(open_meteo) == 1
+        assert all(json.loads(result) == json.loads(again) for result in results)
+        assert weather.forecast_cache.get_metrics()["hit_rate"] > 0
+
+    def test_errors_are_not_cached(self, open_meteo):
+        """Test that a failed fetch is retried on the next lookup"""
+        failing = PooledHttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+        with patch.object(weather, "http_client", failing):
+            assert "error" in json.loads(asyncio.run(WeatherTools().get_weather(35.68, 139.69)))
+
+        assert "dates" in json.loads(asyncio.run(WeatherTools().get_weather(35.68, 139.69)))
+        assert len(open_meteo) == 1
+
+
+class TestWeatherBatch:
+    """Test cases for get_weather_batch"""
+
+    def test_one_request_for_all_missing_tiles(self, open_meteo):
+        """Test that cached tiles are skipped and the rest fetched in one request"""
+        tools = WeatherTools()
+        asyncio.run(tools.get_weather(48.8566, 2.3522))
+        locations = [
+            Location(lat=48.8566, lon=2.3522, name="Paris"),
+            Location(lat=41.9028, lon=12.4964, name="Rome"),
+            Location(lat=41.9000, lon=12.4999, name="Rome centre"),
+            Location(lat=40.4168, lon=-3.7038, name="Madrid"),
+        ]
+
+        result = json.loads(asyncio.run(tools.get_weather_batch(locations)))
+
+        assert len(open_meteo) == 2
+        assert open_meteo[1].url.params["latitude"] == "41.95,40.45"
+        assert [entry["name"] for entry in result["locations"]] == ["Paris", "Rome", "Rome centre", "Madrid"]
+        assert all(entry["max_temp"] == [24, 25.5] for entry in result["locations"])
+
+    def test_large_batches_are_chunked(self, open_meteo):
+        """Test that batches over MAX_BATCH_LOCATIONS are split into several requests"""
+        locations = [{"lat": float(lat), "lon": 10.0} for lat in range(5)]
+        with patch.object(weather, "MAX_BATCH_LOCATIONS", 2):
+            result = json.loads(asyncio.run(WeatherTools().get_weather_batch(locations)))
+
+        assert len(open_meteo) == 3
+        assert len(result["locations"]) == 5
+        assert "name" not in result["locations"][0]
+
+    def test_malformed_location_gets_its_own_error(self, open_meteo):
+        """Test that a malformed entry is reported in place without failing the other locations"""
+        locations = [{"lat": 48.8566, "lon": 2.3522, "name": "Paris"}, {"lat": "north", "lon": 2.0}, {"name": "Nowhere"}]
+
+        result = json.loads(asyncio.run(WeatherTools().get_weather_batch(locations)))
+
+        paris, bad_lat, missing = result["locations"]
+        assert paris["name"] == "Paris" and "error" not in paris
+        assert bad_lat == {"error": bad_lat["error"]} and "lat" in bad_lat["error"]
+        assert "error" in missing
+        assert len(open_meteo) == 1
+
+    def test_chunks_fetched_concurrently(self, open_meteo):
+        """Test that the requests of a chunked batch overlap instead of running one after another"""
+        locations = [{"lat": float(lat), "lon": 10.0} for lat in range(6)]
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await WeatherTools().get_weather_batch(locations)
+            return loop.time() - start
+
+        with patch.object(weather, "MAX_BATCH_LOCATIONS", 1):
+            elapsed = asyncio.run(run())
+
+        assert len(open_meteo) == 6
+        assert elapsed < 0.05
+
+    def test_batch_shares_in_flight_fetches(self, open_meteo):
+        """Test that a batch and a concurrent single lookup of one tile make one request"""
+        tools = WeatherTools()
+
+        async def run():
+            return await asyncio.gather(
+                tools.get_weather(48.8566, 2.3522),
+                tools.get_weather_batch([{"lat": 48.8566, "lon": 2.3522}, {"lat": 41.9028, "lon": 12.4964}]),
+                tools.get_weather_batch([{"lat": 41.9028, "lon": 12.4964}]),
+            )
+
+        single, batch, rome = asyncio.run(run())
+
+        assert len(open_meteo) == 2
+        assert json.loads(batch)["locations"][0]["max_temp"] == json.loads(single)["max_temp"]
+        assert "dates" in json.loads(rome)["locations"][0]
+
+    def test_failed_fetch_reported_per_location(self, open_meteo):
+        """Test that a failed request gives error entries without failing the batch"""
+        tools = WeatherTools()
+        asyncio.run(tools.get_weather(48.8566, 2.3522))
+        failing = PooledHttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(400)))
+        locations = [{"lat": 48.8566, "lon": 2.3522}, {"lat": 35.68, "lon": 139.69}]
+        with patch.object(weather, "http_client", failing):
+            paris, tokyo = json.loads(asyncio.run(tools.get_weather_batch(locations)))["locations"]
+
+        assert "dates" in paris
+        assert "400" in tokyo["error"]
+
+    def test_invoked_through_kernel(self, open_meteo):
+        """Test that the model's JSON arguments are parsed into locations"""
+        kernel = Kernel()
+        kernel.add_plugin(WeatherTools(), plugin_name="Weather")
+        function = kernel.get_function("Weather", "get_weather_batch")
+
+        result = asyncio.run(kernel.invoke(function, KernelArguments(
+            locations=[{"lat": 48.8566, "lon": 2.3522, "name": "Paris"}, {"lat": 51.5072, "lon": -0.1276}],
+        )))
+
+        assert [entry.get("name") for entry in json.loads(str(result))["locations"]] == ["Paris", None]
+
+
+def utc_today():
+    return datetime.now(timezone.utc).date()
+
+
+class TestDateWindows:
+    """Test cases for travel-date-aware forecasts"""
+
+    def test_window_defaults_and_validation(self):
+        """Test default windows and rejected ranges"""
+        today = date(2026, 6, 1)
+        assert travel_window(today=today) == (today, date(2026, 6, 10))
+        assert travel_window("2026-06-05", today=today) == (date(2026, 6, 5), date(2026, 6, 14))
+        with pytest.raises(ValueError):
+            travel_window("2026-06-08", "2026-06-01")
+        with pytest.raises(ValueError):
+            travel_window("2026-06-01", "2026-09-01")
+
+    def test_split_at_forecast_horizon(self):
+        """Test that past days are dropped and days past the horizon use climate normals"""
+        today = date(2026, 6, 1)
+        forecast, normal_days = split_window((date(2026, 5, 30), date(2026, 6, 18)), today)
+
+        assert forecast == (date(2026, 6, 1), date(2026, 6, 16))
+        assert normal_days == [date(2026, 6, 17), date(2026, 6, 18)]
+        assert split_window((date(2026, 8, 1), date(2026, 8, 2)), today)[0] is None
+
+    def test_only_travel_dates_fetched(self, open_meteo):
+        """Test that Open-Meteo is asked for the travel dates only"""
+        start = utc_today() + timedelta(days=2)
+        end = start + timedelta(days=1)
+        asyncio.run(WeatherTools().get_weather(48.8566, 2.3522, start.isoformat(), end.isoformat()))
+
+        params = open_meteo[0].url.params
+        assert (params["start_date"], params["end_date"]) == (start.isoformat(), end.isoformat())
+        assert "forecast_days" not in params
+
+    def test_trip_beyond_horizon_uses_climatology(self, open_meteo):
+        """Test that a trip months away is answered from climate normals without a request"""
+        start = utc_today() + timedelta(days=90)
+        result = json.loads(asyncio.run(WeatherTools().get_weather(
+            48.8566, 2.3522, start.isoformat(), (start + timedelta(days=2)).isoformat())))
+
+        assert open_meteo == []
+        assert result["climatology_from"] == start.isoformat()
+        assert result["dates"][0] == start.isoformat()
+        assert len(result["dates"]) == len(result["max_temp"]) == len(result["min_temp"]) == 3
+        assert result["max_temp"][0] > result["min_temp"][0]
+        assert "code" not in result
+
+    def test_trip_across_horizon(self, open_meteo):
+        """Test that forecast days are followed by climate-normal days"""
+        start = utc_today() + timedelta(days=14)
+        end = start + timedelta(days=4)
+        result = json.loads(asyncio.run(WeatherTools().get_weather(
+            48.8566, 2.3522, start.isoformat(), end.isoformat())))
+
+        assert open_meteo[0].url.params["end_date"] == (utc_today() + timedelta(days=15)).isoformat()
+        assert result["climatology_from"] == (utc_today() + timedelta(days=16)).isoformat()
+        assert result["dates"][-1] == end.isoformat()
+        assert result["code"][-1] is None and result["code"][0] is not None
+
+    def test_no_normals_for_remote_points(self, open_meteo):
+        """Test that points without nearby normals get a note instead of days"""
+        start = utc_today() + timedelta(days=60)
+        result = json.loads(asyncio.run(WeatherTools().get_weather(0.0, -30.0, start.isoformat())))
+
+        assert result["dates"] == []
+        assert "No forecast" in result["note"]
+
+    def test_past_dates_get_a_note(self, open_meteo):
+        """Test that travel dates already over are reported instead of returning silent empty columns"""
+        start = (utc_today() - timedelta(days=10)).isoformat()
+        end = (utc_today() - timedelta(days=5)).isoformat()
+        single = json.loads(asyncio.run(WeatherTools().get_weather(48.8566, 2.3522, start, end)))
+        batch = json.loads(asyncio.run(WeatherTools().get_weather_batch(
+            [{"lat": 48.8566, "lon": 2.3522, "name": "Paris"}], start, end)))
+
+        assert open_meteo == []
+        assert single["dates"] == []
+        assert single["note"] == f"Travel dates {start} to {end} have already passed"
+        assert batch["locations"][0]["note"] == single["note"]
+
+    def test_invalid_dates_reported(self, open_meteo):
+        """Test that malformed dates give an error result"""
+        assert "error" in json.loads(asyncio.run(WeatherTools().get_weather(48.85, 2.35, "June 1st")))
+        assert "error" in json.loads(asyncio.run(WeatherTools().get_weather_batch([], "2026-06-08", "2026-06-01")))
+
+    def test_batch_beyond_horizon(self, open_meteo):
+        """Test that a batch past the horizon is answered locally for every location"""
+        start = (utc_today() + timedelta(days=120)).isoformat()
+        result = json.loads(asyncio.run(WeatherTools().get_weather_batch(
+            [{"lat": 48.8566, "lon": 2.3522, "name": "Paris"}, {"lat": 41.9028, "lon": 12.4964}], start, start)))
+
+        assert open_meteo == []
+        assert all(entry["climatology_from"] == start for entry in result["locations"])